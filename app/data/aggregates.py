@@ -0,0 +1,119 @@
+from app.data.db import invalidate, transaction
+from app.data.tracing import traced
+
+# (summary table, source table, grouped column). Each summary table holds
+# one row per group, kept current by triggers on the source table, so the
+# dashboard count queries read O(groups) rows instead of the whole table.
+# NULL primary keys never conflict, so the NULL group is stored under ''
+# with is_null = 1, apart from a group of real empty strings.
+AGGREGATES = [
+    ("incident_severity_counts", "cyber_incidents", "severity"),
+    ("ticket_priority_counts", "it_tickets", "priority"),
+    ("dataset_uploader_counts", "datasets_metadata", "uploaded_by"),
+]
+
+
+def create_aggregate_tables(conn):
+    """
+    Create the summary count tables and the triggers that maintain them,
+    then fill them from the current data.
+
+    Args:
+        conn: Database connection object
+    """
+    cursor = conn.cursor()
+
+    for summary, source, column in AGGREGATES:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {summary} (
+                {column} TEXT NOT NULL,
+                is_null INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY ({column}, is_null)
+            )
+        """)
+
+        increment = f"""
+            INSERT INTO {summary} ({column}, is_null, count)
+            VALUES (IFNULL(NEW.{column}, ''), NEW.{column} IS NULL, 1)
+            ON CONFLICT({column}, is_null) DO UPDATE SET count = count + 1;
+        """
+        group = f"{column} = IFNULL(OLD.{column}, '') AND is_null = (OLD.{column} IS NULL)"
+        decrement = f"""
+            UPDATE {summary} SET count = count - 1 WHERE {group};
+            DELETE FROM {summary} WHERE {group} AND count <= 0;
+        """
+
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{summary}_insert
+            AFTER INSERT ON {source}
+            BEGIN {increment} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{summary}_update
+            AFTER UPDATE OF {column} ON {source}
+            WHEN OLD.{column} IS NOT NEW.{column}
+            BEGIN {decrement} {increment} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{summary}_delete
+            AFTER DELETE ON {source}
+            BEGIN {decrement} END
+        """)
+
+    rebuild_aggregates(conn)
+    print("Aggregate tables created successfully!")
+
+
+def recreate_aggregate_tables(conn):
+    """
+    Drop the summary tables and their triggers and create them again, for
+    databases made when the NULL group shared the '' key with empty
+    strings.
+
+    Args:
+        conn: Database connection object
+    """
+    cursor = conn.cursor()
+    for summary, _, _ in AGGREGATES:
+        for event in ("insert", "update", "delete"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_{summary}_{event}")
+        cursor.execute(f"DROP TABLE IF EXISTS {summary}")
+    create_aggregate_tables(conn)
+
+
+@traced
+def rebuild_aggregates(conn=None):
+    """
+    Recompute every summary table from its source table, e.g. after a
+    bulk load that bypassed the triggers.
+
+    Args:
+        conn: Database connection object; a pooled transaction is used
+            when omitted
+
+    Returns:
+        dict: summary table -> number of groups
+    """
+    if conn is None:
+        with transaction() as conn:
+            return rebuild_aggregates(conn)
+
+    groups = {}
+    cursor = conn.cursor()
+    for summary, source, column in AGGREGATES:
+        invalidate(source)
+        cursor.execute(f"DELETE FROM {summary}")
+        cursor.execute(f"""
+            INSERT INTO {summary} ({column}, is_null, count)
+            SELECT IFNULL({column}, ''), {column} IS NULL, COUNT(*) FROM {source}
+            GROUP BY {column}
+        """)
+        groups[summary] = cursor.rowcount
+    return groups
+
+
+if __name__ == "__main__":
+    # python -m app.data.aggregates
+    for table, count in rebuild_aggregates().items():
+        print(f"Rebuilt {table}: {count} groups")
@@ -0,0 +1,206 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.data import datasets as _datasets
+from app.data import incidents as _incidents
+from app.data import tickets as _tickets
+from app.data.db import DB_PATH, get_pool
+
+# Threads running data-layer calls for async callers. Each one pins a
+# reader connection, so keep this well below POOL_SIZE to leave
+# connections for Streamlit script threads.
+QUERY_WORKERS = 4
+
+# Seconds a page waits for its queries before giving up on them
+QUERY_TIMEOUT = 30.0
+
+
+class QueryExecutor:
+    """
+    Runs blocking data-layer functions on a dedicated thread pool so
+    asyncio code can await them and run several at once.
+
+    Each worker thread checks out one reader connection on its first call
+    and keeps it; every read_connection() inside the data layer on that
+    thread reuses it. Cancelling or timing out a call interrupts the
+    query running on that connection, so the worker is freed promptly
+    instead of finishing a result nobody will read.
+    """
+
+    def __init__(self, workers=QUERY_WORKERS, db_path=DB_PATH):
+        """
+        Args:
+            workers: Threads running queries
+            db_path: Path to the database file
+        """
+        self.db_path = db_path
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="sqlite-query")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._running = {}
+        self._pinned = []
+
+    def _pin_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = get_pool(self.db_path, "reader").acquire()
+            self._local.conn = conn
+            with self._lock:
+                self._pinned.append(conn)
+        return conn
+
+    def _call(self, token, func, args, kwargs):
+        conn = self._pin_connection()
+        with self._lock:
+            self._running[token] = conn
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                del self._running[token]
+
+    def _interrupt(self, token):
+        # Only a call that is still running is interrupted; once it has
+        # returned, its connection may already be serving the next call
+        with self._lock:
+            conn = self._running.get(token)
+            if conn is not None:
+                conn.interrupt()
+
+    async def run(self, func, *args, timeout=None, **kwargs):
+        """
+        Run a data-layer function on the executor and await its result.
+
+        Args:
+            func: Blocking function, e.g. incidents.get_severity_count
+            *args: Positional arguments for func
+            timeout: Seconds to wait, or None to wait indefinitely
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            object: Whatever func returns
+
+        Raises:
+            asyncio.TimeoutError: If timeout passes first; the running
+                query is interrupted
+        """
+        loop = asyncio.get_running_loop()
+        token = object()
+        future = loop.run_in_executor(
+            self._executor,
+            functools.partial(self._call, token, func, args, kwargs),
+        )
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            self._interrupt(token)
+            raise
+
+    def shutdown(self):
+        """
+        Wait for running calls, stop the worker threads and hand their
+        pinned connections back to the pool.
+        """
+        self._executor.shutdown(wait=True)
+        pool = get_pool(self.db_path, "reader")
+        with self._lock:
+            pinned, self._pinned = self._pinned, []
+        for conn in pinned:
+            pool.discard(conn)
+
+
+query_executor = QueryExecutor()
+
+
+async def gather_queries(calls, timeout=QUERY_TIMEOUT, executor=None):
+    """
+    Run several data-layer calls concurrently and collect their results.
+    If one fails or the timeout passes, the calls still running are
+    cancelled and their queries interrupted.
+
+    Args:
+        calls: dict name -> (function, *args), e.g.
+            {"severity": (incidents.get_severity_count,)}
+        timeout: Seconds allowed for the whole batch, or None
+        executor: QueryExecutor to use; defaults to query_executor
+
+    Returns:
+        dict: name -> result, in the order of `calls`
+
+    Raises:
+        asyncio.TimeoutError: If the batch does not finish in time
+    """
+    executor = executor or query_executor
+    tasks = {
+        name: asyncio.ensure_future(executor.run(func, *args))
+        for name, (func, *args) in calls.items()
+    }
+    try:
+        done, pending = await asyncio.wait(
+            tasks.values(), timeout=timeout, return_when=asyncio.FIRST_EXCEPTION
+        )
+        errors = [task.exception() for task in done if task.exception() is not None]
+        if errors:
+            raise errors[0]
+        if pending:
+            raise asyncio.TimeoutError(
+                f"{len(pending)} of {len(tasks)} queries still running after {timeout}s"
+            )
+        return {name: task.result() for name, task in tasks.items()}
+    finally:
+        unfinished = [task for task in tasks.values() if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+
+def fetch_all(calls, timeout=QUERY_TIMEOUT):
+    """
+    Blocking wrapper around gather_queries for Streamlit pages, which run
+    outside an event loop.
+
+    Args:
+        calls: dict name -> (function, *args)
+        timeout: Seconds allowed for the whole batch, or None
+
+    Returns:
+        dict: name -> result
+    """
+    return asyncio.run(gather_queries(calls, timeout))
+
+
+class AsyncDataModule:
+    """
+    Async view of a data-layer module: every function is awaitable and
+    runs on query_executor, e.g.
+    `await incidents.get_severity_count()`.
+    """
+
+    def __init__(self, module, executor=None):
+        """
+        Args:
+            module: Data-layer module, e.g. app.data.incidents
+            executor: QueryExecutor to use; defaults to query_executor
+        """
+        self._module = module
+        self._executor = executor or query_executor
+
+    def __getattr__(self, name):
+        func = getattr(self._module, name)
+        if not callable(func):
+            return func
+
+        @functools.wraps(func)
+        async def call(*args, **kwargs):
+            return await self._executor.run(func, *args, **kwargs)
+
+        return call
+
+
+incidents = AsyncDataModule(_incidents)
+tickets = AsyncDataModule(_tickets)
+datasets = AsyncDataModule(_datasets)
@@ -0,0 +1,287 @@
+import functools
+import sys
+import threading
+from collections import OrderedDict
+
+# Default limits for the process-wide query cache
+CACHE_MAX_ENTRIES = 512
+CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+
+def _freeze(value):
+    # Make call arguments hashable so they can be part of a cache key
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def _size_of(value):
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size_of(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    # Hand out copies so callers cannot mutate a cached DataFrame
+    if hasattr(value, "copy") and hasattr(value, "memory_usage"):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(_copy(item) for item in value)
+    if isinstance(value, (list, dict)):
+        return value.copy()
+    return value
+
+
+class QueryCache:
+    """
+    LRU cache of query results, invalidated by per-table generation counters.
+
+    Every write to a table bumps that table's generation. A cached result
+    remembers the generations of the tables it was read from and is
+    discarded as soon as any of them has moved on, so readers never get
+    data older than the last committed write made through the data layer.
+    Watchers (see add_watcher) bump tables written by other processes, and
+    clear() moves an epoch that every entry is stamped with.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        """
+        Args:
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum estimated memory held by cached results
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._listeners = []
+        self._watchers = []
+        self._stats = {"hits": 0, "misses": 0, "queries": 0,
+                       "evictions": 0, "invalidations": 0}
+
+    def generations(self, tables):
+        """
+        Get the current generation of each table.
+
+        Args:
+            tables: Table names
+
+        Returns:
+            tuple: The cache epoch followed by the generation numbers, in
+                the order given
+        """
+        with self._lock:
+            return self._stamp(tables)
+
+    def _stamp(self, tables):
+        # Caller holds self._lock
+        return (self._epoch,) + tuple(self._generations.get(table, 0) for table in tables)
+
+    def bump(self, *tables):
+        """
+        Record a committed write to one or more tables.
+
+        Args:
+            *tables: Table names
+        """
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+        for listener in self._listeners:
+            listener(*tables)
+
+    def add_listener(self, callback):
+        """
+        Call `callback(*tables)` after every bump(), e.g. to refresh a
+        derived copy of the tables that were written.
+
+        Args:
+            callback: Function taking table names; must be quick and
+                must not raise
+        """
+        self._listeners.append(callback)
+
+    def add_watcher(self, poll):
+        """
+        Call `poll()` before every lookup and bump the tables it returns,
+        e.g. to notice writes committed by other processes, which never
+        reach bump() in this one.
+
+        Args:
+            poll: Zero-argument function returning the names of tables
+                written since its previous call; must be quick and must
+                not raise
+        """
+        self._watchers.append(poll)
+
+    def get(self, key, tables):
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key
+            tables: Tables the result was read from
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss
+        """
+        for poll in self._watchers:
+            written = poll()
+            if written:
+                self.bump(*written)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                generations, value, size = entry
+                if generations == self._stamp(tables):
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, value
+                del self._entries[key]
+                self._bytes -= size
+                self._stats["invalidations"] += 1
+            self._stats["misses"] += 1
+            return False, None
+
+    def put(self, key, generations, value):
+        """
+        Store a result read at the given table generations.
+
+        Args:
+            key: Cache key
+            generations: Output of generations() taken before the query ran
+            value: Result to cache
+        """
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (generations, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._stats["evictions"] += 1
+
+    def get_or_compute(self, key, tables, compute):
+        """
+        Return the cached result for `key`, computing it on a miss. When
+        several threads miss on the same key at once, only one of them
+        runs `compute`; the others wait for its result.
+
+        Args:
+            key: Cache key
+            tables: Tables the result is read from
+            compute: Zero-argument function producing the result
+
+        Returns:
+            object: Cached or freshly computed result
+        """
+        while True:
+            hit, value = self.get(key, tables)
+            if hit:
+                return value
+
+            with self._lock:
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = self._inflight[key] = threading.Event()
+                    leader = True
+                else:
+                    leader = False
+
+            if not leader:
+                pending.wait()
+                continue
+
+            try:
+                # Take generations before querying: a write that lands
+                # meanwhile makes this entry stale rather than wrong
+                generations = self.generations(tables)
+                with self._lock:
+                    self._stats["queries"] += 1
+                value = compute()
+                self.put(key, generations, value)
+                return value
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                pending.set()
+
+    def clear(self):
+        """
+        Drop every cached result. Results still being computed are stamped
+        with the old epoch, so they are not served once stored.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._epoch += 1
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: hits, misses, queries (misses that actually ran the query;
+                concurrent misses on one key share a query), evictions,
+                invalidations, entries and bytes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        return stats
+
+
+query_cache = QueryCache()
+
+
+def cached_query(*tables):
+    """
+    Decorator that caches a read function's result in query_cache until
+    one of `tables` is written.
+
+    Args:
+        *tables: Tables the function reads
+
+    Returns:
+        function: Decorator
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, _freeze(args), _freeze(kwargs))
+            value = query_cache.get_or_compute(
+                key, tables, lambda: func(*args, **kwargs)
+            )
+            return _copy(value)
+
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """
+    Get statistics for the process-wide query cache.
+
+    Returns:
+        dict: Cache counters
+    """
+    return query_cache.stats()
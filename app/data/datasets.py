@@ -1,8 +1,24 @@
-import pandas as pd
-from app.data.db import connect_database
-
-
-def insert_dataset(dataset_id, name, rows, columns, uploaded_by, upload_date, created_at):
+from app.data.cache import cached_query
+from app.data.dtypes import apply_dtypes
+from app.data.snapshots import read_snapshot
+from app.data.tracing import traced
+from app.data.db import (
+    BATCH_SIZE, PAGE_SIZE, build_column_list, fetch_record, insert_many, invalidate,
+    iter_pages, read_connection, read_page, transaction,
+)
+
+# Insert column order for datasets_metadata
+DATASET_COLUMNS = (
+    "dataset_id", "dataset_name", "category", "source", "last_updated",
+    "record_count", "column_count", "file_size_mb", "uploaded_by",
+)
+
+# Columns get_all_datasets can return
+DATASET_READ_COLUMNS = {"id", *DATASET_COLUMNS, "created_at"}
+
+
+@traced
+def insert_dataset(dataset_id, name, rows, columns, uploaded_by, upload_date, created_at=None):
     """
     Insert new dataset metadata.
 
@@ -13,41 +29,100 @@ def insert_dataset(dataset_id, name, rows, columns, uploaded_by, upload_date, cr
         columns: num of columns
         uploaded_by: who uploaded it
         upload_date: date of upload
-        created_at: date and time of creation
+        created_at: date and time of creation (defaults to now)
 
     Returns:
         int: ID of inserted dataset
-        :param at:
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO datasets_metadata 
-        (dataset_name, category, source, last_updated, record_count, file_size_mb)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (dataset_id, name, rows, columns, uploaded_by, upload_date, created_at))
-    conn.commit()
-    dataset_id = cursor.lastrowid
-    conn.close()
-    return dataset_id
+    with transaction() as conn:
+        invalidate("datasets_metadata")
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO datasets_metadata 
+            (dataset_id, dataset_name, record_count, column_count, uploaded_by,
+             last_updated, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+        """, (dataset_id, name, rows, columns, uploaded_by, upload_date, created_at))
+        return cursor.lastrowid
+
+
+@traced
+def insert_datasets_many(records, batch_size=BATCH_SIZE):
+    """
+    Insert many datasets in a single transaction.
+
+    Args:
+        records: Iterable (or generator) of dicts keyed by DATASET_COLUMNS,
+            or of tuples in DATASET_COLUMNS order
+        batch_size: Rows per executemany() call
+
+    Returns:
+        tuple: (first_id, last_id) of the inserted rows, or None if empty
+    """
+    return insert_many("datasets_metadata", DATASET_COLUMNS, records, batch_size)
 
 
-def get_all_datasets():
+@traced
+@cached_query("datasets_metadata")
+def get_all_datasets(columns=None):
     """
-    Get all datasets as DataFrame.
+    Get all datasets as DataFrame, loaded from the columnar snapshot when it
+    is current and from SQLite otherwise. Columns have the types declared
+    in dtypes.TABLE_DTYPES: categoricals, datetimes and narrow integers.
+
+    Args:
+        columns: Optional list of columns to return, in that order;
+            all columns if None
 
     Returns:
         pandas.DataFrame: All datasets
     """
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM datasets_metadata ORDER BY id DESC",
-        conn
-    )
-    conn.close()
-    return df
+    select = build_column_list("datasets_metadata", columns, DATASET_READ_COLUMNS)
+    df = read_snapshot("datasets_metadata", columns)
+    if df is not None:
+        return df
+
+    import pandas as pd
+
+    with read_connection() as conn:
+        df = pd.read_sql_query(
+            f"SELECT {select} FROM datasets_metadata ORDER BY id DESC",
+            conn
+        )
+    return apply_dtypes(df, "datasets_metadata")
+
+
+@traced
+@cached_query("datasets_metadata")
+def get_datasets_page(before_id=None, after_id=None, page_size=PAGE_SIZE):
+    """
+    Get one page of datasets, newest first.
 
+    Args:
+        before_id: Cursor from the previous call; returns older datasets
+        after_id: Returns datasets newer than this id
+        page_size: Maximum rows in the page
+
+    Returns:
+        tuple: (pandas.DataFrame, next cursor or None)
+    """
+    return read_page("datasets_metadata", before_id, after_id, page_size)
 
+
+def iter_dataset_pages(page_size=PAGE_SIZE):
+    """
+    Lazily yield all datasets, newest first, one page at a time.
+
+    Args:
+        page_size: Rows per page
+
+    Yields:
+        pandas.DataFrame: Next page of datasets
+    """
+    yield from iter_pages("datasets_metadata", page_size)
+
+
+@traced
 def get_dataset_by_id(dataset_id):
     """
     Get a specific dataset by ID.
@@ -56,19 +131,17 @@ def get_dataset_by_id(dataset_id):
         dataset_id: ID of the dataset
 
     Returns:
-        tuple: Dataset record or None
+        Record: Dataset record (a named tuple of the table's columns) or None
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT * FROM datasets_metadata WHERE id = ?",
-        (dataset_id,)
-    )
-    dataset = cursor.fetchone()
-    conn.close()
-    return dataset
+    with read_connection() as conn:
+        return fetch_record(
+            conn,
+            "SELECT * FROM datasets_metadata WHERE id = ?",
+            (dataset_id,)
+        )
 
 
+@traced
 def update_dataset(dataset_id, **kwargs):
     """
     Update dataset metadata fields.
@@ -80,23 +153,21 @@ def update_dataset(dataset_id, **kwargs):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-
     # Build dynamic UPDATE query
     set_clause = ", ".join([f"{key} = ?" for key in kwargs.keys()])
     values = list(kwargs.values()) + [dataset_id]
 
-    cursor.execute(
-        f"UPDATE datasets_metadata SET {set_clause} WHERE id = ?",
-        values
-    )
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-    return rows_affected
+    with transaction() as conn:
+        invalidate("datasets_metadata")
+        cursor = conn.cursor()
+        cursor.execute(
+            f"UPDATE datasets_metadata SET {set_clause} WHERE id = ?",
+            values
+        )
+        return cursor.rowcount
 
 
+@traced
 def delete_dataset(dataset_id):
     """
     Delete a dataset from the database.
@@ -107,31 +178,31 @@ def delete_dataset(dataset_id):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "DELETE FROM datasets_metadata WHERE id = ?",
-        (dataset_id,)
-    )
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-    return rows_affected
-
+    with transaction() as conn:
+        invalidate("datasets_metadata")
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM datasets_metadata WHERE id = ?",
+            (dataset_id,)
+        )
+        return cursor.rowcount
+
+@traced
+@cached_query("datasets_metadata")
 def get_uploaded_by_count():
     """
-    Count uploaded by
+    Count uploaded by. Reads the trigger-maintained
+    dataset_uploader_counts table instead of grouping datasets_metadata.
 
     Returns:
         pandas.DataFrame: uploaded by counts
     """
-    conn = connect_database()
+    import pandas as pd
+
     query = """
-    SELECT uploaded_by, COUNT(*) AS count
-    FROM datasets_metadata
-    GROUP BY uploaded_by
+    SELECT CASE WHEN is_null THEN NULL ELSE uploaded_by END AS uploaded_by, count
+    FROM dataset_uploader_counts
     ORDER BY count DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    with read_connection() as conn:
+        return pd.read_sql_query(query, conn)
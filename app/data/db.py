@@ -1,6 +1,16 @@
+import queue
 import sqlite3
+import threading
+from collections import namedtuple
+from collections.abc import Mapping
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 
+from app.data.cache import query_cache
+from app.data.tracing import query_tracer, traced
+
 # Define paths
 DATA_DIR = Path("DATA")
 DB_PATH = DATA_DIR / "intelligence_platform.db"
@@ -8,16 +18,702 @@ DB_PATH = DATA_DIR / "intelligence_platform.db"
 # Create DATA folder if it doesn't exist
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Pool sizing defaults
+POOL_SIZE = 8
+POOL_TIMEOUT = 30.0
+
+# Rows per executemany() call for bulk inserts
+BATCH_SIZE = 5000
+
+# Rows per page for keyset-paginated readers
+PAGE_SIZE = 100
+
+# Prepared statements kept per connection. Filter queries with the same
+# shape produce identical SQL text, so they hit this cache.
+STATEMENT_CACHE_SIZE = 256
+
+
+# Named connection profiles. The writer runs in WAL mode so dashboard
+# reads never block behind a write; readers open the file read-only
+# with a large page cache and memory-mapped I/O.
+CONNECTION_PROFILES = {
+    "default": {
+        "read_only": False,
+        "pragmas": {},
+    },
+    "writer": {
+        "read_only": False,
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+        },
+    },
+    "reader": {
+        "read_only": True,
+        "pragmas": {
+            "busy_timeout": 5000,
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,
+            "temp_store": "MEMORY",
+        },
+    },
+}
 
-def connect_database(db_path=DB_PATH):
+
+def connect_database(db_path=DB_PATH, profile="writer", check_same_thread=True):
     """
     Connect to the SQLite database.
     Creates the database file if it doesn't exist.
 
     Args:
         db_path: Path to the database file
+        profile: Name of an entry in CONNECTION_PROFILES
+        check_same_thread: Passed through to sqlite3.connect
 
     Returns:
         sqlite3.Connection: Database connection object
     """
-    return sqlite3.connect(str(db_path))
+    settings = CONNECTION_PROFILES[profile]
+    if settings["read_only"]:
+        if not Path(db_path).exists():
+            # mode=ro cannot create the file; let a writer create it empty
+            sqlite3.connect(str(db_path)).close()
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+    else:
+        conn = sqlite3.connect(str(db_path), check_same_thread=check_same_thread,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+
+    for name, value in settings["pragmas"].items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    if query_tracer.enabled:
+        query_tracer.install(conn)
+    return conn
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared by the data layer.
+
+    A thread that already holds a connection gets the same one back on
+    nested calls, so a Streamlit script thread reuses a single connection
+    for everything it does during a rerun.
+    """
+
+    def __init__(self, db_path=DB_PATH, profile="writer", max_size=POOL_SIZE,
+                 timeout=POOL_TIMEOUT):
+        """
+        Args:
+            db_path: Path to the database file
+            profile: Name of an entry in CONNECTION_PROFILES
+            max_size: Maximum number of open connections
+            timeout: Seconds to wait for a free connection
+        """
+        self.db_path = db_path
+        self.profile = profile
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open_count = 0
+        self._stats = {"hits": 0, "waits": 0, "opens": 0, "reuses": 0}
+        # connection -> query_tracer.version its callbacks were set for
+        self._trace_versions = {}
+
+    def _open(self):
+        conn = connect_database(self.db_path, self.profile, check_same_thread=False)
+        self._stats["opens"] += 1
+        return conn
+
+    def _checkout(self):
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._stats["hits"] += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._open_count < self.max_size:
+                self._open_count += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._open_count -= 1
+                    raise
+            self._stats["waits"] += 1
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No database connection available after {self.timeout}s "
+                f"(pool size {self.max_size})"
+            )
+
+    def acquire(self):
+        """
+        Get a connection for the current thread.
+
+        Returns:
+            sqlite3.Connection: Pooled connection
+        """
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            with self._lock:
+                self._stats["reuses"] += 1
+            conn = held
+        else:
+            conn = self._checkout()
+            self._local.conn = conn
+            self._local.depth = 1
+
+        # Tracing was switched on or off since this connection was last used
+        if self._trace_versions.get(conn) != query_tracer.version:
+            self._trace_versions[conn] = query_tracer.install(conn)
+        return conn
+
+    def release(self, conn):
+        """
+        Return a connection obtained from acquire().
+
+        Args:
+            conn: Connection to release
+        """
+        if getattr(self._local, "conn", None) is not conn:
+            raise ValueError("Connection is not held by this thread")
+
+        if query_tracer.enabled:
+            query_tracer.finish_statement()
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def discard(self, conn):
+        """
+        Close a checked-out connection whose thread has exited without
+        releasing it, freeing its slot in the pool.
+
+        Args:
+            conn: Connection obtained from acquire() on a finished thread
+        """
+        self._trace_versions.pop(conn, None)
+        conn.close()
+        with self._lock:
+            self._open_count -= 1
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a with-block.
+
+        Yields:
+            sqlite3.Connection: Pooled connection
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Borrow a connection and run the with-block as one transaction.
+        Commits on success and rolls back on error. Nested transactions
+        on the same thread join the outer one.
+
+        Yields:
+            sqlite3.Connection: Pooled connection
+        """
+        with self.connection() as conn:
+            outermost = self._local.depth == 1
+            if outermost:
+                self._local.written = set()
+            try:
+                yield conn
+            except BaseException:
+                if outermost:
+                    conn.rollback()
+                    self._local.written = None
+                raise
+            else:
+                if outermost:
+                    conn.commit()
+                    written, self._local.written = self._local.written, None
+                    query_cache.bump(*written)
+
+    def mark_written(self, *tables):
+        """
+        Record that the current transaction wrote to `tables`. Their cache
+        generation is bumped once the outermost transaction commits, or
+        immediately when no transaction is open on this thread.
+
+        Args:
+            *tables: Table names
+        """
+        written = getattr(self._local, "written", None)
+        if written is None:
+            query_cache.bump(*tables)
+        else:
+            written.update(tables)
+
+    def stats(self):
+        """
+        Get pool statistics.
+
+        Returns:
+            dict: hits, waits, opens and reuses counters plus pool sizes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["open"] = self._open_count
+        stats["idle"] = self._idle.qsize()
+        stats["max_size"] = self.max_size
+        return stats
+
+    def close_all(self):
+        """
+        Close every idle connection in the pool.
+        """
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._trace_versions.pop(conn, None)
+            conn.close()
+            with self._lock:
+                self._open_count -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DB_PATH, profile="writer"):
+    """
+    Get the shared connection pool for a database file and profile.
+
+    Args:
+        db_path: Path to the database file
+        profile: Name of an entry in CONNECTION_PROFILES
+
+    Returns:
+        ConnectionPool: Pool for that database
+    """
+    key = (str(db_path), profile)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, profile)
+            _pools[key] = pool
+        return pool
+
+
+def get_connection(db_path=DB_PATH):
+    """
+    Borrow a pooled writer connection, e.g. `with get_connection() as conn:`.
+
+    Args:
+        db_path: Path to the database file
+
+    Returns:
+        contextmanager: Yields a sqlite3.Connection
+    """
+    return get_pool(db_path, "writer").connection()
+
+
+def read_connection(db_path=DB_PATH):
+    """
+    Borrow a pooled read-only connection for queries.
+
+    Args:
+        db_path: Path to the database file
+
+    Returns:
+        contextmanager: Yields a sqlite3.Connection
+    """
+    return get_pool(db_path, "reader").connection()
+
+
+def transaction(db_path=DB_PATH):
+    """
+    Borrow a pooled writer connection and run the block as one transaction.
+
+    Args:
+        db_path: Path to the database file
+
+    Returns:
+        contextmanager: Yields a sqlite3.Connection
+    """
+    return get_pool(db_path, "writer").transaction()
+
+
+def invalidate(*tables, db_path=DB_PATH):
+    """
+    Mark tables as written so cached query results that read them are
+    discarded. Call this from every data-layer function that inserts,
+    updates or deletes rows.
+
+    Args:
+        *tables: Table names
+        db_path: Path to the database file
+    """
+    get_pool(db_path, "writer").mark_written(*tables)
+
+
+def pool_stats(db_path=DB_PATH):
+    """
+    Get statistics for the shared pools, useful for sizing them.
+
+    Args:
+        db_path: Path to the database file
+
+    Returns:
+        dict: Pool counters keyed by profile name
+    """
+    with _pools_lock:
+        pools = [pool for (path, _), pool in _pools.items() if path == str(db_path)]
+    return {pool.profile: pool.stats() for pool in pools}
+
+
+@lru_cache(maxsize=64)
+def _record_type(columns):
+    return namedtuple("Record", columns, rename=True)
+
+
+def record_factory(cursor, row):
+    """
+    sqlite3 row_factory producing lightweight named-tuple records: index
+    like the plain tuples sqlite3 returns, or read fields by column name
+    (record.username). One record class is built per distinct column list.
+
+    Args:
+        cursor: sqlite3.Cursor that produced the row
+        row: Row as a tuple
+
+    Returns:
+        Record: Named tuple of the row's columns
+    """
+    return _record_type(tuple(column[0] for column in cursor.description))._make(row)
+
+
+def fetch_record(conn, sql, params=()):
+    """
+    Run a single-row query without pandas.
+
+    Args:
+        conn: Database connection object
+        sql: Query expected to return at most one row
+        params: Query parameters
+
+    Returns:
+        Record: Named-tuple record (see record_factory) or None
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = record_factory
+    cursor.execute(sql, params)
+    return cursor.fetchone()
+
+
+def batched(iterable, size):
+    """
+    Split an iterable into lists of at most `size` items without
+    materialising the whole input.
+
+    Args:
+        iterable: Any iterable, including generators
+        size: Maximum batch length
+
+    Yields:
+        list: Next batch
+    """
+    if size < 1:
+        raise ValueError("Batch size must be at least 1")
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _row_adapter(columns):
+    # Records may be dicts keyed by column name or tuples in column order
+    def as_row(record):
+        if isinstance(record, Mapping):
+            return tuple(record.get(column) for column in columns)
+        return tuple(record)
+    return as_row
+
+
+@traced
+def insert_many(table, columns, records, batch_size=BATCH_SIZE, db_path=DB_PATH):
+    """
+    Insert many rows in one transaction using executemany() per batch.
+
+    Args:
+        table: Target table name
+        columns: Column names, in the order values are bound
+        records: Iterable of mappings keyed by column name, or of
+            sequences in `columns` order
+        batch_size: Rows per executemany() call
+        db_path: Path to the database file
+
+    Returns:
+        tuple: (first_id, last_id) of the inserted rows, or None if
+            `records` was empty
+    """
+    placeholders = ", ".join("?" for _ in columns)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    as_row = _row_adapter(columns)
+
+    first_id = last_id = None
+    with transaction(db_path) as conn:
+        invalidate(table, db_path=db_path)
+        cursor = conn.cursor()
+        for batch in batched(map(as_row, records), batch_size):
+            cursor.executemany(sql, batch)
+            # One writer inside one transaction, so rowids are contiguous
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            if first_id is None:
+                first_id = last_id - len(batch) + 1
+
+    if first_id is None:
+        return None
+    return first_id, last_id
+
+
+@traced
+def upsert_many(table, columns, key, records, batch_size=BATCH_SIZE, db_path=DB_PATH):
+    """
+    Insert or update many rows in one transaction, keyed on a unique column.
+    Rows whose values are unchanged are left alone, so re-loading the same
+    data writes nothing.
+
+    Args:
+        table: Target table name
+        columns: Column names, in the order values are bound
+        key: Column with a UNIQUE index to resolve conflicts on
+        records: Iterable of mappings keyed by column name, or of
+            sequences in `columns` order
+        batch_size: Rows per executemany() call
+        db_path: Path to the database file
+
+    Returns:
+        int: Number of rows inserted or updated
+    """
+    updates = [column for column in columns if column != key]
+    placeholders = ", ".join("?" for _ in columns)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    if updates:
+        set_clause = ", ".join(f"{column} = excluded.{column}" for column in updates)
+        changed = " OR ".join(f"{table}.{column} IS NOT excluded.{column}" for column in updates)
+        sql += f" ON CONFLICT({key}) DO UPDATE SET {set_clause} WHERE {changed}"
+    else:
+        sql += f" ON CONFLICT({key}) DO NOTHING"
+
+    as_row = _row_adapter(columns)
+
+    with transaction(db_path) as conn:
+        invalidate(table, db_path=db_path)
+        cursor = conn.cursor()
+        # rowcount, unlike total_changes, leaves out rows written by triggers
+        changed_rows = 0
+        for batch in batched(map(as_row, records), batch_size):
+            cursor.executemany(sql, batch)
+            changed_rows += cursor.rowcount
+        return changed_rows
+
+
+@traced
+def read_page(table, before_id=None, after_id=None, page_size=PAGE_SIZE, db_path=DB_PATH):
+    """
+    Read one page of a table, newest first, using the id as a keyset cursor.
+    Only the rows of the page are read, however deep the page is.
+
+    Args:
+        table: Table name
+        before_id: Return rows with id < before_id (older page)
+        after_id: Return rows with id > after_id (newer page)
+        page_size: Maximum rows in the page; at least 1
+        db_path: Path to the database file
+
+    Returns:
+        tuple: (pandas.DataFrame ordered by id DESC, next cursor or None).
+            The cursor is a before_id for the next older page, or an
+            after_id for the next newer page when paging by after_id.
+    """
+    import pandas as pd
+
+    if before_id is not None and after_id is not None:
+        raise ValueError("Pass before_id or after_id, not both")
+    # LIMIT -1 would read the whole table
+    if page_size < 1:
+        raise ValueError("Page size must be at least 1")
+
+    if after_id is not None:
+        sql = f"""
+            SELECT * FROM (
+                SELECT * FROM {table} WHERE id > ? ORDER BY id ASC LIMIT ?
+            ) ORDER BY id DESC
+        """
+        params = (after_id, page_size)
+    elif before_id is not None:
+        sql = f"SELECT * FROM {table} WHERE id < ? ORDER BY id DESC LIMIT ?"
+        params = (before_id, page_size)
+    else:
+        sql = f"SELECT * FROM {table} ORDER BY id DESC LIMIT ?"
+        params = (page_size,)
+
+    with read_connection(db_path) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+
+    if len(df) < page_size:
+        next_cursor = None
+    elif after_id is not None:
+        next_cursor = int(df["id"].max())
+    else:
+        next_cursor = int(df["id"].min())
+    return df, next_cursor
+
+
+def iter_pages(table, page_size=PAGE_SIZE, db_path=DB_PATH):
+    """
+    Lazily walk a table from newest to oldest, one page at a time.
+
+    Args:
+        table: Table name
+        page_size: Rows per page
+        db_path: Path to the database file
+
+    Yields:
+        pandas.DataFrame: Next page
+    """
+    before_id = None
+    while True:
+        df, before_id = read_page(table, before_id=before_id,
+                                  page_size=page_size, db_path=db_path)
+        if not df.empty:
+            yield df
+        if before_id is None:
+            return
+
+
+def build_filter_query(table, filter_columns, sort_columns, filters=None,
+                       date_column=None, start=None, end=None, order_by="id",
+                       descending=True, limit=PAGE_SIZE):
+    """
+    Build a parameterized SELECT from whitelisted filter and sort columns.
+    Column names never come from the caller unchecked, and every value is
+    bound as a parameter.
+
+    Args:
+        table: Table name
+        filter_columns: Columns that may appear in `filters`
+        sort_columns: Columns that may be used for `order_by`
+        filters: dict of column -> value, or list of values for IN;
+            None values are ignored
+        date_column: Column that `start`/`end` apply to
+        start: Inclusive lower bound on date_column
+        end: Exclusive upper bound on date_column
+        order_by: Sort column
+        descending: Sort direction
+        limit: Maximum rows, or None for no limit
+
+    Returns:
+        tuple: (sql, params)
+    """
+    clauses = []
+    params = []
+    for column, value in (filters or {}).items():
+        if value is None:
+            continue
+        if column not in filter_columns:
+            raise ValueError(f"Cannot filter {table} on {column!r}")
+        if isinstance(value, (list, tuple, set, frozenset)):
+            values = sorted(value)
+            if not values:
+                continue
+            clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        else:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+
+    if start is not None:
+        clauses.append(f"{date_column} >= ?")
+        params.append(str(start))
+    if end is not None:
+        clauses.append(f"{date_column} < ?")
+        params.append(str(end))
+
+    if order_by not in sort_columns:
+        raise ValueError(f"Cannot sort {table} by {order_by!r}")
+    direction = "DESC" if descending else "ASC"
+
+    sql = f"SELECT * FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {order_by} {direction}"
+    if order_by != "id":
+        sql += f", id {direction}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+
+def build_column_list(table, columns, allowed):
+    """
+    Build the column list of a SELECT from whitelisted column names.
+
+    Args:
+        table: Table name
+        columns: Column names, or None for every column
+        allowed: Columns that may be selected
+
+    Returns:
+        str: "*" or the comma-separated columns
+    """
+    if columns is None:
+        return "*"
+    if not columns:
+        raise ValueError(f"No columns selected from {table}")
+    for column in columns:
+        if column not in allowed:
+            raise ValueError(f"Cannot select {column!r} from {table}")
+    return ", ".join(columns)
+
+
+@traced
+def get_distinct_values(table, column, db_path=DB_PATH):
+    """
+    Get the distinct non-null values of an indexed column, e.g. to fill
+    filter widgets.
+
+    Args:
+        table: Table name
+        column: Column name (must be trusted, not user input)
+        db_path: Path to the database file
+
+    Returns:
+        list: Sorted distinct values
+    """
+    with read_connection(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY {column}"
+        ).fetchall()
+    return [row[0] for row in rows]
@@ -0,0 +1,92 @@
+# pandas dtypes of the frames the get_all_* readers return, per table.
+# Enum-like TEXT columns become categoricals, TEXT timestamps are parsed
+# to datetime64, integers are narrowed and REAL columns stay float64 even
+# when they hold only NULLs; columns not listed keep what SQLite gives
+# them. Columnar snapshots store these types as well (see
+# snapshots.SNAPSHOT_FORMAT when changing them).
+TABLE_DTYPES = {
+    "cyber_incidents": {
+        "id": "int32",
+        "timestamp": "datetime64[us]",
+        "severity": "category",
+        "category": "category",
+        "status": "category",
+        "reported_by": "category",
+        "created_at": "datetime64[us]",
+    },
+    "it_tickets": {
+        "id": "int32",
+        "priority": "category",
+        "status": "category",
+        "category": "category",
+        "created_date": "datetime64[us]",
+        "resolved_date": "datetime64[us]",
+        "assigned_to": "category",
+        "resolution_time_hours": "float64",
+        "created_at": "datetime64[us]",
+    },
+    "datasets_metadata": {
+        "id": "int32",
+        "category": "category",
+        "source": "category",
+        "last_updated": "datetime64[us]",
+        "record_count": "Int64",
+        "column_count": "Int16",
+        "file_size_mb": "float64",
+        "uploaded_by": "category",
+        "created_at": "datetime64[us]",
+    },
+}
+
+
+def _fits(series, dtype):
+    import numpy as np
+
+    limits = np.iinfo(getattr(dtype, "numpy_dtype", dtype))
+    return series.empty or (series.min() >= limits.min and series.max() <= limits.max)
+
+
+def apply_dtypes(df, table):
+    """
+    Convert a frame read from `table` to that table's TABLE_DTYPES, in
+    place. Columns that already have the right type are left alone, so
+    this is cheap on frames loaded from a snapshot.
+
+    Timestamps that are not ISO 8601 become NaT. Integers that do not
+    fit the declared type keep their 64-bit type.
+
+    Args:
+        df: DataFrame holding some or all of the table's columns
+        table: Table name
+
+    Returns:
+        pandas.DataFrame: df
+    """
+    import pandas as pd
+
+    for column, dtype in TABLE_DTYPES.get(table, {}).items():
+        if column not in df:
+            continue
+        series = df[column]
+        if dtype == "category":
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Categories merged from several snapshot files are in
+                # order of appearance; sort them like astype() does
+                categories = series.cat.categories
+                if not categories.is_monotonic_increasing:
+                    df[column] = series.cat.reorder_categories(categories.sort_values())
+            else:
+                df[column] = series.astype("category")
+        elif dtype.startswith("datetime64"):
+            if not pd.api.types.is_datetime64_dtype(series):
+                series = pd.to_datetime(series, format="ISO8601", errors="coerce")
+            df[column] = series.astype(dtype)
+        else:
+            target = pd.api.types.pandas_dtype(dtype)
+            if series.dtype == target:
+                continue
+            if not pd.api.types.is_integer_dtype(target) or _fits(series, target):
+                df[column] = series.astype(target)
+            elif series.hasnans:
+                df[column] = series.astype("Int64")
+    return df
@@ -1,8 +1,42 @@
-import pandas as pd
-from app.data.db import connect_database
+from datetime import datetime
 
+from app.data.cache import cached_query
+from app.data.dtypes import apply_dtypes
+from app.data.search import search
+from app.data.snapshots import read_snapshot
+from app.data.tracing import traced
+from app.data.db import (
+    BATCH_SIZE, PAGE_SIZE, build_column_list, build_filter_query, fetch_record,
+    get_distinct_values, insert_many, invalidate, iter_pages, read_connection, read_page,
+    transaction,
+)
 
-def insert_incident(incident_id, severity, status, category, description, reported_by=None):
+# Insert column order for cyber_incidents
+INCIDENT_COLUMNS = (
+    "incident_id", "timestamp", "severity", "category",
+    "status", "description", "reported_by",
+)
+
+# Columns get_all_incidents can return
+INCIDENT_READ_COLUMNS = {"id", *INCIDENT_COLUMNS, "created_at"}
+
+# Columns the filter API accepts; anything else is rejected
+INCIDENT_FILTER_COLUMNS = {"incident_id", "severity", "status", "category", "reported_by"}
+INCIDENT_SORT_COLUMNS = {"id", "timestamp", "severity", "status", "category"}
+
+# SQL expressions that truncate cyber_incidents.timestamp to a bucket.
+# Weeks start on Monday.
+TREND_BUCKETS = {
+    "hour": "strftime('%Y-%m-%d %H:00:00', timestamp)",
+    "day": "date(timestamp)",
+    "week": "date(timestamp, 'weekday 0', '-6 days')",
+}
+TREND_SPLITS = {"severity", "category"}
+
+
+@traced
+def insert_incident(incident_id, severity, status, category, description,
+                    reported_by=None, timestamp=None):
     """
     Insert new incident into the database.
 
@@ -13,41 +47,102 @@ def insert_incident(incident_id, severity, status, category, description, report
         category: type of incident
         description: Incident description
         reported_by: Username of reporter (optional)
+        timestamp: When the incident happened (defaults to now)
 
     Returns:
         int: ID of inserted incident
-        :param by:
-        :param at:
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO cyber_incidents 
-        (incident_id, severity, status, category, description, reported_by)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (incident_id, severity, status, category, description, reported_by))
-    conn.commit()
-    incident_id = cursor.lastrowid
-    conn.close()
-    return incident_id
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    with transaction() as conn:
+        invalidate("cyber_incidents")
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO cyber_incidents 
+            (incident_id, timestamp, severity, category, status, description, reported_by)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (incident_id, str(timestamp), severity, category, status, description, reported_by))
+        return cursor.lastrowid
+
+
+@traced
+def insert_incidents_many(records, batch_size=BATCH_SIZE):
+    """
+    Insert many incidents in a single transaction.
+
+    Args:
+        records: Iterable (or generator) of dicts keyed by INCIDENT_COLUMNS,
+            or of tuples in INCIDENT_COLUMNS order
+        batch_size: Rows per executemany() call
+
+    Returns:
+        tuple: (first_id, last_id) of the inserted rows, or None if empty
+    """
+    return insert_many("cyber_incidents", INCIDENT_COLUMNS, records, batch_size)
 
 
-def get_all_incidents():
+@traced
+@cached_query("cyber_incidents")
+def get_all_incidents(columns=None):
     """
-    Get all incidents as DataFrame.
+    Get all incidents as DataFrame, loaded from the columnar snapshot when it
+    is current and from SQLite otherwise. Columns have the types declared
+    in dtypes.TABLE_DTYPES: categoricals, datetimes and narrow integers.
+
+    Args:
+        columns: Optional list of columns to return, in that order;
+            all columns if None
 
     Returns:
         pandas.DataFrame: All incidents
     """
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM cyber_incidents ORDER BY id DESC",
-        conn
-    )
-    conn.close()
-    return df
+    select = build_column_list("cyber_incidents", columns, INCIDENT_READ_COLUMNS)
+    df = read_snapshot("cyber_incidents", columns)
+    if df is not None:
+        return df
+
+    import pandas as pd
+
+    with read_connection() as conn:
+        df = pd.read_sql_query(
+            f"SELECT {select} FROM cyber_incidents ORDER BY id DESC",
+            conn
+        )
+    return apply_dtypes(df, "cyber_incidents")
+
 
+@traced
+@cached_query("cyber_incidents")
+def get_incidents_page(before_id=None, after_id=None, page_size=PAGE_SIZE):
+    """
+    Get one page of incidents, newest first.
+
+    Args:
+        before_id: Cursor from the previous call; returns older incidents
+        after_id: Returns incidents newer than this id
+        page_size: Maximum rows in the page
+
+    Returns:
+        tuple: (pandas.DataFrame, next cursor or None)
+    """
+    return read_page("cyber_incidents", before_id, after_id, page_size)
+
+
+def iter_incident_pages(page_size=PAGE_SIZE):
+    """
+    Lazily yield all incidents, newest first, one page at a time.
+
+    Args:
+        page_size: Rows per page
+
+    Yields:
+        pandas.DataFrame: Next page of incidents
+    """
+    yield from iter_pages("cyber_incidents", page_size)
 
+
+@traced
 def get_incident_by_id(incident_id):
     """
     Get a specific incident by ID.
@@ -56,19 +151,17 @@ def get_incident_by_id(incident_id):
         incident_id: ID of the incident
 
     Returns:
-        tuple: Incident record or None
+        Record: Incident record (a named tuple of the table's columns) or None
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT * FROM cyber_incidents WHERE id = ?",
-        (incident_id,)
-    )
-    incident = cursor.fetchone()
-    conn.close()
-    return incident
+    with read_connection() as conn:
+        return fetch_record(
+            conn,
+            "SELECT * FROM cyber_incidents WHERE id = ?",
+            (incident_id,)
+        )
 
 
+@traced
 def update_incident_status(incident_id, new_status):
     """
     Update the status of an incident.
@@ -80,18 +173,17 @@ def update_incident_status(incident_id, new_status):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE cyber_incidents SET status = ? WHERE id = ?",
-        (new_status, incident_id)
-    )
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-    return rows_affected
+    with transaction() as conn:
+        invalidate("cyber_incidents")
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE cyber_incidents SET status = ? WHERE id = ?",
+            (new_status, incident_id)
+        )
+        return cursor.rowcount
 
 
+@traced
 def delete_incident(incident_id):
     """
     Delete an incident from the database.
@@ -102,51 +194,186 @@ def delete_incident(incident_id):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "DELETE FROM cyber_incidents WHERE id = ?",
-        (incident_id,)
-    )
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-    return rows_affected
+    with transaction() as conn:
+        invalidate("cyber_incidents")
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM cyber_incidents WHERE id = ?",
+            (incident_id,)
+        )
+        return cursor.rowcount
 
 
+@traced
+@cached_query("cyber_incidents")
 def get_incidents_by_type_count():
     """
-    Count incidents by type.
+    Count incidents by type. Reads only the incident_id column of the
+    columnar snapshot when it is current.
 
     Returns:
         pandas.DataFrame: Incident counts by type
     """
-    conn = connect_database()
+    df = read_snapshot("cyber_incidents", columns=["incident_id"])
+    if df is not None:
+        counts = df["incident_id"].value_counts(dropna=False).sort_index(na_position="first")
+        return (counts.rename_axis("incident_id").reset_index(name="count")
+                .sort_values("count", ascending=False, kind="stable", ignore_index=True))
+
+    import pandas as pd
+
     query = """
     SELECT incident_id, COUNT(*) as count
     FROM cyber_incidents
     GROUP BY incident_id
     ORDER BY count DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    with read_connection() as conn:
+        return pd.read_sql_query(query, conn)
 
 
+@traced
+@cached_query("cyber_incidents")
 def get_severity_count():
     """
-    Count severity incidents
+    Count severity incidents. Reads the trigger-maintained
+    incident_severity_counts table instead of grouping cyber_incidents.
 
     Returns:
         pandas.DataFrame: severity incident counts
     """
-    conn = connect_database()
+    import pandas as pd
+
     query = """
-    SELECT severity, COUNT(*) AS count
-    FROM cyber_incidents
-    GROUP BY severity
+    SELECT CASE WHEN is_null THEN NULL ELSE severity END AS severity, count
+    FROM incident_severity_counts
     ORDER BY count DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    with read_connection() as conn:
+        return pd.read_sql_query(query, conn)
+
+
+@traced
+@cached_query("cyber_incidents")
+def filter_incidents(severity=None, status=None, category=None, reported_by=None,
+                     start=None, end=None, order_by="timestamp", descending=True,
+                     limit=PAGE_SIZE):
+    """
+    Get incidents matching the given filters, filtered and sorted in SQL.
+
+    Args:
+        severity: Severity level, or list of levels
+        status: Status, or list of statuses
+        category: Category, or list of categories
+        reported_by: Reporter username
+        start: Earliest timestamp (inclusive)
+        end: Latest timestamp (exclusive)
+        order_by: One of INCIDENT_SORT_COLUMNS
+        descending: Sort direction
+        limit: Maximum rows, or None for all matches
+
+    Returns:
+        pandas.DataFrame: Matching incidents
+    """
+    import pandas as pd
+
+    sql, params = build_filter_query(
+        "cyber_incidents", INCIDENT_FILTER_COLUMNS, INCIDENT_SORT_COLUMNS,
+        filters={"severity": severity, "status": status,
+                 "category": category, "reported_by": reported_by},
+        date_column="timestamp", start=start, end=end,
+        order_by=order_by, descending=descending, limit=limit,
+    )
+    with read_connection() as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+@traced
+@cached_query("cyber_incidents")
+def get_incident_filter_options():
+    """
+    Get the values present in each filterable incident column.
+
+    Returns:
+        dict: column name -> sorted list of values
+    """
+    return {
+        column: get_distinct_values("cyber_incidents", column)
+        for column in ("severity", "status", "category")
+    }
+
+
+@traced
+@cached_query("cyber_incidents")
+def get_incident_trend(bucket="day", split_by="severity", start=None, end=None):
+    """
+    Count incidents per time bucket, bucketed and grouped inside SQLite.
+    A start/end range is answered from the matching slice of the
+    (timestamp, severity, category) index only.
+
+    Args:
+        bucket: 'hour', 'day' or 'week'
+        split_by: 'severity', 'category' or None for a single total series
+        start: Earliest timestamp (inclusive)
+        end: Latest timestamp (exclusive)
+
+    Returns:
+        pandas.DataFrame: One row per bucket (DatetimeIndex), one column
+            per series, ready for st.line_chart
+    """
+    import pandas as pd
+
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"Unknown bucket {bucket!r}; use one of {sorted(TREND_BUCKETS)}")
+    if split_by is not None and split_by not in TREND_SPLITS:
+        raise ValueError(f"Cannot split trend by {split_by!r}")
+
+    series = split_by if split_by is not None else "'incidents'"
+    clauses = []
+    params = []
+    if start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(str(start))
+    if end is not None:
+        clauses.append("timestamp < ?")
+        params.append(str(end))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    query = f"""
+    SELECT {TREND_BUCKETS[bucket]} AS bucket, {series} AS series, COUNT(*) AS count
+    FROM cyber_incidents
+    {where}
+    GROUP BY bucket, series
+    ORDER BY bucket
+    """
+    with read_connection() as conn:
+        df = pd.read_sql_query(query, conn, params=params)
+
+    trend = df.pivot(index="bucket", columns="series", values="count").fillna(0).astype("int64")
+    trend.index = pd.to_datetime(trend.index)
+    trend.columns.name = None
+    return trend
+
+
+@traced
+@cached_query("cyber_incidents")
+def search_incidents(text, prefix=True, limit=PAGE_SIZE, rank_window=None):
+    """
+    Full-text search over incident descriptions, best match first.
+
+    Args:
+        text: Search text; the last word matches as a prefix
+        prefix: Set False to match whole words only
+        limit: Maximum rows
+        rank_window: Rank only the newest this-many matches, trading
+            older matches for speed; None ranks every match
+
+    Returns:
+        pandas.DataFrame: Matching incidents with a highlighted snippet
+            and bm25 rank (lower is better)
+    """
+    return search(
+        "cyber_incidents_fts",
+        ("id", "incident_id", "timestamp", "severity", "category", "status"),
+        text, prefix=prefix, limit=limit, rank_window=rank_window,
+    )
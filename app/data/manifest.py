@@ -0,0 +1,80 @@
+import json
+
+from app.data.db import DB_PATH, read_connection, transaction
+from app.data.tracing import traced
+
+
+@traced
+def get_manifest_entry(source_path, db_path=DB_PATH):
+    """
+    Get the manifest record for a previously ingested file.
+
+    Args:
+        source_path: Path of the source file, as stored by record_ingestion
+        db_path: Path to the database file
+
+    Returns:
+        dict: Manifest fields (chunk_hashes decoded to a list) or None
+    """
+    with read_connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT source_path, table_name, size_bytes, mtime_ns, content_hash,
+                   chunk_size, chunk_hashes, row_count, loaded_at
+            FROM ingestion_manifest WHERE source_path = ?
+            """,
+            (str(source_path),)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        names = [column[0] for column in cursor.description]
+
+    entry = dict(zip(names, row))
+    entry["chunk_hashes"] = json.loads(entry["chunk_hashes"])
+    return entry
+
+
+@traced
+def record_ingestion(source_path, table_name, size_bytes, mtime_ns, content_hash,
+                     chunk_size, chunk_hashes, row_count, db_path=DB_PATH):
+    """
+    Insert or replace the manifest record for an ingested file.
+
+    Args:
+        source_path: Path of the source file
+        table_name: Table the file was loaded into
+        size_bytes: File size at load time
+        mtime_ns: File modification time at load time
+        content_hash: Hash of the whole file
+        chunk_size: Rows per chunk used when hashing
+        chunk_hashes: List of per-chunk hashes
+        row_count: Rows in the file
+        db_path: Path to the database file
+
+    Returns:
+        int: Number of rows affected
+    """
+    with transaction(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO ingestion_manifest
+            (source_path, table_name, size_bytes, mtime_ns, content_hash,
+             chunk_size, chunk_hashes, row_count, loaded_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(source_path) DO UPDATE SET
+                table_name = excluded.table_name,
+                size_bytes = excluded.size_bytes,
+                mtime_ns = excluded.mtime_ns,
+                content_hash = excluded.content_hash,
+                chunk_size = excluded.chunk_size,
+                chunk_hashes = excluded.chunk_hashes,
+                row_count = excluded.row_count,
+                loaded_at = excluded.loaded_at
+            """,
+            (str(source_path), table_name, size_bytes, mtime_ns, content_hash,
+             chunk_size, json.dumps(chunk_hashes), row_count)
+        )
+        return cursor.rowcount
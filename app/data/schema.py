@@ -1,3 +1,8 @@
+from app.data.aggregates import create_aggregate_tables, recreate_aggregate_tables
+from app.data.cache import query_cache
+from app.data.search import create_search_tables
+
+
 def create_users_table(conn):
     """
     Create the users table if it doesn't exist.
@@ -18,7 +23,6 @@ def create_users_table(conn):
     """
 
     cursor.execute(create_table_sql)
-    conn.commit()
     print("Users table created successfully!")
 
 
@@ -47,7 +51,6 @@ def create_cyber_incidents_table(conn):
     """
 
     cursor.execute(create_table_sql)
-    conn.commit()
     print("Cyber incidents table created successfully!")
 
 
@@ -74,7 +77,6 @@ def create_datasets_metadata_table(conn):
     """
 
     cursor.execute(create_table_sql)
-    conn.commit()
     print("Datasets metadata table created successfully!")
 
 
@@ -104,13 +106,274 @@ def create_it_tickets_table(conn):
     """
 
     cursor.execute(create_table_sql)
-    conn.commit()
     print("IT tickets table created successfully!")
 
 
-def create_all_tables(conn):
+def create_ingestion_manifest_table(conn):
+    """
+    Create the ingestion_manifest table, which records the size, mtime
+    and content hash of every CSV file loaded into the database.
+
+    Args:
+        conn: Database connection object
+    """
+    cursor = conn.cursor()
+
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS ingestion_manifest (
+        source_path TEXT PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        chunk_size INTEGER NOT NULL,
+        chunk_hashes TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+
+    cursor.execute(create_table_sql)
+    print("Ingestion manifest table created successfully!")
+
+
+def add_missing_columns(conn, table, columns):
+    """
+    Add columns that older databases created before they were in the schema.
+
+    Args:
+        conn: Database connection object
+        table: Table name
+        columns: dict of column name -> SQL type
+    """
+    cursor = conn.cursor()
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    for name, col_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+
+
+def add_csv_columns(conn):
+    """
+    Add the columns the source CSVs carry but the original tables lacked:
+    dataset_id, uploaded_by and column_count on datasets_metadata, and
+    resolution_time_hours on it_tickets.
+
+    Args:
+        conn: Database connection object
+    """
+    add_missing_columns(conn, "datasets_metadata", {
+        "dataset_id": "TEXT",
+        "uploaded_by": "TEXT",
+        "column_count": "INTEGER",
+    })
+    add_missing_columns(conn, "it_tickets", {"resolution_time_hours": "REAL"})
+    print("CSV columns added successfully!")
+
+
+def create_natural_key_indexes(conn):
+    """
+    Make the CSV identifiers (incident_id, dataset_id) unique so
+    re-ingestion can upsert instead of appending duplicates. Rows that
+    earlier appends already duplicated are collapsed to the newest copy.
+    it_tickets.ticket_id is already declared UNIQUE.
+
+    Args:
+        conn: Database connection object
+    """
+    cursor = conn.cursor()
+
+    for table, key in [("cyber_incidents", "incident_id"),
+                       ("datasets_metadata", "dataset_id")]:
+        cursor.execute(f"""
+            DELETE FROM {table}
+            WHERE {key} IS NOT NULL
+              AND id NOT IN (SELECT MAX(id) FROM {table} GROUP BY {key})
+        """)
+        cursor.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_{key} ON {table}({key})"
+        )
+
+    print("Natural key indexes created successfully!")
+
+
+# Secondary indexes on the grouping, filter and sort columns used by the
+# data layer. Two-column indexes let status filters return rows already
+# ordered by date without a separate sort.
+INDEXES = [
+    ("idx_cyber_incidents_severity", "cyber_incidents", "severity"),
+    ("idx_cyber_incidents_category", "cyber_incidents", "category"),
+    ("idx_cyber_incidents_timestamp", "cyber_incidents", "timestamp"),
+    ("idx_cyber_incidents_status_timestamp", "cyber_incidents", "status, timestamp"),
+    ("idx_it_tickets_priority", "it_tickets", "priority"),
+    ("idx_it_tickets_category", "it_tickets", "category"),
+    ("idx_it_tickets_assigned_to", "it_tickets", "assigned_to"),
+    ("idx_it_tickets_created_date", "it_tickets", "created_date"),
+    ("idx_it_tickets_status_created_date", "it_tickets", "status, created_date"),
+    ("idx_datasets_metadata_uploaded_by", "datasets_metadata", "uploaded_by"),
+]
+
+
+def create_indexes(conn):
+    """
+    Create the secondary indexes used by the dashboard queries.
+
+    Args:
+        conn: Database connection object
+    """
+    cursor = conn.cursor()
+    for name, table, columns in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+    print("Indexes created successfully!")
+
+
+def create_trend_index(conn):
+    """
+    Replace the plain timestamp index with a covering (timestamp, severity,
+    category) index, so time-bucketed trend queries over a date range read
+    only that slice of the index.
+
+    Args:
+        conn: Database connection object
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cyber_incidents_timestamp_severity_category
+        ON cyber_incidents(timestamp, severity, category)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_cyber_incidents_timestamp")
+    print("Trend index created successfully!")
+
+
+def create_ticket_change_log(conn):
+    """
+    Create it_ticket_changes, which holds the latest change sequence
+    number of every ticket row, kept current by triggers on it_tickets.
+    Deleted tickets keep their entry as a tombstone, so readers can pick
+    up inserts, updates and deletes made after a given sequence number.
+
+    Args:
+        conn: Database connection object
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS it_ticket_changes (
+            row_id INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_it_ticket_changes_seq ON it_ticket_changes(seq)"
+    )
+
+    record = """
+        INSERT OR REPLACE INTO it_ticket_changes (row_id, seq)
+        VALUES ({row}.id, (SELECT IFNULL(MAX(seq), 0) + 1 FROM it_ticket_changes));
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_it_ticket_changes_insert
+        AFTER INSERT ON it_tickets
+        BEGIN {record.format(row="NEW")} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_it_ticket_changes_update
+        AFTER UPDATE OF priority, status, assigned_to, resolution_time_hours ON it_tickets
+        BEGIN {record.format(row="NEW")} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_it_ticket_changes_delete
+        AFTER DELETE ON it_tickets
+        BEGIN {record.format(row="OLD")} END
+    """)
+
+    cursor.execute("""
+        INSERT OR IGNORE INTO it_ticket_changes (row_id, seq)
+        SELECT id, id FROM it_tickets
+    """)
+    print("Ticket change log created successfully!")
+
+
+def create_sessions_table(conn):
+    """
+    Create the sessions table, which maps signed login tokens to a user
+    and role until they expire.
+
+    Args:
+        conn: Database connection object
+    """
+    cursor = conn.cursor()
+
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        username TEXT NOT NULL,
+        role TEXT,
+        expires_at INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (username) REFERENCES users(username)
+    )
+    """
+
+    cursor.execute(create_table_sql)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)"
+    )
+    print("Sessions table created successfully!")
+
+
+def create_snapshot_change_logs(conn):
     """
-    Create all tables in the database.
+    Create change logs for the tables exported to columnar snapshots.
+    cyber_incident_changes and datasets_metadata_changes hold the latest
+    change sequence number of every updated or deleted row; new rows need
+    no entry because AUTOINCREMENT ids only grow. it_ticket_changes is
+    widened to record updates to any column.
+
+    Args:
+        conn: Database connection object
+    """
+    cursor = conn.cursor()
+    for table, log in (("cyber_incidents", "cyber_incident_changes"),
+                       ("datasets_metadata", "datasets_metadata_changes")):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {log} (
+                row_id INTEGER PRIMARY KEY,
+                seq INTEGER NOT NULL
+            )
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{log}_seq ON {log}(seq)")
+
+        record = f"""
+            INSERT OR REPLACE INTO {log} (row_id, seq)
+            VALUES ({{row}}.id, (SELECT IFNULL(MAX(seq), 0) + 1 FROM {log}));
+        """
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{log}_update
+            AFTER UPDATE ON {table}
+            BEGIN {record.format(row="NEW")} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{log}_delete
+            AFTER DELETE ON {table}
+            BEGIN {record.format(row="OLD")} END
+        """)
+
+    # Snapshots hold every column, not just the SLA ones
+    cursor.execute("DROP TRIGGER IF EXISTS trg_it_ticket_changes_update")
+    cursor.execute("""
+        CREATE TRIGGER trg_it_ticket_changes_update
+        AFTER UPDATE ON it_tickets
+        BEGIN
+            INSERT OR REPLACE INTO it_ticket_changes (row_id, seq)
+            VALUES (NEW.id, (SELECT IFNULL(MAX(seq), 0) + 1 FROM it_ticket_changes));
+        END
+    """)
+    print("Snapshot change logs created successfully!")
+
+
+def create_base_tables(conn):
+    """
+    Create the original four tables.
 
     Args:
         conn: Database connection object
@@ -119,4 +382,87 @@ def create_all_tables(conn):
     create_cyber_incidents_table(conn)
     create_datasets_metadata_table(conn)
     create_it_tickets_table(conn)
-    print("\n All tables created successfully!")
+
+
+# Ordered schema migrations. The database's PRAGMA user_version is the
+# number of entries already applied, so only append to this list; never
+# edit or reorder an entry that has shipped.
+MIGRATIONS = [
+    ("base tables", create_base_tables),
+    ("ingestion manifest", create_ingestion_manifest_table),
+    ("CSV columns", add_csv_columns),
+    ("natural key indexes", create_natural_key_indexes),
+    ("secondary indexes", create_indexes),
+    ("aggregate tables", create_aggregate_tables),
+    ("incident trend index", create_trend_index),
+    ("ticket change log", create_ticket_change_log),
+    ("full-text search", create_search_tables),
+    ("sessions", create_sessions_table),
+    ("snapshot change logs", create_snapshot_change_logs),
+    ("aggregate NULL groups", recreate_aggregate_tables),
+]
+
+
+def get_schema_version(conn):
+    """
+    Get the number of migrations applied to a database.
+
+    Args:
+        conn: Database connection object
+
+    Returns:
+        int: Current PRAGMA user_version
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn):
+    """
+    Apply pending migrations in a single transaction. Does nothing, and
+    issues no DDL, when the database is already up to date. Concurrent
+    callers are serialised by the write lock, so each migration runs
+    once.
+
+    Args:
+        conn: Database connection object
+
+    Returns:
+        int: Number of migrations applied
+    """
+    if not MIGRATIONS[get_schema_version(conn):]:
+        return 0
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Read the version again under the write lock: another setup may
+        # have applied some or all of the migrations in the meantime
+        current = get_schema_version(conn)
+        pending = MIGRATIONS[current:]
+        if not pending:
+            conn.rollback()
+            return 0
+        for version, (description, migration) in enumerate(pending, start=current + 1):
+            migration(conn)
+            print(f"Applied migration {version}: {description}")
+        conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    # Migrations may rewrite existing rows, so drop every cached result
+    query_cache.clear()
+    conn.execute("PRAGMA optimize")
+    return len(pending)
+
+
+def create_all_tables(conn):
+    """
+    Bring the database schema up to date.
+
+    Args:
+        conn: Database connection object
+    """
+    applied = run_migrations(conn)
+    if applied:
+        print(f"\n Schema migrated to version {len(MIGRATIONS)}!")
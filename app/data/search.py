@@ -0,0 +1,186 @@
+import re
+
+from app.data.db import DB_PATH, PAGE_SIZE, read_connection, transaction
+from app.data.tracing import traced
+
+# (FTS5 table, source table, indexed text columns). Each FTS table is an
+# external-content index over its source table: it stores only the
+# inverted index, reads the text back from the source by rowid, and is
+# kept in step by triggers on the source table.
+SEARCH_INDEXES = [
+    ("cyber_incidents_fts", "cyber_incidents", ("description",)),
+    ("it_tickets_fts", "it_tickets", ("subject", "description")),
+]
+
+# Prefix lengths indexed for fast `term*` queries
+FTS_PREFIXES = "2 3"
+
+# Suggested rank_window for callers that prefer speed to completeness.
+# Ranking costs O(matches), so ranking a term found in a third of a
+# million-row table takes hundreds of ms; ranking only the newest 2000
+# matches keeps it to a few ms, but older, better matches are left out.
+SEARCH_RANK_WINDOW = 2000
+
+# Markers placed around matched terms in snippets
+SNIPPET_MARKERS = ("[", "]")
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def create_search_tables(conn):
+    """
+    Create the FTS5 search tables and their sync triggers, then index the
+    current data.
+
+    Args:
+        conn: Database connection object
+    """
+    cursor = conn.cursor()
+
+    for fts, source, columns in SEARCH_INDEXES:
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"NEW.{column}" for column in columns)
+        old_values = ", ".join(f"OLD.{column}" for column in columns)
+
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {column_list},
+                content='{source}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='{FTS_PREFIXES}'
+            )
+        """)
+
+        add = f"""
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+        """
+        remove = f"""
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+        """
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert
+            AFTER INSERT ON {source}
+            BEGIN {add} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_update
+            AFTER UPDATE OF {column_list} ON {source}
+            BEGIN {remove} {add} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete
+            AFTER DELETE ON {source}
+            BEGIN {remove} END
+        """)
+
+    rebuild_search_indexes(conn)
+    print("Search tables created successfully!")
+
+
+@traced
+def rebuild_search_indexes(conn=None):
+    """
+    Re-index every FTS table from its source table, e.g. after rows were
+    written with the triggers missing.
+
+    Args:
+        conn: Database connection object; a pooled transaction is used
+            when omitted
+    """
+    if conn is None:
+        with transaction() as conn:
+            return rebuild_search_indexes(conn)
+
+    cursor = conn.cursor()
+    for fts, _, _ in SEARCH_INDEXES:
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+
+
+def build_match_query(text, prefix=True):
+    """
+    Turn free text into a safe FTS5 MATCH expression. Every word becomes a
+    quoted term, so FTS5 operators and punctuation in the input are
+    matched literally; all terms must match.
+
+    Args:
+        text: Search text as typed by the user
+        prefix: Match the last word as a prefix (search-as-you-type)
+
+    Returns:
+        str: MATCH expression, or None when the text has no words
+    """
+    terms = [f'"{term}"' for term in _TERM.findall(text or "")]
+    if not terms:
+        return None
+    if prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+@traced
+def search(fts, columns, text, snippet_column=0, prefix=True, limit=PAGE_SIZE,
+           rank_window=None, db_path=DB_PATH):
+    """
+    Rank source rows against a full-text query with bm25 (FTS5's default
+    rank), sorted inside FTS5 rather than by a separate ORDER BY pass.
+
+    Args:
+        fts: FTS table from SEARCH_INDEXES
+        columns: Source table columns to return (trusted, not user input)
+        text: Search text as typed by the user
+        snippet_column: Index of the FTS column to build snippets from, or
+            -1 for whichever column matched best
+        prefix: Match the last word as a prefix
+        limit: Maximum rows
+        rank_window: Rank only the newest this-many matches (see
+            SEARCH_RANK_WINDOW), so older matches never appear; None
+            ranks every match
+        db_path: Path to the database file
+
+    Returns:
+        pandas.DataFrame: `columns` plus snippet and rank, best match first
+    """
+    import pandas as pd
+
+    tables = {name: source for name, source, _ in SEARCH_INDEXES}
+    if fts not in tables:
+        raise ValueError(f"Unknown search table: {fts}")
+    source = tables[fts]
+
+    select = ", ".join(f"s.{column}" for column in columns)
+    match = build_match_query(text, prefix)
+    if match is None:
+        return pd.DataFrame(columns=[*columns, "snippet", "rank"])
+
+    open_mark, close_mark = SNIPPET_MARKERS
+    params = [snippet_column, open_mark, close_mark, match]
+    window = ""
+    if rank_window is not None:
+        # Rowid floor of the newest `rank_window` matches; FTS5 applies
+        # rowid bounds while walking the doclist
+        window = f"""
+      AND {fts}.rowid >= IFNULL((
+          SELECT rowid FROM {fts} WHERE {fts} MATCH ?
+          ORDER BY rowid DESC LIMIT 1 OFFSET ?
+      ), 0)"""
+        params += [match, int(rank_window) - 1]
+    params.append(int(limit))
+
+    query = f"""
+    SELECT {select},
+           snippet({fts}, ?, ?, ?, '…', 12) AS snippet,
+           {fts}.rank AS rank
+    FROM {fts}
+    JOIN {source} s ON s.id = {fts}.rowid
+    WHERE {fts} MATCH ?{window}
+    ORDER BY {fts}.rank
+    LIMIT ?
+    """
+    with read_connection(db_path) as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+if __name__ == "__main__":
+    # python -m app.data.search
+    rebuild_search_indexes()
+    print("Rebuilt search indexes: " + ", ".join(fts for fts, _, _ in SEARCH_INDEXES))
@@ -0,0 +1,88 @@
+from app.data.db import read_connection, transaction
+from app.data.tracing import traced
+
+
+@traced
+def create_session(session_id, username, expires_at):
+    """
+    Store a new login session, copying the user's current role.
+
+    Args:
+        session_id: Random session identifier
+        username: Logged-in user
+        expires_at: Expiry time (unix seconds)
+
+    Returns:
+        str: The user's role, or None if the user does not exist
+    """
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO sessions (session_id, username, role, expires_at)
+            SELECT ?, username, role, ? FROM users WHERE username = ?
+        """, (session_id, int(expires_at), username))
+        if cursor.rowcount == 0:
+            return None
+        cursor.execute("SELECT role FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.fetchone()[0]
+
+
+@traced
+def get_session(session_id):
+    """
+    Get a session by id.
+
+    Args:
+        session_id: Session identifier
+
+    Returns:
+        tuple: (username, role, expires_at) or None
+    """
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT username, role, expires_at FROM sessions WHERE session_id = ?",
+            (session_id,)
+        )
+        return cursor.fetchone()
+
+
+@traced
+def delete_session(session_id):
+    """
+    Delete a session (logout).
+
+    Args:
+        session_id: Session identifier
+
+    Returns:
+        int: Number of rows affected
+    """
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount
+
+
+@traced
+def purge_expired_sessions(now, batch_size=1000):
+    """
+    Delete up to batch_size sessions that expired before `now`, oldest
+    first, in one short write transaction.
+
+    Args:
+        now: Current time (unix seconds)
+        batch_size: Maximum rows deleted
+
+    Returns:
+        int: Number of rows deleted
+    """
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE FROM sessions WHERE rowid IN (
+                SELECT rowid FROM sessions WHERE expires_at <= ?
+                ORDER BY expires_at LIMIT ?
+            )
+        """, (int(now), int(batch_size)))
+        return cursor.rowcount
@@ -0,0 +1,519 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from app.data.cache import query_cache
+from app.data.db import DB_PATH, batched, connect_database, read_connection
+from app.data.dtypes import TABLE_DTYPES, apply_dtypes
+from app.data.tracing import traced
+
+# Snapshot files and manifests live in this folder next to the database
+SNAPSHOT_DIR_NAME = "snapshots"
+
+# Tables exported to snapshots -> change log of their updated and
+# deleted rows (see schema.create_snapshot_change_logs)
+SNAPSHOT_TABLES = {
+    "cyber_incidents": "cyber_incident_changes",
+    "it_tickets": "it_ticket_changes",
+    "datasets_metadata": "datasets_metadata_changes",
+}
+
+# Arrow IPC buffer compression. Uncompressed files are memory-mapped and
+# handed to pandas without copying; "lz4" or "zstd" make them 3-7x
+# smaller but every load then decompresses the whole file.
+SNAPSHOT_COMPRESSION = os.environ.get("SNAPSHOT_COMPRESSION") or None
+
+# Rows per record batch in a snapshot file
+EXPORT_CHUNK_ROWS = 100_000
+
+# Row ids per "id IN (...)" query when exporting changed rows
+CHANGED_IDS_PER_QUERY = 500
+
+# Rewrite a table's snapshot from scratch once its delta files hold this
+# fraction of its rows, or once there are this many of them
+COMPACT_RATIO = 0.2
+MAX_DELTAS = 8
+
+# Seconds the background refresher waits after a write before exporting,
+# so a burst of writes is picked up by one export
+REFRESH_DELAY = 2.0
+
+# Bump when the manifest layout or the column types (dtypes.TABLE_DTYPES)
+# change; older snapshots are rebuilt
+SNAPSHOT_FORMAT = 2
+
+# SQLite declared-type fragments -> Arrow type name, checked in order
+# (SQLite's own column affinity rules)
+_AFFINITIES = (("INT", "int64"), ("CHAR", "string"), ("CLOB", "string"),
+               ("TEXT", "string"), ("REAL", "float64"), ("FLOA", "float64"),
+               ("DOUB", "float64"))
+
+# Serialises exports of each table within this process
+_export_locks = {table: threading.Lock() for table in SNAPSHOT_TABLES}
+
+
+def snapshot_dir(db_path=DB_PATH):
+    """
+    Args:
+        db_path: Path to the database file
+
+    Returns:
+        Path: Folder holding that database's snapshots
+    """
+    return Path(db_path).parent / SNAPSHOT_DIR_NAME
+
+
+def _manifest_path(directory, table):
+    return directory / f"{table}.json"
+
+
+def _load_manifest(directory, table):
+    try:
+        manifest = json.loads(_manifest_path(directory, table).read_text())
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == SNAPSHOT_FORMAT else None
+
+
+def _save_manifest(directory, table, manifest):
+    # Replacing the manifest is what publishes a new snapshot
+    path = _manifest_path(directory, table)
+    temp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    temp.write_text(json.dumps(manifest))
+    os.replace(temp, path)
+
+
+def _position(conn, table):
+    # Everything that changes when the table's contents or shape change:
+    # the schema version, the newest change-log entry (updates and
+    # deletes) and the AUTOINCREMENT counter (inserts)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    seq = conn.execute(f"SELECT MAX(seq) FROM {SNAPSHOT_TABLES[table]}").fetchone()[0]
+    max_id = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?",
+                          (table,)).fetchone()
+    return {"schema_version": version, "seq": seq or 0, "max_id": max_id[0] if max_id else 0}
+
+
+def _is_current(manifest, position):
+    return all(manifest[key] == value for key, value in position.items())
+
+
+def _arrow_type(dtype):
+    import numpy as np
+    import pyarrow as pa
+
+    # Arrow type holding a TABLE_DTYPES column without conversion on load
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    if dtype.startswith("datetime64"):
+        return pa.timestamp(np.datetime_data(dtype)[0])
+    return pa.from_numpy_dtype(np.dtype(dtype.lower()))
+
+
+def _arrow_schema(conn, table):
+    import pyarrow as pa
+
+    dtypes = TABLE_DTYPES.get(table, {})
+    fields = []
+    for _, name, declared, _, _, _ in conn.execute(f"PRAGMA table_info({table})"):
+        if name in dtypes:
+            fields.append(pa.field(name, _arrow_type(dtypes[name])))
+            continue
+        declared = (declared or "").upper()
+        kind = next((arrow for fragment, arrow in _AFFINITIES if fragment in declared),
+                    "string")
+        fields.append(pa.field(name, getattr(pa, kind)()))
+    return pa.schema(fields)
+
+
+def _categories(conn, table, schema):
+    import pyarrow as pa
+
+    # Every value of each dictionary column. Read in the export's
+    # transaction, so no exported row holds a value missing from them.
+    return {
+        field.name: [value for (value,) in conn.execute(
+            f"SELECT DISTINCT {field.name} FROM {table}"
+            f" WHERE {field.name} IS NOT NULL ORDER BY {field.name}")]
+        for field in schema if pa.types.is_dictionary(field.type)
+    }
+
+
+def _write_part(directory, table, schema, frames, categories=None):
+    import pyarrow as pa
+
+    # Typed once here rather than on every load. An IPC file holds one
+    # dictionary per categorical column, so every chunk gets the same
+    # categories: `categories` when the caller read them up front, so
+    # chunks are written as they arrive, else the union over `frames`,
+    # which are then held together.
+    if categories is None:
+        frames = list(frames)
+        categories = {
+            field.name: sorted(set().union(*(frame[field.name].dropna() for frame in frames)))
+            for field in schema if pa.types.is_dictionary(field.type)
+        }
+    name = f"{table}.{uuid.uuid4().hex}.arrow"
+    options = pa.ipc.IpcWriteOptions(compression=SNAPSHOT_COMPRESSION)
+    rows = 0
+    with pa.OSFile(str(directory / name), "wb") as sink:
+        with pa.ipc.new_file(sink, schema, options=options) as writer:
+            for frame in frames:
+                frame = apply_dtypes(frame, table)
+                for column, values in categories.items():
+                    frame[column] = frame[column].cat.set_categories(values)
+                writer.write_table(
+                    pa.Table.from_pandas(frame, schema=schema, preserve_index=False),
+                    max_chunksize=EXPORT_CHUNK_ROWS,
+                )
+                rows += len(frame)
+    return {"file": name, "rows": rows, "replaces": []}
+
+
+def _changed_ids(conn, table, manifest):
+    # Rows updated or deleted since the last export; newer ids are
+    # picked up as inserts instead. Filtering row_id in SQL would make
+    # SQLite walk the log by row_id instead of using the seq index.
+    rows = conn.execute(f"SELECT row_id FROM {SNAPSHOT_TABLES[table]} WHERE seq > ?",
+                        (manifest["seq"],))
+    return [row_id for (row_id,) in rows if row_id <= manifest["max_id"]]
+
+
+def _changed_frames(conn, table, max_id, changed):
+    import pandas as pd
+
+    # Rows inserted since the last export, then the current versions of
+    # changed rows; deleted rows simply come back missing
+    yield pd.read_sql_query(f"SELECT * FROM {table} WHERE id > ? ORDER BY id DESC",
+                            conn, params=(max_id,))
+    for ids in batched(changed, CHANGED_IDS_PER_QUERY):
+        placeholders = ", ".join("?" * len(ids))
+        yield pd.read_sql_query(f"SELECT * FROM {table} WHERE id IN ({placeholders})",
+                                conn, params=ids)
+
+
+def _needs_full_export(manifest, position, schema, pending_rows):
+    deltas = manifest["parts"][1:]
+    delta_rows = sum(part["rows"] for part in deltas) + pending_rows
+    base_rows = manifest["parts"][0]["rows"]
+    return (manifest["schema_version"] != position["schema_version"]
+            or manifest["columns"] != schema.names
+            or len(deltas) >= MAX_DELTAS
+            or delta_rows > COMPACT_RATIO * max(base_rows, 1))
+
+
+@traced
+def export_snapshot(table, full=False, db_path=DB_PATH):
+    """
+    Bring a table's columnar snapshot up to date. Only rows inserted,
+    updated or deleted since the last export are written, as a delta
+    file; the snapshot is rewritten from scratch when there is none yet,
+    the schema changed, or deltas have piled up.
+
+    Args:
+        table: One of SNAPSHOT_TABLES
+        full: Rewrite the whole snapshot even if a delta would do
+        db_path: Path to the database file
+
+    Returns:
+        dict: table, mode ('fresh', 'delta' or 'full'), rows written and
+            seconds taken
+    """
+    import pandas as pd
+
+    start = time.perf_counter()
+    directory = snapshot_dir(db_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Another export of this table could otherwise list parts in its
+    # manifest that this one is about to unlink
+    with _export_locks[table]:
+        manifest = _load_manifest(directory, table)
+        if manifest is not None and not all((directory / part["file"]).exists()
+                                            for part in manifest["parts"]):
+            # A part went missing, e.g. unlinked by another process's
+            # export; a delta on top of it would stay unreadable
+            full = True
+
+        with read_connection(db_path) as conn:
+            # One read transaction, so the rows written match the position
+            # recorded for them even while writers carry on
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            try:
+                position = _position(conn, table)
+                schema = _arrow_schema(conn, table)
+                if not full and manifest is not None and _is_current(manifest, position):
+                    return {"table": table, "mode": "fresh", "rows": 0,
+                            "seconds": time.perf_counter() - start}
+
+                if not full and manifest is not None:
+                    changed = _changed_ids(conn, table, manifest)
+                    # Upper bound: inserted ids may since have been deleted
+                    inserted = position["max_id"] - manifest["max_id"]
+                    full = _needs_full_export(manifest, position, schema,
+                                              len(changed) + inserted)
+
+                if full or manifest is None:
+                    mode = "full"
+                    part = _write_part(directory, table, schema, pd.read_sql_query(
+                        f"SELECT * FROM {table} ORDER BY id DESC", conn,
+                        chunksize=EXPORT_CHUNK_ROWS
+                    ), _categories(conn, table, schema))
+                    previous = manifest["parts"] if manifest else []
+                    manifest = {"format": SNAPSHOT_FORMAT, "columns": schema.names,
+                                "parts": [part]}
+                else:
+                    mode = "delta"
+                    part = _write_part(directory, table, schema,
+                                       _changed_frames(conn, table, manifest["max_id"], changed))
+                    # Earlier parts' copies of changed rows are superseded
+                    part["replaces"] = changed
+                    previous = []
+                    manifest["parts"].append(part)
+            finally:
+                conn.rollback()
+
+        manifest.update(position, exported_at=time.time())
+        _save_manifest(directory, table, manifest)
+        for old in previous:
+            (directory / old["file"]).unlink(missing_ok=True)
+    return {"table": table, "mode": mode, "rows": part["rows"],
+            "seconds": time.perf_counter() - start}
+
+
+def refresh_snapshots(tables=None, full=False, db_path=DB_PATH):
+    """
+    Export every snapshot table that changed since its last export.
+
+    Args:
+        tables: Table names, or None for all of SNAPSHOT_TABLES
+        full: Rewrite the snapshots from scratch
+        db_path: Path to the database file
+
+    Returns:
+        list: export_snapshot() reports
+    """
+    return [export_snapshot(table, full, db_path) for table in (tables or SNAPSHOT_TABLES)]
+
+
+def _load_parts(directory, manifest, columns):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    # Parts are applied oldest first; each later part replaces the rows
+    # it lists. Memory-mapped, so columns that are not selected are
+    # never read from disk.
+    wanted = None if columns is None else list(dict.fromkeys(["id", *columns]))
+    data = None
+    for part in manifest["parts"]:
+        with pa.memory_map(str(directory / part["file"])) as source:
+            loaded = pa.ipc.open_file(source).read_all()
+        if wanted is not None:
+            loaded = loaded.select(wanted)
+        if data is None:
+            data = loaded
+            continue
+        if part["replaces"]:
+            replaced = pc.is_in(data["id"],
+                               value_set=pa.array(part["replaces"], data["id"].type))
+            data = data.filter(pc.invert(replaced))
+        data = pa.concat_tables([loaded, data])
+
+    if len(manifest["parts"]) > 1:
+        data = data.sort_by([("id", "descending")])
+    if columns is not None:
+        data = data.select(list(columns))
+    return data
+
+
+def _read(table, columns, db_path, stale_ok):
+    # Returns (frame, manifest) or None; see read_snapshot and
+    # read_snapshot_since
+    directory = snapshot_dir(db_path)
+    manifest = _load_manifest(directory, table)
+    if manifest is None:
+        schedule_refresh(table)
+        return None
+    try:
+        with read_connection(db_path) as conn:
+            position = _position(conn, table)
+    except sqlite3.OperationalError:
+        # Change logs not created yet; run the migrations first
+        return None
+    if not _is_current(manifest, position):
+        schedule_refresh(table)
+        # A snapshot from another schema version, or ahead of the
+        # database, cannot be caught up from the change log
+        if (not stale_ok or manifest["schema_version"] != position["schema_version"]
+                or manifest["seq"] > position["seq"]
+                or manifest["max_id"] > position["max_id"]):
+            return None
+
+    try:
+        data = _load_parts(directory, manifest, columns)
+    except (OSError, KeyError):
+        # Replaced by a concurrent export after the manifest was read, or
+        # a part is missing; the next export rewrites the snapshot
+        schedule_refresh(table)
+        return None
+    return apply_dtypes(data.to_pandas(), table), manifest
+
+
+@traced
+def read_snapshot(table, columns=None, db_path=DB_PATH):
+    """
+    Load a table from its columnar snapshot, if the snapshot is current.
+    Rows come back newest first, like the SQLite readers, with the
+    column types of dtypes.TABLE_DTYPES. A stale snapshot returns None
+    and asks the background refresher (when it is running) to catch up.
+
+    Args:
+        table: One of SNAPSHOT_TABLES
+        columns: Optional list of columns to load; others are not read
+        db_path: Path to the database file
+
+    Returns:
+        pandas.DataFrame: Table contents, or None if there is no current
+            snapshot and the caller should read SQLite instead
+    """
+    loaded = _read(table, columns, db_path, stale_ok=False)
+    return None if loaded is None else loaded[0]
+
+
+@traced
+def read_snapshot_since(table, columns=None, db_path=DB_PATH):
+    """
+    Load a table from its columnar snapshot even if rows were written
+    after it was exported, for callers that catch up from the table's
+    change log themselves. Otherwise like read_snapshot().
+
+    Args:
+        table: One of SNAPSHOT_TABLES
+        columns: Optional list of columns to load; others are not read
+        db_path: Path to the database file
+
+    Returns:
+        tuple: (pandas.DataFrame, change-log seq the snapshot was exported
+            at), or None if there is no snapshot for the current schema
+    """
+    loaded = _read(table, columns, db_path, stale_ok=True)
+    return None if loaded is None else (loaded[0], loaded[1]["seq"])
+
+
+_pending = set()
+_wakeup = threading.Event()
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def schedule_refresh(*tables):
+    """
+    Ask the background refresher to export these tables soon. Does
+    nothing unless start_snapshot_refresher() has been called, so batch
+    jobs are not slowed down by exports after every write.
+
+    Args:
+        *tables: Table names; ones without a snapshot are ignored
+    """
+    tables = [table for table in tables if table in SNAPSHOT_TABLES]
+    if not tables or _refresher is None:
+        return
+    with _refresher_lock:
+        _pending.update(tables)
+    _wakeup.set()
+
+
+def start_snapshot_refresher(delay=REFRESH_DELAY):
+    """
+    Start (once per process) a daemon thread that re-exports snapshots
+    after writes through the data layer, and after stale reads, which
+    also catches writes made by other processes.
+
+    Args:
+        delay: Seconds to wait after a write before exporting
+
+    Returns:
+        threading.Thread: The refresher thread
+    """
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            def run():
+                while True:
+                    _wakeup.wait()
+                    time.sleep(delay)
+                    with _refresher_lock:
+                        tables = sorted(_pending)
+                        _pending.clear()
+                        _wakeup.clear()
+                    for table in tables:
+                        try:
+                            export_snapshot(table)
+                        except Exception as e:
+                            print(f"Snapshot export of {table} failed: {e}")
+
+            _refresher = threading.Thread(target=run, name="snapshot-refresher", daemon=True)
+            _refresher.start()
+            # Catch up with anything written before the refresher started
+            _pending.update(SNAPSHOT_TABLES)
+            _wakeup.set()
+        return _refresher
+
+
+class _ChangeWatcher:
+    """
+    Finds the snapshot tables written by any connection since the last
+    poll, including connections in other processes, which never reach
+    query_cache.bump() here.
+
+    PRAGMA data_version on a private connection changes only when another
+    connection commits, so an idle database costs one PRAGMA per poll;
+    after a commit the tables' positions (see _position) show which of
+    them were written.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._data_version = None
+        self._positions = {}
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """
+        Returns:
+            list: Tables whose position moved since the previous poll;
+                every table on the first poll or when the database
+                cannot be read
+        """
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._conn = connect_database(self.db_path, "reader",
+                                                  check_same_thread=False)
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error:
+                return list(SNAPSHOT_TABLES)
+            if data_version == self._data_version:
+                return []
+            self._data_version = data_version
+
+            written = []
+            for table in SNAPSHOT_TABLES:
+                try:
+                    position = _position(self._conn, table)
+                except sqlite3.Error:
+                    # Not migrated yet; check again after the next commit
+                    position = None
+                if position is None or position != self._positions.get(table):
+                    written.append(table)
+                self._positions[table] = position
+            return written
+
+
+query_cache.add_listener(schedule_refresh)
+query_cache.add_watcher(_ChangeWatcher().poll)
@@ -1,9 +1,35 @@
-import pandas as pd
-from app.data.db import connect_database
+from app.data.cache import cached_query
+from app.data.dtypes import apply_dtypes
+from app.data.search import search
+from app.data.snapshots import read_snapshot
+from app.data.tracing import traced
+from app.data.db import (
+    BATCH_SIZE, PAGE_SIZE, build_column_list, build_filter_query, fetch_record,
+    get_distinct_values, insert_many, invalidate, iter_pages, read_connection, read_page,
+    transaction,
+)
 
+# Insert column order for it_tickets
+TICKET_COLUMNS = (
+    "ticket_id", "priority", "status", "category", "subject", "description",
+    "created_date", "resolved_date", "assigned_to", "resolution_time_hours",
+)
 
+# Columns get_all_tickets can return
+TICKET_READ_COLUMNS = {"id", *TICKET_COLUMNS, "created_at"}
+
+# Columns the filter API accepts; anything else is rejected
+TICKET_FILTER_COLUMNS = {"ticket_id", "priority", "status", "category", "assigned_to"}
+TICKET_SORT_COLUMNS = {"id", "created_date", "resolved_date", "priority", "status"}
+
+# Ticket statuses that carry a resolved_date
+RESOLVED_STATUSES = {"Resolved", "Closed"}
+
+
+@traced
 def insert_ticket(ticket_id, priority, status, category, subject, description,
-                  created_date, resolved_date=None, assigned_to=None):
+                  created_date, resolved_date=None, assigned_to=None,
+                  resolution_time_hours=None):
     """
     Insert new IT ticket.
 
@@ -17,41 +43,101 @@ def insert_ticket(ticket_id, priority, status, category, subject, description,
         created_date: Creation date (YYYY-MM-DD)
         resolved_date: Resolution date (optional)
         assigned_to: Assigned user (optional)
+        resolution_time_hours: Hours taken to resolve (optional)
 
     Returns:
         int: ID of inserted ticket
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO it_tickets 
-        (ticket_id, priority, status, category, subject, description, 
-         created_date, resolved_date, assigned_to)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (ticket_id, priority, status, category, subject, description,
-          created_date, resolved_date, assigned_to))
-    conn.commit()
-    id = cursor.lastrowid
-    conn.close()
-    return id
+    with transaction() as conn:
+        invalidate("it_tickets")
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO it_tickets
+            (ticket_id, priority, status, category, subject, description,
+             created_date, resolved_date, assigned_to, resolution_time_hours)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (ticket_id, priority, status, category, subject, description,
+              created_date, resolved_date, assigned_to, resolution_time_hours))
+        return cursor.lastrowid
 
 
-def get_all_tickets():
+@traced
+def insert_tickets_many(records, batch_size=BATCH_SIZE):
     """
-    Get all tickets as DataFrame.
+    Insert many tickets in a single transaction.
+
+    Args:
+        records: Iterable (or generator) of dicts keyed by TICKET_COLUMNS,
+            or of tuples in TICKET_COLUMNS order
+        batch_size: Rows per executemany() call
+
+    Returns:
+        tuple: (first_id, last_id) of the inserted rows, or None if empty
+    """
+    return insert_many("it_tickets", TICKET_COLUMNS, records, batch_size)
+
+
+@traced
+@cached_query("it_tickets")
+def get_all_tickets(columns=None):
+    """
+    Get all tickets as DataFrame, loaded from the columnar snapshot when it
+    is current and from SQLite otherwise. Columns have the types declared
+    in dtypes.TABLE_DTYPES: categoricals, datetimes and narrow integers.
+
+    Args:
+        columns: Optional list of columns to return, in that order;
+            all columns if None
 
     Returns:
         pandas.DataFrame: All tickets
     """
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM it_tickets ORDER BY id DESC",
-        conn
-    )
-    conn.close()
-    return df
+    select = build_column_list("it_tickets", columns, TICKET_READ_COLUMNS)
+    df = read_snapshot("it_tickets", columns)
+    if df is not None:
+        return df
+
+    import pandas as pd
+
+    with read_connection() as conn:
+        df = pd.read_sql_query(
+            f"SELECT {select} FROM it_tickets ORDER BY id DESC",
+            conn
+        )
+    return apply_dtypes(df, "it_tickets")
+
+
+@traced
+@cached_query("it_tickets")
+def get_tickets_page(before_id=None, after_id=None, page_size=PAGE_SIZE):
+    """
+    Get one page of tickets, newest first.
+
+    Args:
+        before_id: Cursor from the previous call; returns older tickets
+        after_id: Returns tickets newer than this id
+        page_size: Maximum rows in the page
+
+    Returns:
+        tuple: (pandas.DataFrame, next cursor or None)
+    """
+    return read_page("it_tickets", before_id, after_id, page_size)
+
+
+def iter_ticket_pages(page_size=PAGE_SIZE):
+    """
+    Lazily yield all tickets, newest first, one page at a time.
+
+    Args:
+        page_size: Rows per page
+
+    Yields:
+        pandas.DataFrame: Next page of tickets
+    """
+    yield from iter_pages("it_tickets", page_size)
 
 
+@traced
 def get_ticket_by_id(ticket_id):
     """
     Get a specific ticket by ticket_id.
@@ -60,19 +146,17 @@ def get_ticket_by_id(ticket_id):
         ticket_id: Unique ticket identifier
 
     Returns:
-        tuple: Ticket record or None
+        Record: Ticket record (a named tuple of the table's columns) or None
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT * FROM it_tickets WHERE ticket_id = ?",
-        (ticket_id,)
-    )
-    ticket = cursor.fetchone()
-    conn.close()
-    return ticket
+    with read_connection() as conn:
+        return fetch_record(
+            conn,
+            "SELECT * FROM it_tickets WHERE ticket_id = ?",
+            (ticket_id,)
+        )
 
 
+@traced
 def update_ticket_status(ticket_id, new_status, resolved_date=None):
     """
     Update the status of a ticket.
@@ -85,18 +169,33 @@ def update_ticket_status(ticket_id, new_status, resolved_date=None):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE it_tickets SET status = ?, resolved_date = ? WHERE ticket_id = ?",
-        (new_status, resolved_date, ticket_id)
-    )
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-    return rows_affected
+    with transaction() as conn:
+        invalidate("it_tickets")
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE it_tickets SET status = ?, resolved_date = ? WHERE ticket_id = ?",
+            (new_status, resolved_date, ticket_id)
+        )
+        return cursor.rowcount
+
+
+@traced
+def update_ticket_resolution(ticket_id, new_status, resolved_date):
+    """
+    Update the status and resolved date of a specific ticket.
+
+    Args:
+        ticket_id: Unique ticket identifier
+        new_status: New status value
+        resolved_date: Resolution date
+
+    Returns:
+        int: Number of rows affected
+    """
+    return update_ticket_status(ticket_id, new_status, resolved_date)
 
 
+@traced
 def delete_ticket(ticket_id):
     """
     Delete a ticket from the database.
@@ -107,93 +206,138 @@ def delete_ticket(ticket_id):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "DELETE FROM it_tickets WHERE ticket_id = ?",
-        (ticket_id,)
-    )
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-    return rows_affected
+    with transaction() as conn:
+        invalidate("it_tickets")
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM it_tickets WHERE ticket_id = ?",
+            (ticket_id,)
+        )
+        return cursor.rowcount
+
 
+@traced
+@cached_query("it_tickets")
 def get_priority_count():
     """
-    Count priority tickets.
+    Count priority tickets. Reads the trigger-maintained
+    ticket_priority_counts table instead of grouping it_tickets.
 
     Returns:
         pandas.DataFrame: priority counts
     """
-    conn = connect_database()
+    import pandas as pd
+
     query = """
-    SELECT priority, COUNT(*) AS count
-    FROM it_tickets
-    GROUP BY priority
+    SELECT CASE WHEN is_null THEN NULL ELSE priority END AS priority, count
+    FROM ticket_priority_counts
     ORDER BY count DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return dfimport pandas as pd
-import sqlite3
-
-# This file is responsible for all low-level database interactions
-# for the IT Tickets domain.
-
-# --- 1. CREATE: Insert a New Ticket ---
-def insert_ticket(conn: sqlite3.Connection, ticket_id: str, priority: str, status: str, category: str, subject: str, description: str, created_date: str, assigned_to: str):
-    """
-    Insert a new IT ticket into the database. (CREATE)
-    """
-    cursor = conn.cursor()
-    
-    insert_sql = """
-        INSERT INTO it_tickets 
-        (ticket_id, priority, status, category, subject, description, created_date, assigned_to)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """
-    params = (ticket_id, priority, status, category, subject, description, created_date, assigned_to)
-    
-    cursor.execute(insert_sql, params)
-    conn.commit()
-    # Return the ID of the new row
-    return cursor.lastrowid
-
-# --- 2. READ: Retrieve All Tickets ---
-def get_all_tickets(conn: sqlite3.Connection):
-    """
-    Retrieve all IT tickets from the database, returned as a Pandas DataFrame. (READ)
-    """
-    query = "SELECT * FROM it_tickets ORDER BY id DESC"
-    df = pd.read_sql_query(query, conn)
-    return df
-
-# --- 3. UPDATE: Change Ticket Status and Resolved Date ---
-def update_ticket_resolution(conn: sqlite3.Connection, ticket_id: str, new_status: str, resolved_date: str):
-    """
-    Update the status and resolved date of a specific ticket. (UPDATE)
-    """
-    cursor = conn.cursor()
-    
-    update_sql = "UPDATE it_tickets SET status = ?, resolved_date = ? WHERE ticket_id = ?"
-    params = (new_status, resolved_date, ticket_id)
-    
-    cursor.execute(update_sql, params)
-    conn.commit()
-    # Return the number of rows updated
-    return cursor.rowcount
-
-# --- 4. DELETE: Remove a Ticket ---
-def delete_ticket(conn: sqlite3.Connection, ticket_id: str):
-    """
-    Delete an IT ticket from the database using its unique ticket_id. (DELETE)
-    """
-    cursor = conn.cursor()
-    
-    delete_sql = "DELETE FROM it_tickets WHERE ticket_id = ?"
-    params = (ticket_id,)
-    
-    cursor.execute(delete_sql, params)
-    conn.commit()
-    # Return the number of rows deleted
-    return cursor.rowcount
+    with read_connection() as conn:
+        return pd.read_sql_query(query, conn)
+
+
+@traced
+@cached_query("it_tickets")
+def filter_tickets(priority=None, status=None, category=None, assigned_to=None,
+                   start=None, end=None, order_by="created_date", descending=True,
+                   limit=PAGE_SIZE):
+    """
+    Get tickets matching the given filters, filtered and sorted in SQL.
+
+    Args:
+        priority: Priority level, or list of levels
+        status: Status, or list of statuses
+        category: Category, or list of categories
+        assigned_to: Assignee, or list of assignees
+        start: Earliest created_date (inclusive)
+        end: Latest created_date (exclusive)
+        order_by: One of TICKET_SORT_COLUMNS
+        descending: Sort direction
+        limit: Maximum rows, or None for all matches
+
+    Returns:
+        pandas.DataFrame: Matching tickets
+    """
+    import pandas as pd
+
+    sql, params = build_filter_query(
+        "it_tickets", TICKET_FILTER_COLUMNS, TICKET_SORT_COLUMNS,
+        filters={"priority": priority, "status": status,
+                 "category": category, "assigned_to": assigned_to},
+        date_column="created_date", start=start, end=end,
+        order_by=order_by, descending=descending, limit=limit,
+    )
+    with read_connection() as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+@traced
+def get_ticket_changes(since_seq=0):
+    """
+    Get the SLA-relevant columns of every ticket inserted, updated or
+    deleted after a change sequence number. Deleted tickets come back
+    with exists = 0 and NULL columns.
+
+    Args:
+        since_seq: Sequence number returned by the previous call; 0 reads
+            every ticket
+
+    Returns:
+        tuple: (pandas.DataFrame with id, exists, priority, status,
+            assigned_to and resolution_time_hours, latest seq seen)
+    """
+    import pandas as pd
+
+    query = """
+    SELECT c.row_id AS id, c.seq, t.id IS NOT NULL AS "exists",
+           t.priority, t.status, t.assigned_to, t.resolution_time_hours
+    FROM it_ticket_changes c
+    LEFT JOIN it_tickets t ON t.id = c.row_id
+    WHERE c.seq > ?
+    """
+    with read_connection() as conn:
+        df = pd.read_sql_query(query, conn, params=(since_seq,))
+    seqs = df.pop("seq")
+    latest = int(seqs.max()) if len(seqs) else since_seq
+    return df, latest
+
+
+@traced
+@cached_query("it_tickets")
+def get_ticket_filter_options():
+    """
+    Get the values present in each filterable ticket column.
+
+    Returns:
+        dict: column name -> sorted list of values
+    """
+    return {
+        column: get_distinct_values("it_tickets", column)
+        for column in ("priority", "status", "category", "assigned_to")
+    }
+
+
+@traced
+@cached_query("it_tickets")
+def search_tickets(text, prefix=True, limit=PAGE_SIZE, rank_window=None):
+    """
+    Full-text search over ticket subjects and descriptions, best match first.
+
+    Args:
+        text: Search text; the last word matches as a prefix
+        prefix: Set False to match whole words only
+        limit: Maximum rows
+        rank_window: Rank only the newest this-many matches, trading
+            older matches for speed; None ranks every match
+
+    Returns:
+        pandas.DataFrame: Matching tickets with a highlighted snippet from
+            whichever of subject or description matched best, and bm25
+            rank (lower is better)
+    """
+    return search(
+        "it_tickets_fts",
+        ("id", "ticket_id", "priority", "status", "assigned_to", "created_date"),
+        text, snippet_column=-1, prefix=prefix, limit=limit, rank_window=rank_window,
+    )
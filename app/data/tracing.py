@@ -0,0 +1,372 @@
+import bisect
+import functools
+import os
+import re
+import threading
+import time
+from collections import deque
+
+# Tracing is off unless QUERY_TRACE=1; it can also be switched on at
+# runtime with query_tracer.enable()
+QUERY_TRACE = os.environ.get("QUERY_TRACE") == "1"
+
+# Statements slower than this (milliseconds) go into the slow-query log.
+# Override with the SLOW_QUERY_MS environment variable.
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+
+# Entries kept in the slow-query log
+SLOW_LOG_SIZE = 200
+
+# SQLite VM instructions between progress-handler calls
+PROGRESS_STEPS = 10_000
+
+# Upper bounds of the latency histogram buckets, in milliseconds; the
+# last bucket holds everything slower
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50,
+                      100, 250, 500, 1000, 2500, 5000, 10000)
+
+# The trace callback receives SQL with bound values inlined; these
+# patterns put the placeholders back so executions of one statement are
+# grouped together and no row data ends up in the report
+_LITERALS = re.compile(r"'(?:[^']|'')*'|[xX]'[0-9a-fA-F]*'|(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """
+    Reduce an executed statement to its shape, e.g.
+    "SELECT * FROM t WHERE id = 5" -> "SELECT * FROM t WHERE id = ?".
+
+    Args:
+        sql: Statement text as passed to the trace callback
+
+    Returns:
+        str: Statement with literals replaced by ? and whitespace collapsed
+    """
+    sql = _LITERALS.sub("?", sql)
+    sql = _PLACEHOLDER_LISTS.sub("?, ...", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def _row_count(result):
+    # Rows a data-layer function handed back, where that is meaningful
+    if result is None:
+        return 0
+    if isinstance(result, tuple) and hasattr(result, "_fields"):
+        return 1
+    if isinstance(result, (list, dict)) or hasattr(result, "memory_usage"):
+        return len(result)
+    return 0
+
+
+class LatencyHistogram:
+    """
+    Call count, total and maximum time, and a fixed-bucket latency
+    histogram for one statement or function.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.steps = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms, rows=0, steps=0):
+        """
+        Args:
+            elapsed_ms: Duration of one call
+            rows: Rows it returned
+            steps: SQLite VM instructions it ran, to PROGRESS_STEPS precision
+        """
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.steps += steps
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, q):
+        """
+        Estimate a latency percentile from the buckets.
+
+        Args:
+            q: Fraction between 0 and 1, e.g. 0.95
+
+        Returns:
+            float: Upper bound of the bucket holding that percentile,
+                capped at the slowest call seen
+        """
+        rank = q * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        """
+        Returns:
+            dict: calls, total_ms, mean_ms, p50_ms, p95_ms, p99_ms, max_ms,
+                rows, steps and the raw bucket counts
+        """
+        return {
+            "calls": self.calls,
+            "total_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.calls if self.calls else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms,
+            "rows": self.rows,
+            "steps": self.steps,
+            "buckets": list(self.buckets),
+        }
+
+
+class QueryTracer:
+    """
+    Per-statement and per-function latency histograms plus a slow-query
+    log for the data layer.
+
+    Statements are seen through SQLite's trace callback, which fires when
+    a statement starts running; a statement is timed until the next one
+    starts on the same thread, its connection is released, or the traced
+    function around it returns, so fetching its rows is included. The
+    progress handler counts the VM instructions each statement runs.
+
+    While disabled no callbacks are installed on connections and traced()
+    functions only pay for one attribute check.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, slow_log_size=SLOW_LOG_SIZE):
+        """
+        Args:
+            slow_ms: Slow-query threshold in milliseconds
+            slow_log_size: Entries kept in the slow-query log
+        """
+        self.enabled = False
+        self.slow_ms = slow_ms
+        # Bumped on enable/disable so pooled connections know to
+        # re-install their callbacks
+        self.version = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._statements = {}
+        self._functions = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._since = time.time()
+
+    def enable(self, slow_ms=None):
+        """
+        Start tracing. Connections pick up the callbacks the next time
+        they are checked out of a pool.
+
+        Args:
+            slow_ms: Optional new slow-query threshold in milliseconds
+        """
+        if slow_ms is not None:
+            self.slow_ms = slow_ms
+        self.enabled = True
+        self.version += 1
+
+    def disable(self):
+        """
+        Stop tracing; collected statistics are kept until reset().
+        """
+        self.enabled = False
+        self.version += 1
+
+    def reset(self):
+        """
+        Drop every histogram and the slow-query log.
+        """
+        with self._lock:
+            self._statements.clear()
+            self._functions.clear()
+            self._slow.clear()
+            self._since = time.time()
+
+    def install(self, conn):
+        """
+        Add or remove the trace and progress callbacks on a connection to
+        match the current state.
+
+        Args:
+            conn: sqlite3.Connection
+
+        Returns:
+            int: The tracer version the connection now matches
+        """
+        if self.enabled:
+            conn.set_trace_callback(self._on_statement)
+            conn.set_progress_handler(self._on_progress, PROGRESS_STEPS)
+        else:
+            conn.set_trace_callback(None)
+            conn.set_progress_handler(None, 0)
+        return self.version
+
+    def _on_statement(self, sql):
+        if not self.enabled:
+            # Connection still carries callbacks from before disable()
+            return
+        if sql.startswith("--"):
+            # Statements SQLite runs internally (FTS5 shadow tables,
+            # trigger bodies) count towards the statement that caused them
+            return
+        now = time.perf_counter()
+        local = self._local
+        current = getattr(local, "statement", None)
+        if current is not None:
+            # Triggers re-report the statement that fired them
+            if current[0] == sql and current[3] == self.version:
+                return
+            self._finish(current, now)
+        local.statement = [sql, now, 0, self.version]
+
+    def _on_progress(self):
+        current = getattr(self._local, "statement", None)
+        if current is not None:
+            current[2] += PROGRESS_STEPS
+        return 0
+
+    def finish_statement(self):
+        """
+        Close the statement running on this thread, if any. Called when a
+        connection goes back to its pool.
+        """
+        current = getattr(self._local, "statement", None)
+        if current is not None:
+            self._local.statement = None
+            self._finish(current, time.perf_counter())
+
+    def _finish(self, statement, now):
+        sql, started, steps, version = statement
+        if version != self.version:
+            # Started before tracing was last switched off and on again
+            return
+        elapsed_ms = (now - started) * 1000
+        key = normalize_sql(sql)
+        stack = getattr(self._local, "functions", None)
+        with self._lock:
+            histogram = self._statements.get(key)
+            if histogram is None:
+                histogram = self._statements[key] = LatencyHistogram()
+            histogram.record(elapsed_ms, steps=steps)
+            if elapsed_ms >= self.slow_ms:
+                self._slow.append({
+                    "at": time.time(),
+                    "ms": elapsed_ms,
+                    "sql": key,
+                    "function": " > ".join(stack) if stack else None,
+                    "thread": threading.current_thread().name,
+                    "steps": steps,
+                })
+
+    def call(self, name, func, args, kwargs):
+        """
+        Run a data-layer function and record its latency and result size.
+
+        Args:
+            name: Function name to report under
+            func: The function
+            args: Positional arguments
+            kwargs: Keyword arguments
+
+        Returns:
+            object: Whatever func returns
+        """
+        local = self._local
+        stack = getattr(local, "functions", None)
+        if stack is None:
+            stack = local.functions = []
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            self.finish_statement()
+            stack.pop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        rows = _row_count(result)
+        with self._lock:
+            histogram = self._functions.get(name)
+            if histogram is None:
+                histogram = self._functions[name] = LatencyHistogram()
+            histogram.record(elapsed_ms, rows=rows)
+        return result
+
+    def report(self, limit=10, order_by="total_ms"):
+        """
+        Summarise what has been traced so far.
+
+        Args:
+            limit: Number of statements and functions to return
+            order_by: Summary field to rank by, e.g. "total_ms" or "p95_ms"
+
+        Returns:
+            dict: enabled, slow_ms, since (epoch seconds), statements and
+                functions (lists of summaries with a "name" key, worst
+                first) and slow (slow-query log entries, newest first)
+        """
+        with self._lock:
+            statements = [dict(histogram.summary(), name=sql)
+                          for sql, histogram in self._statements.items()]
+            functions = [dict(histogram.summary(), name=name)
+                         for name, histogram in self._functions.items()]
+            slow = list(reversed(self._slow))
+            since = self._since
+        statements.sort(key=lambda item: item[order_by], reverse=True)
+        functions.sort(key=lambda item: item[order_by], reverse=True)
+        return {
+            "enabled": self.enabled,
+            "slow_ms": self.slow_ms,
+            "since": since,
+            "statements": statements[:limit],
+            "functions": functions[:limit],
+            "slow": slow,
+        }
+
+
+query_tracer = QueryTracer()
+if QUERY_TRACE:
+    query_tracer.enable()
+
+
+def traced(func):
+    """
+    Decorator that records a data-layer function's latency and result
+    size in query_tracer while tracing is enabled.
+
+    Args:
+        func: Function to instrument
+
+    Returns:
+        function: Wrapped function
+    """
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not query_tracer.enabled:
+            return func(*args, **kwargs)
+        return query_tracer.call(name, func, args, kwargs)
+
+    return wrapper
+
+
+def trace_report(limit=10, order_by="total_ms"):
+    """
+    Get the top statements and functions from the process-wide tracer.
+
+    Args:
+        limit: Number of statements and functions to return
+        order_by: Summary field to rank by
+
+    Returns:
+        dict: See QueryTracer.report
+    """
+    return query_tracer.report(limit, order_by)
@@ -1,6 +1,8 @@
 import sqlite3
-import pandas as pd
+from app.data.db import fetch_record
+from app.data.tracing import traced
 
+@traced
 def insert_user(conn: sqlite3.Connection, username: str, password_hash: str, role: str = 'user'):
     """Insert a new user (used by registration/migration)."""
     cursor = conn.cursor()
@@ -9,16 +11,14 @@ def insert_user(conn: sqlite3.Connection, username: str, password_hash: str, rol
     conn.commit()
     return cursor.lastrowid
 
+@traced
 def get_user_by_username(conn: sqlite3.Connection, username: str):
-    """Retrieve a single user by username (used by login)."""
+    """Retrieve a single user by username (used by login) as a Record with
+    id, username, password_hash, role and created_at fields, or None."""
     query = "SELECT * FROM users WHERE username = ?"
-    # Use pandas or fetchone to get the result
-    df = pd.read_sql_query(query, conn, params=(username,))
-    if not df.empty:
-        # Return as a dictionary or a Pandas Series object
-        return df.iloc[0].to_dict()
-    return None
+    return fetch_record(conn, query, (username,))
 
+@traced
 def update_user_role(conn: sqlite3.Connection, user_id: int, new_role: str):
     """Update a user's role."""
     cursor = conn.cursor()
@@ -27,4 +27,13 @@ def update_user_role(conn: sqlite3.Connection, user_id: int, new_role: str):
     conn.commit()
     return cursor.rowcount
 
+@traced
+def update_user_password_hash(conn: sqlite3.Connection, username: str, password_hash: str):
+    """Replace a user's stored password hash (used by rehash-on-login)."""
+    cursor = conn.cursor()
+    sql = "UPDATE users SET password_hash = ? WHERE username = ?"
+    cursor.execute(sql, (password_hash, username))
+    conn.commit()
+    return cursor.rowcount
+
 # Add more CRUD functions (e.g., get_all_users, delete_user) as needed.
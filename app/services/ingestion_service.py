@@ -0,0 +1,488 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+from app.data.db import DB_PATH, insert_many, read_connection, upsert_many
+from app.data.manifest import get_manifest_entry, record_ingestion
+from app.data.tickets import RESOLVED_STATUSES
+
+# Rows parsed from the CSV per chunk; bounds memory for large exports
+CHUNK_SIZE = 50_000
+
+# Processes parsing and coercing chunks in load_csvs. The calling
+# process only reads raw chunks and writes, so parsing is what scales.
+INGEST_WORKERS = os.cpu_count() or 1
+
+# Below this many bytes of changed CSV, starting worker processes costs
+# more than parsing inline
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+# Parsed chunks waiting for the writer, per worker; bounds memory when
+# parsing outpaces SQLite
+WRITE_QUEUE_PER_WORKER = 2
+
+# Columns stored as normalised 'YYYY-MM-DD HH:MM:SS' text
+DATETIME_COLUMNS = {"timestamp", "created_date", "resolved_date", "last_updated"}
+
+# Unique CSV identifier per table; re-ingestion upserts on it
+NATURAL_KEYS = {
+    "cyber_incidents": "incident_id",
+    "it_tickets": "ticket_id",
+    "datasets_metadata": "dataset_id",
+}
+
+# Re-ingestion compares content-defined groups of rows rather than
+# fixed-size chunks. A group ends after each row whose content hash is
+# divisible by GROUP_ROWS, so groups average that many rows, and
+# inserting or deleting a row changes only the group it falls in.
+GROUP_ROWS = 1000
+
+# Groups are cut after this many rows regardless, so a long run of rows
+# without a boundary cannot grow one without limit
+MAX_GROUP_ROWS = 8 * GROUP_ROWS
+
+
+def _derive_ticket_columns(chunk):
+    # it_tickets.csv has no subject or resolved date: use the description
+    # as subject, and date resolved/closed tickets resolution_time_hours
+    # after creation.
+    import pandas as pd
+
+    if "subject" not in chunk and "description" in chunk:
+        chunk["subject"] = chunk["description"]
+    if "resolved_date" not in chunk and "resolution_time_hours" in chunk:
+        created = pd.to_datetime(chunk["created_date"], errors="coerce", format="mixed")
+        hours = pd.to_numeric(chunk["resolution_time_hours"], errors="coerce")
+        resolved = created + pd.to_timedelta(hours, unit="h")
+        if "status" in chunk:
+            resolved = resolved.where(chunk["status"].isin(RESOLVED_STATUSES))
+        chunk["resolved_date"] = resolved
+    return chunk
+
+
+# CSV column -> table column renames, plus an optional hook that derives
+# table columns the CSV does not carry directly.
+CSV_MAPPINGS = {
+    "cyber_incidents": {
+        "rename": {},
+        "derive": None,
+    },
+    "it_tickets": {
+        "rename": {"created_at": "created_date"},
+        "derive": _derive_ticket_columns,
+    },
+    "datasets_metadata": {
+        "rename": {
+            "name": "dataset_name",
+            "rows": "record_count",
+            "columns": "column_count",
+            "upload_date": "last_updated",
+        },
+        "derive": None,
+    },
+}
+
+
+def get_table_columns(table_name, db_path=DB_PATH):
+    """
+    Read a table's declared columns from the database schema.
+
+    Args:
+        table_name: Name of the table
+        db_path: Path to the database file
+
+    Returns:
+        dict: column name -> declared SQLite type, excluding the
+            autoincrement id and defaulted created_at columns
+    """
+    with read_connection(db_path) as conn:
+        rows = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+    if not rows:
+        raise ValueError(f"Unknown table: {table_name}")
+    return {
+        name: col_type.upper()
+        for _, name, col_type, _, default, pk in rows
+        if not pk and default is None
+    }
+
+
+def coerce_chunk(chunk, table_name, table_columns):
+    """
+    Map one CSV chunk onto a table's columns and coerce its types.
+
+    Args:
+        chunk: pandas.DataFrame read from the CSV
+        table_name: Target table
+        table_columns: Output of get_table_columns()
+
+    Returns:
+        pandas.DataFrame: Columns in table order, values ready to bind
+    """
+    import pandas as pd
+
+    mapping = CSV_MAPPINGS.get(table_name, {"rename": {}, "derive": None})
+    chunk = chunk.rename(columns=mapping["rename"])
+    if mapping["derive"] is not None:
+        chunk = mapping["derive"](chunk)
+
+    columns = [column for column in table_columns if column in chunk]
+    out = pd.DataFrame(index=chunk.index)
+    for column in columns:
+        values = chunk[column]
+        col_type = table_columns[column]
+        if column in DATETIME_COLUMNS:
+            parsed = pd.to_datetime(values, errors="coerce", format="mixed")
+            values = parsed.dt.strftime("%Y-%m-%d %H:%M:%S")
+        elif "INT" in col_type:
+            values = pd.to_numeric(values, errors="coerce").round().astype("Int64")
+        elif "REAL" in col_type or "FLOA" in col_type or "DOUB" in col_type:
+            values = pd.to_numeric(values, errors="coerce")
+        else:
+            values = values.astype("string")
+        out[column] = values
+
+    return out.astype(object).where(out.notna(), None)
+
+
+def file_content_hash(path, block_size=1 << 20):
+    """
+    Hash a file's bytes without reading it into memory at once.
+
+    Args:
+        path: Path to the file
+        block_size: Bytes read per step
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _group_hash(columns, row_hashes):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\x1f".join(columns).encode("utf-8"))
+    for hashes in row_hashes:
+        digest.update(hashes.tobytes())
+    return digest.hexdigest()
+
+
+def _content_groups(raw_chunks):
+    # Regroup raw CSV chunks into content-defined groups of rows (see
+    # GROUP_ROWS). Rows are hashed without their index, so a group hashes
+    # the same wherever it sits in the file. Yields (rows, group hash).
+    import numpy as np
+    import pandas as pd
+
+    pieces, hashes, size = [], [], 0
+    for raw in raw_chunks:
+        row_hashes = pd.util.hash_pandas_object(raw, index=False).to_numpy()
+        boundaries = (np.flatnonzero(row_hashes % GROUP_ROWS == 0) + 1).tolist()
+        start = 0
+        # The end of the raw chunk is not a boundary: the group carries on
+        # into the next chunk
+        for end, is_boundary in [*((end, True) for end in boundaries), (len(raw), False)]:
+            while start < end:
+                cut = min(end, start + MAX_GROUP_ROWS - size)
+                pieces.append(raw.iloc[start:cut])
+                hashes.append(row_hashes[start:cut])
+                size += cut - start
+                start = cut
+                if (cut == end and is_boundary) or size == MAX_GROUP_ROWS:
+                    yield pd.concat(pieces), _group_hash(raw.columns, hashes)
+                    pieces, hashes, size = [], [], 0
+    if pieces:
+        yield pd.concat(pieces), _group_hash(pieces[0].columns, hashes)
+
+
+def _read_raw_chunks(csv_path, chunksize):
+    import pandas as pd
+
+    reader = pd.read_csv(csv_path, chunksize=chunksize, dtype=str,
+                         keep_default_na=False, na_values=[""])
+    with reader:
+        yield from reader
+
+
+def _coerce_records(raw, table_name, table_columns):
+    # Runs in a worker process: returns plain tuples, which pickle back
+    # to the writer cheaper than a DataFrame
+    start = time.perf_counter()
+    chunk = coerce_chunk(raw, table_name, table_columns)
+    records = list(chunk.itertuples(index=False, name=None))
+    return list(chunk.columns), records, time.perf_counter() - start
+
+
+def _run_inline(func, *args):
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def iter_csv_chunks(csv_path, table_name, chunksize=CHUNK_SIZE, db_path=DB_PATH):
+    """
+    Stream a CSV as coerced chunks without loading the whole file.
+
+    Args:
+        csv_path: Path to the CSV file
+        table_name: Target table
+        chunksize: Rows per chunk
+        db_path: Path to the database file
+
+    Yields:
+        pandas.DataFrame: Coerced chunk
+    """
+    table_columns = get_table_columns(table_name, db_path)
+    for chunk in _read_raw_chunks(csv_path, chunksize):
+        yield coerce_chunk(chunk, table_name, table_columns)
+
+
+def _plan_load(csv_path, table_name, chunksize, force, db_path):
+    # Check a source against the ingestion manifest. Returns its report
+    # and, unless the file is unchanged, the state needed to load it.
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+    report = {
+        "table": table_name,
+        "status": "unchanged",
+        "rows": 0,
+        "rows_written": 0,
+        "chunks": 0,
+        "chunks_skipped": 0,
+        "read_seconds": 0.0,
+        "parse_seconds": 0.0,
+        "write_seconds": 0.0,
+    }
+
+    source = str(csv_path.resolve())
+    stat = csv_path.stat()
+    entry = None if force else get_manifest_entry(source, db_path)
+    if entry and (entry["size_bytes"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+        return report, None
+
+    content_hash = file_content_hash(csv_path)
+    if entry and entry["content_hash"] == content_hash:
+        # Touched but not modified: refresh the recorded mtime only
+        record_ingestion(source, table_name, stat.st_size, stat.st_mtime_ns,
+                         content_hash, entry["chunk_size"], entry["chunk_hashes"],
+                         entry["row_count"], db_path)
+        return report, None
+
+    return report, {
+        "csv_path": csv_path,
+        "source": source,
+        "stat": stat,
+        "content_hash": content_hash,
+        # Manifests recorded with another grouping hash nothing comparable
+        "previous": set(entry["chunk_hashes"]) if entry and entry["chunk_size"] == GROUP_ROWS
+                    else set(),
+        "key": NATURAL_KEYS.get(table_name),
+        "table_columns": get_table_columns(table_name, db_path),
+        "chunk_hashes": [],
+        "report": report,
+    }
+
+
+def _apply_chunk(job, future, chunksize, db_path):
+    # Writer side of load_csvs: one transaction per chunk
+    table_name = job["report"]["table"]
+    columns, records, parse_seconds = future.result()
+    start = time.perf_counter()
+    if job["key"] in columns:
+        written = upsert_many(table_name, columns, job["key"], records,
+                              batch_size=chunksize, db_path=db_path)
+    else:
+        insert_many(table_name, columns, records, batch_size=chunksize, db_path=db_path)
+        written = len(records)
+    job["report"]["rows_written"] += written
+    job["report"]["parse_seconds"] += parse_seconds
+    job["report"]["write_seconds"] += time.perf_counter() - start
+
+
+def _finish(report, start):
+    report["seconds"] = time.perf_counter() - start
+    report["rows_per_sec"] = (report["rows"] / report["seconds"]
+                              if report["seconds"] else 0.0)
+    return report
+
+
+def load_csvs(sources, chunksize=CHUNK_SIZE, workers=INGEST_WORKERS, progress=None,
+              force=False, db_path=DB_PATH):
+    """
+    Load several CSVs as one pipeline: this process streams raw chunks
+    from each file, a pool of `workers` processes parses and coerces the
+    changed ones, and a single writer thread applies them in file order,
+    one transaction per chunk.
+
+    Loading is incremental: a file whose size and mtime (or content hash)
+    match the ingestion manifest is skipped, and for a changed file only
+    the groups of rows (see GROUP_ROWS) whose contents differ from the
+    last load are parsed and upserted on the table's natural key. Groups
+    are cut by content, not position, so inserting or deleting a row
+    does not disturb the rest of the file. Small loads are parsed inline
+    rather than paying for worker start-up.
+
+    Args:
+        sources: Iterable of (csv_path, table_name)
+        chunksize: Rows read from the CSV per step, and changed rows
+            written per transaction
+        workers: Parse processes; 1 parses inline
+        progress: Optional callback(table_name, rows_read, elapsed_seconds)
+            after each chunk is written
+        force: Ignore the manifest and re-process every chunk
+        db_path: Path to the database file
+
+    Returns:
+        list: One report dict per source, as returned by load_csv_to_table;
+            `seconds` runs from the start of the pipeline until that file
+            is fully written
+    """
+    import pandas as pd
+
+    start = time.perf_counter()
+    reports, jobs = [], []
+    for csv_path, table_name in sources:
+        report, job = _plan_load(csv_path, table_name, chunksize, force, db_path)
+        reports.append(report)
+        if job is None:
+            _finish(report, start)
+        else:
+            jobs.append(job)
+
+    changed_bytes = sum(job["stat"].st_size for job in jobs)
+    executor = None
+    if workers > 1 and changed_bytes >= PARALLEL_MIN_BYTES:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # spawn, not fork: this process already runs the writer thread
+        # and holds pooled SQLite connections
+        executor = ProcessPoolExecutor(max_workers=workers,
+                                       mp_context=multiprocessing.get_context("spawn"))
+    pending = queue.Queue(maxsize=WRITE_QUEUE_PER_WORKER * max(workers, 1))
+    errors = []
+
+    def write():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            if errors:
+                continue  # drain so the reader never blocks
+            job, future = item
+            report = job["report"]
+            try:
+                if future is None:
+                    # Every chunk of this file is written
+                    stat = job["stat"]
+                    record_ingestion(job["source"], report["table"], stat.st_size,
+                                     stat.st_mtime_ns, job["content_hash"], GROUP_ROWS,
+                                     job["chunk_hashes"], report["rows"], db_path)
+                    report["status"] = "loaded"
+                    _finish(report, start)
+                    continue
+                _apply_chunk(job, future, chunksize, db_path)
+                if progress is not None:
+                    progress(report["table"], report["rows"], time.perf_counter() - start)
+            except BaseException as e:
+                errors.append(e)
+
+    writer = threading.Thread(target=write, name="csv-writer")
+    writer.start()
+    try:
+        for job in jobs:
+            if errors:
+                break
+            report = job["report"]
+            previous = job["previous"]
+
+            def submit(rows):
+                args = (rows, report["table"], job["table_columns"])
+                if executor is None:
+                    future = _run_inline(_coerce_records, *args)
+                else:
+                    future = executor.submit(_coerce_records, *args)
+                pending.put((job, future))
+
+            # Changed groups are gathered into batches of about chunksize
+            # rows, one write transaction each
+            changed, changed_rows = [], 0
+            read_start = time.perf_counter()
+            groups = _content_groups(_read_raw_chunks(job["csv_path"], chunksize))
+            for rows, group_hash in groups:
+                if errors:
+                    break
+                job["chunk_hashes"].append(group_hash)
+                report["rows"] += len(rows)
+                report["chunks"] += 1
+                report["read_seconds"] += time.perf_counter() - read_start
+
+                if group_hash in previous:
+                    report["chunks_skipped"] += 1
+                else:
+                    changed.append(rows)
+                    changed_rows += len(rows)
+                    if changed_rows >= chunksize:
+                        submit(pd.concat(changed))
+                        changed, changed_rows = [], 0
+                read_start = time.perf_counter()
+            if changed and not errors:
+                submit(pd.concat(changed))
+            pending.put((job, None))
+    finally:
+        pending.put(None)
+        writer.join()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    if errors:
+        raise errors[0]
+    return reports
+
+
+def load_csv_to_table(csv_path, table_name, chunksize=CHUNK_SIZE, progress=None,
+                      force=False, db_path=DB_PATH):
+    """
+    Load a CSV into a table in chunks, one transaction per chunk.
+
+    Loading is incremental: a file whose size and mtime (or content hash)
+    match the ingestion manifest is skipped, and for a changed file only
+    the groups of rows (see GROUP_ROWS) whose contents differ from the
+    last load are parsed and upserted on the table's natural key. Groups
+    are cut by content, not position, so inserting or deleting a row
+    does not disturb the rest of the file.
+
+    Args:
+        csv_path: Path to the CSV file
+        table_name: Target table
+        chunksize: Rows read from the CSV per step, and changed rows
+            written per transaction
+        progress: Optional callback(rows_read, elapsed_seconds) after each chunk
+        force: Ignore the manifest and re-process every chunk
+        db_path: Path to the database file
+
+    Returns:
+        dict: table, status ('loaded' or 'unchanged'), rows, rows_written,
+            chunks and chunks_skipped (row groups seen and unchanged),
+            seconds, rows_per_sec, and the time spent reading, parsing
+            and writing (read_seconds, parse_seconds, write_seconds)
+    """
+    callback = None
+    if progress is not None:
+        def callback(_, rows, elapsed):
+            progress(rows, elapsed)
+
+    return load_csvs([(csv_path, table_name)], chunksize, progress=callback,
+                     force=force, db_path=db_path)[0]
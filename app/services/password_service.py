@@ -0,0 +1,222 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# bcrypt work factor for new hashes; each +1 doubles the cost of hashing
+# and verifying. Override with the BCRYPT_ROUNDS environment variable.
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+
+# bcrypt releases the GIL, so verifications on this many threads run in
+# parallel on separate cores while Streamlit script threads keep running
+VERIFY_WORKERS = min(4, os.cpu_count() or 1)
+
+# Hash/verify jobs allowed in flight (running or queued on the pool).
+# Further callers wait their turn instead of piling work onto the pool.
+MAX_PENDING = 32
+
+# Seconds a caller waits for a slot before giving up
+QUEUE_TIMEOUT = 30.0
+
+
+def _to_bytes(hashed_password):
+    if isinstance(hashed_password, bytes):
+        return hashed_password
+    # Hashes written with str(bytes) are stored as "b'$2b$...'"
+    if hashed_password.startswith(("b'", 'b"')) and hashed_password[-1:] in ("'", '"'):
+        hashed_password = hashed_password[2:-1]
+    return hashed_password.encode("utf-8")
+
+
+def get_rounds(hashed_password):
+    """
+    Read the work factor a bcrypt hash was created with.
+
+    Args:
+        hashed_password: Stored hash ("$2b$12$...")
+
+    Returns:
+        int: Cost factor, or None if the hash is not a bcrypt hash
+    """
+    parts = _to_bytes(hashed_password).split(b"$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordService:
+    """
+    bcrypt hashing and verification on a bounded worker pool.
+
+    Every hash/verify runs on one of `workers` threads. At most
+    `max_pending` jobs are in flight at once; callers beyond that block
+    (up to `queue_timeout` seconds) until a slot frees, so a burst of
+    logins queues instead of each page competing for the CPU.
+    """
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=VERIFY_WORKERS,
+                 max_pending=MAX_PENDING, queue_timeout=QUEUE_TIMEOUT):
+        """
+        Args:
+            rounds: bcrypt cost factor for new hashes
+            workers: Threads running bcrypt
+            max_pending: Jobs allowed running or queued at once
+            queue_timeout: Seconds to wait for a free slot
+        """
+        self.rounds = rounds
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _submit(self, func, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise TimeoutError("Too many password checks in progress, try again")
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash_password_async(self, plain_text_password, rounds=None):
+        """
+        Hash a password on the worker pool.
+
+        Args:
+            plain_text_password: Password to hash
+            rounds: Cost factor; defaults to the service policy
+
+        Returns:
+            concurrent.futures.Future: Resolves to the hash as str
+        """
+        import bcrypt
+
+        salt = bcrypt.gensalt(rounds or self.rounds)
+        password_bytes = plain_text_password.encode("utf-8")
+        return self._submit(
+            lambda: bcrypt.hashpw(password_bytes, salt).decode("utf-8")
+        )
+
+    def verify_password_async(self, plain_text_password, hashed_password):
+        """
+        Check a password against a stored hash on the worker pool.
+
+        Args:
+            plain_text_password: Password to check
+            hashed_password: Stored hash
+
+        Returns:
+            concurrent.futures.Future: Resolves to True if they match
+        """
+        import bcrypt
+
+        password_bytes = plain_text_password.encode("utf-8")
+        try:
+            hashed_bytes = _to_bytes(hashed_password)
+        except (AttributeError, UnicodeEncodeError):
+            hashed_bytes = b""
+
+        def check():
+            try:
+                return bcrypt.checkpw(password_bytes, hashed_bytes)
+            except ValueError:
+                # Not a bcrypt hash
+                return False
+
+        return self._submit(check)
+
+    def hash_password(self, plain_text_password, rounds=None):
+        """
+        Hash a password, waiting for the result.
+
+        Args:
+            plain_text_password: Password to hash
+            rounds: Cost factor; defaults to the service policy
+
+        Returns:
+            str: bcrypt hash
+        """
+        return self.hash_password_async(plain_text_password, rounds).result()
+
+    def verify_password(self, plain_text_password, hashed_password):
+        """
+        Check a password against a stored hash, waiting for the result.
+
+        Args:
+            plain_text_password: Password to check
+            hashed_password: Stored hash
+
+        Returns:
+            bool: True if the password matches
+        """
+        return self.verify_password_async(plain_text_password, hashed_password).result()
+
+    def needs_rehash(self, hashed_password):
+        """
+        Check whether a stored hash was made with a different cost factor
+        (or stored in a legacy format) than the current policy.
+
+        Args:
+            hashed_password: Stored hash
+
+        Returns:
+            bool: True if it should be replaced on next successful login
+        """
+        if isinstance(hashed_password, str) and hashed_password.startswith(("b'", 'b"')):
+            return True
+        return get_rounds(hashed_password) != self.rounds
+
+    def verify_and_upgrade(self, plain_text_password, hashed_password):
+        """
+        Verify a password and, if it matches but the stored hash does not
+        follow the current cost policy, produce a replacement hash.
+
+        Args:
+            plain_text_password: Password to check
+            hashed_password: Stored hash
+
+        Returns:
+            tuple: (matched, new hash to store or None)
+        """
+        if not self.verify_password(plain_text_password, hashed_password):
+            return False, None
+        if self.needs_rehash(hashed_password):
+            return True, self.hash_password(plain_text_password)
+        return True, None
+
+    def shutdown(self):
+        """
+        Stop the worker threads once queued jobs finish.
+        """
+        self._executor.shutdown(wait=True)
+
+
+password_service = PasswordService()
+
+
+def hash_password(plain_text_password):
+    """
+    Hash a password with the process-wide password service.
+
+    Args:
+        plain_text_password: Password to hash
+
+    Returns:
+        str: bcrypt hash
+    """
+    return password_service.hash_password(plain_text_password)
+
+
+def verify_password(plain_text_password, hashed_password):
+    """
+    Check a password with the process-wide password service.
+
+    Args:
+        plain_text_password: Password to check
+        hashed_password: Stored hash
+
+    Returns:
+        bool: True if the password matches
+    """
+    return password_service.verify_password(plain_text_password, hashed_password)
@@ -0,0 +1,300 @@
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from app.data.sessions import create_session, delete_session, get_session, purge_expired_sessions
+
+# How long a login stays valid
+SESSION_TTL = 8 * 60 * 60
+
+# How long a validated session is trusted from memory before the sessions
+# table is consulted again (so a logout in another process is seen)
+SESSION_CACHE_TTL = 60
+SESSION_CACHE_MAX_ENTRIES = 10_000
+
+# Background purge of expired sessions: one batch per short transaction
+PURGE_INTERVAL = 300
+PURGE_BATCH_SIZE = 1000
+
+# Signing key: the SESSION_SECRET environment variable, else a random key
+# generated once and kept next to the database
+SESSION_KEY_PATH = Path("DATA") / "session.key"
+
+# Length of generated signing keys; shorter key files are rejected
+SESSION_KEY_BYTES = 32
+
+# Reads of a key file that another process has created but not yet
+# written, 10 ms apart, before it is rejected as too short
+SESSION_KEY_READ_ATTEMPTS = 50
+
+
+class SessionCache:
+    """
+    LRU cache of validated sessions with TTL eviction.
+
+    An entry is dropped once the session itself expires or `ttl` seconds
+    after it was cached, whichever comes first.
+    """
+
+    def __init__(self, ttl=SESSION_CACHE_TTL, max_entries=SESSION_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            ttl: Seconds an entry is trusted without re-reading the database
+            max_entries: Maximum cached sessions
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id, now=None):
+        """
+        Args:
+            session_id: Session identifier
+            now: Current time (unix seconds)
+
+        Returns:
+            dict: username and role, or None on a miss
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            evict_at, user = entry
+            if evict_at <= now:
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return user
+
+    def put(self, session_id, user, expires_at, now=None):
+        """
+        Args:
+            session_id: Session identifier
+            user: dict with username and role
+            expires_at: Session expiry (unix seconds)
+            now: Current time (unix seconds)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._entries[session_id] = (min(expires_at, now + self.ttl), user)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, session_id):
+        """
+        Args:
+            session_id: Session identifier
+        """
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def prune(self, now=None):
+        """
+        Drop every entry past its eviction time.
+
+        Args:
+            now: Current time (unix seconds)
+
+        Returns:
+            int: Entries removed
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            stale = [key for key, (evict_at, _) in self._entries.items() if evict_at <= now]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+
+session_cache = SessionCache()
+
+_signing_key = None
+_signing_key_lock = threading.Lock()
+
+
+def _create_key_file():
+    # O_EXCL lets exactly one process create the file, and the mode makes
+    # it private from the start rather than after a chmod
+    key = secrets.token_bytes(SESSION_KEY_BYTES)
+    fd = os.open(SESSION_KEY_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def _read_key_file():
+    for _ in range(SESSION_KEY_READ_ATTEMPTS):
+        key = SESSION_KEY_PATH.read_bytes()
+        if len(key) >= SESSION_KEY_BYTES:
+            return key
+        time.sleep(0.01)
+    raise ValueError(f"{SESSION_KEY_PATH} holds a key shorter than {SESSION_KEY_BYTES} bytes;"
+                     " delete it to generate a new one")
+
+
+def _get_signing_key():
+    global _signing_key
+    with _signing_key_lock:
+        if _signing_key is None:
+            secret = os.environ.get("SESSION_SECRET")
+            if secret:
+                _signing_key = secret.encode("utf-8")
+            else:
+                SESSION_KEY_PATH.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    _signing_key = _create_key_file()
+                except FileExistsError:
+                    _signing_key = _read_key_file()
+        return _signing_key
+
+
+def _sign(session_id, expires_at):
+    message = f"{session_id}.{expires_at}".encode("utf-8")
+    return hmac.new(_get_signing_key(), message, hashlib.sha256).hexdigest()
+
+
+def _parse_token(token, now):
+    # Returns (session_id, expires_at) for a well-formed, unexpired token
+    # with a valid signature, otherwise None. No database access.
+    try:
+        session_id, expires, signature = token.split(".")
+        expires_at = int(expires)
+    except (AttributeError, ValueError):
+        return None
+    if expires_at <= now:
+        return None
+    if not hmac.compare_digest(signature, _sign(session_id, expires_at)):
+        return None
+    return session_id, expires_at
+
+
+def start_session(username, ttl=SESSION_TTL):
+    """
+    Create a session for a user who has just logged in.
+
+    Args:
+        username: Logged-in user
+        ttl: Seconds until the session expires
+
+    Returns:
+        str: Signed session token, or None if the user does not exist
+    """
+    session_id = secrets.token_urlsafe(18)
+    expires_at = int(time.time() + ttl)
+    role = create_session(session_id, username, expires_at)
+    if role is None:
+        return None
+    session_cache.put(session_id, {"username": username, "role": role}, expires_at)
+    return f"{session_id}.{expires_at}.{_sign(session_id, expires_at)}"
+
+
+def resolve_session(token):
+    """
+    Get the user behind a session token. Forged, malformed or expired
+    tokens are rejected without touching the database; a validated
+    session is then served from session_cache.
+
+    Args:
+        token: Token returned by start_session
+
+    Returns:
+        dict: username and role, or None if the token is not valid
+    """
+    now = time.time()
+    parsed = _parse_token(token, now)
+    if parsed is None:
+        return None
+    session_id, expires_at = parsed
+
+    user = session_cache.get(session_id, now)
+    if user is not None:
+        return user
+
+    row = get_session(session_id)
+    if row is None:
+        return None
+    username, role, stored_expires_at = row
+    if stored_expires_at <= now:
+        return None
+    user = {"username": username, "role": role}
+    session_cache.put(session_id, user, min(expires_at, stored_expires_at), now)
+    return user
+
+
+def end_session(token):
+    """
+    Log out: delete the session so its token stops resolving.
+
+    Args:
+        token: Token returned by start_session
+
+    Returns:
+        bool: True if a session was deleted
+    """
+    parsed = _parse_token(token, time.time())
+    if parsed is None:
+        return False
+    session_id, _ = parsed
+    session_cache.discard(session_id)
+    return delete_session(session_id) > 0
+
+
+def purge_sessions(now=None, batch_size=PURGE_BATCH_SIZE):
+    """
+    Delete all expired sessions, one batch per transaction so the writer
+    lock is only held briefly.
+
+    Args:
+        now: Current time (unix seconds)
+        batch_size: Rows deleted per transaction
+
+    Returns:
+        int: Total sessions deleted
+    """
+    now = time.time() if now is None else now
+    session_cache.prune(now)
+    total = 0
+    while True:
+        deleted = purge_expired_sessions(now, batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+_purger = None
+_purger_lock = threading.Lock()
+
+
+def start_session_purger(interval=PURGE_INTERVAL):
+    """
+    Start (once per process) a daemon thread that purges expired
+    sessions every `interval` seconds.
+
+    Args:
+        interval: Seconds between purges
+
+    Returns:
+        threading.Thread: The purger thread
+    """
+    global _purger
+    with _purger_lock:
+        if _purger is None or not _purger.is_alive():
+            def run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        purge_sessions()
+                    except Exception as e:
+                        print(f"Session purge failed: {e}")
+
+            _purger = threading.Thread(target=run, name="session-purger", daemon=True)
+            _purger.start()
+        return _purger
@@ -0,0 +1,311 @@
+import threading
+
+from app.data.cache import cached_query
+from app.data.snapshots import read_snapshot_since
+from app.data.tickets import RESOLVED_STATUSES, get_ticket_changes
+
+# Resolution-time target per priority, in hours. A resolved ticket whose
+# resolution_time_hours exceeds its target counts as an SLA breach.
+SLA_TARGET_HOURS = {
+    "Critical": 24,
+    "High": 36,
+    "Medium": 48,
+    "Low": 72,
+}
+
+# Resolution-time percentiles reported per priority
+SLA_PERCENTILES = (0.5, 0.9, 0.99)
+
+# it_tickets columns the tracker holds
+SLA_COLUMNS = ["id", "priority", "status", "assigned_to", "resolution_time_hours"]
+
+
+class _Vocabulary:
+    # Maps labels to small integer codes; code 0 is reserved for NULL
+    def __init__(self):
+        self.labels = [None]
+        self.codes = {}
+
+    def encode(self, values):
+        import numpy as np
+        import pandas as pd
+
+        if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+            # Encode each category once rather than every row; NULL's
+            # category code -1 picks the trailing 0
+            lookup = np.append(self.encode(values.cat.categories), 0).astype(np.int32)
+            return lookup[values.cat.codes.to_numpy()]
+
+        values = pd.Series(values, dtype=object)
+        for label in values.dropna().unique():
+            if label not in self.codes:
+                self.codes[label] = len(self.labels)
+                self.labels.append(label)
+        codes = pd.Categorical(values, categories=self.labels[1:]).codes
+        return codes.astype(np.int32) + 1
+
+
+class SlaTracker:
+    """
+    Column store of the ticket fields the SLA report needs, held as NumPy
+    arrays indexed by row position.
+
+    The first refresh() starts from the it_tickets columnar snapshot when
+    there is one, even a stale one, and reads every ticket otherwise;
+    every refresh then reads only the rows in it_ticket_changes with a
+    newer sequence number and patches those positions in place, so
+    keeping the report current costs O(changed tickets) database work
+    and no row loops.
+    """
+
+    def __init__(self):
+        # Column arrays are allocated by the first refresh(), so creating
+        # the tracker does not import NumPy
+        self._ids = None
+        self._live = None
+        self._priority = None
+        self._assignee = None
+        self._resolved = None
+        self._hours = None
+        self._priorities = _Vocabulary()
+        self._assignees = _Vocabulary()
+        self._seq = 0
+        self._report = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Apply ticket changes made since the last refresh.
+
+        Returns:
+            int: Number of changed tickets read (inserted, updated or deleted)
+        """
+        with self._lock:
+            if self._ids is None:
+                self._build()
+            changes, latest = get_ticket_changes(self._seq)
+            if changes.empty:
+                return 0
+            self._apply(changes.sort_values("id"))
+            self._seq = latest
+            self._report = None
+            return len(changes)
+
+    def _build(self):
+        import numpy as np
+
+        self._ids = np.empty(0, dtype=np.int64)
+        self._live = np.empty(0, dtype=bool)
+        self._priority = np.empty(0, dtype=np.int32)
+        self._assignee = np.empty(0, dtype=np.int32)
+        self._resolved = np.empty(0, dtype=bool)
+        self._hours = np.empty(0, dtype=np.float64)
+
+        # it_ticket_changes logs inserts as well as updates and deletes,
+        # so the changes after the snapshot's seq bring it up to date
+        loaded = read_snapshot_since("it_tickets", SLA_COLUMNS)
+        if loaded is not None:
+            tickets, seq = loaded
+            tickets["exists"] = True
+            # Snapshots are newest first; reversing is cheaper than sorting
+            if tickets["id"].is_monotonic_decreasing:
+                tickets = tickets.iloc[::-1]
+            else:
+                tickets = tickets.sort_values("id")
+            self._apply(tickets)
+            self._seq = seq
+
+    def _apply(self, changes):
+        import numpy as np
+        import pandas as pd
+
+        ids = changes["id"].to_numpy(dtype=np.int64)
+        live = changes["exists"].to_numpy(dtype=bool)
+        priority = self._priorities.encode(changes["priority"])
+        assignee = self._assignees.encode(changes["assigned_to"])
+        resolved = changes["status"].isin(RESOLVED_STATUSES).to_numpy()
+        hours = pd.to_numeric(changes["resolution_time_hours"], errors="coerce").to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+
+        # Known rows are updated in place
+        positions = np.searchsorted(self._ids, ids)
+        known = positions < len(self._ids)
+        known[known] = self._ids[positions[known]] == ids[known]
+        at = positions[known]
+        self._live[at] = live[known]
+        self._priority[at] = priority[known]
+        self._assignee[at] = assignee[known]
+        self._resolved[at] = resolved[known]
+        self._hours[at] = hours[known]
+
+        # Ids are AUTOINCREMENT, so unseen rows sort after every known one
+        new = ~known & live
+        self._ids = np.concatenate([self._ids, ids[new]])
+        self._live = np.concatenate([self._live, live[new]])
+        self._priority = np.concatenate([self._priority, priority[new]])
+        self._assignee = np.concatenate([self._assignee, assignee[new]])
+        self._resolved = np.concatenate([self._resolved, resolved[new]])
+        self._hours = np.concatenate([self._hours, hours[new]])
+
+    def report(self):
+        """
+        Refresh, then compute (or reuse) the SLA report.
+
+        Returns:
+            dict: Output of compute_sla_report()
+        """
+        self.refresh()
+        with self._lock:
+            if self._report is None:
+                columns = (self._priority, self._assignee, self._resolved, self._hours)
+                if not self._live.all():
+                    columns = tuple(column[self._live] for column in columns)
+                priority, assignee, resolved, hours = columns
+                self._report = compute_sla_report(
+                    priority, self._priorities.labels,
+                    assignee, self._assignees.labels,
+                    resolved, hours,
+                )
+            return self._report
+
+
+def _group_frame(codes, labels, resolved, breached):
+    import numpy as np
+    import pandas as pd
+
+    # One pass: per group, count open, resolved in time and breached
+    # (breached tickets are always resolved)
+    counts = np.bincount(codes * 3 + resolved + breached,
+                         minlength=3 * len(labels)).reshape(-1, 3)
+    frame = pd.DataFrame({
+        "tickets": counts.sum(axis=1),
+        "resolved": counts[:, 1] + counts[:, 2],
+        "breached": counts[:, 2],
+    }, index=pd.Index(labels, dtype=object))
+    frame["breach_rate"] = frame["breached"] / frame["resolved"].where(frame["resolved"] > 0)
+    return frame
+
+
+def _group_quantiles(codes, values, counts, percentiles):
+    import numpy as np
+
+    # One stable sort on the (small) group codes lays each group out
+    # contiguously; np.quantile then partitions each slice in O(n)
+    narrow = np.int16 if counts < 2 ** 15 else np.int32
+    order = np.argsort(codes.astype(narrow), kind="stable")
+    values = values[order]
+    ends = np.cumsum(np.bincount(codes, minlength=counts))
+    out = np.full((counts, len(percentiles)), np.nan)
+    start = 0
+    for code, end in enumerate(ends):
+        if end > start:
+            out[code] = np.quantile(values[start:end], percentiles)
+        start = end
+    return out
+
+
+def compute_sla_report(priority, priority_labels, assignee, assignee_labels,
+                       resolved, hours, targets=SLA_TARGET_HOURS,
+                       percentiles=SLA_PERCENTILES):
+    """
+    Compute SLA metrics over encoded ticket columns.
+
+    Args:
+        priority: Array of priority codes (indexes into priority_labels)
+        priority_labels: Priority label per code
+        assignee: Array of assignee codes (indexes into assignee_labels)
+        assignee_labels: Assignee label per code
+        resolved: Boolean array, True for resolved or closed tickets
+        hours: Array of resolution_time_hours (NaN when unknown)
+        targets: priority -> target resolution hours
+        percentiles: Resolution-time quantiles to report
+
+    Returns:
+        dict: 'summary' (overall counts, percentiles and breach rate),
+            'priority' (per-priority DataFrame) and 'assignee'
+            (per-assignee throughput DataFrame)
+    """
+    import numpy as np
+
+    resolved = resolved & ~np.isnan(hours)
+    target_by_code = np.array([targets.get(label, np.nan) for label in priority_labels],
+                              dtype=np.float64)
+    breached = resolved & (hours > target_by_code[priority])
+    labels = [f"p{round(q * 100)}_hours" for q in percentiles]
+    resolved_hours = hours[resolved]
+
+    by_priority = _group_frame(priority, priority_labels, resolved, breached)
+    quantiles = _group_quantiles(priority[resolved], resolved_hours,
+                                 len(priority_labels), percentiles)
+    for column, label in enumerate(labels):
+        by_priority[label] = quantiles[:, column]
+    by_priority["target_hours"] = target_by_code
+    by_priority = by_priority[by_priority["tickets"] > 0]
+
+    by_assignee = _group_frame(assignee, assignee_labels, resolved, breached)
+    by_assignee["median_hours"] = _group_quantiles(assignee[resolved], resolved_hours,
+                                                   len(assignee_labels), [0.5])[:, 0]
+    by_assignee["open"] = by_assignee["tickets"] - by_assignee["resolved"]
+    by_assignee = by_assignee[by_assignee["tickets"] > 0].sort_values("resolved", ascending=False)
+
+    total_resolved = int(resolved.sum())
+    summary = {
+        "tickets": len(priority),
+        "resolved": total_resolved,
+        "breached": int(breached.sum()),
+        "breach_rate": float(breached.sum() / total_resolved) if total_resolved else None,
+    }
+    values = np.quantile(resolved_hours, percentiles) if total_resolved else [None] * len(labels)
+    for label, value in zip(labels, values):
+        summary[label] = None if value is None else float(value)
+
+    return {
+        "summary": summary,
+        "priority": by_priority.rename_axis("priority").reset_index(),
+        "assignee": by_assignee.rename_axis("assigned_to").reset_index(),
+    }
+
+
+sla_tracker = SlaTracker()
+
+
+@cached_query("it_tickets")
+def get_sla_report():
+    """
+    Get the current ticket SLA report. Cached until it_tickets is next
+    written; recomputation reads only the tickets changed since the last
+    report.
+
+    Returns:
+        dict: Output of compute_sla_report()
+    """
+    return sla_tracker.report()
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def start_sla_tracker():
+    """
+    Build the SLA report in a daemon thread (once per process), so the
+    first render of the SLA view finds it ready instead of loading every
+    ticket itself.
+
+    Returns:
+        threading.Thread: The thread building the report
+    """
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            def run():
+                try:
+                    get_sla_report()
+                except Exception as e:
+                    # e.g. tables not created yet; the SLA view builds it later
+                    print(f"SLA report build failed: {e}")
+
+            _warmer = threading.Thread(target=run, name="sla-tracker", daemon=True)
+            _warmer.start()
+        return _warmer
@@ -1,10 +1,8 @@
-import bcrypt
+import sqlite3
 from pathlib import Path
-from app.data.db import connect_database
-from app.data.users import get_user_by_username, insert_user 
-
-# The complete implementations for register_user and login_user were provided in the lab.
-# The migration function is implemented here.
+from app.data.db import connect_database, get_connection, read_connection
+from app.data.users import get_user_by_username, insert_user, update_user_password_hash
+from app.services.password_service import password_service
 
 DATA_DIR = Path("DATA") # Re-define/import DATA_DIR for file access
 
@@ -47,3 +45,58 @@ def migrate_users_from_file(conn, filepath=DATA_DIR / "users.txt"):
     conn.commit()
     print(f"Migrated {migrated_count} users from {filepath.name}")
     return migrated_count
+
+
+def register_user(username, password, role='user'):
+    """
+    Register a new user in the database.
+
+    Args:
+        username: Unique username
+        password: Plain-text password; only its bcrypt hash is stored
+        role: User role
+
+    Returns:
+        tuple: (success, message)
+    """
+    if not username or not password:
+        return False, "Username and password are required."
+
+    with read_connection() as conn:
+        if get_user_by_username(conn, username) is not None:
+            return False, f"Username '{username}' already exists."
+
+    # Hashed on the password service's worker pool
+    password_hash = password_service.hash_password(password)
+    try:
+        with get_connection() as conn:
+            insert_user(conn, username, password_hash, role)
+    except sqlite3.IntegrityError:
+        return False, f"Username '{username}' already exists."
+    return True, f"User '{username}' registered successfully."
+
+
+def login_user(username, password):
+    """
+    Check a user's credentials. A stored hash whose bcrypt cost differs
+    from the current policy is replaced after a successful login.
+
+    Args:
+        username: Username
+        password: Plain-text password
+
+    Returns:
+        tuple: (success, message)
+    """
+    with read_connection() as conn:
+        user = get_user_by_username(conn, username)
+    if user is None:
+        return False, "Username not found."
+
+    matched, new_hash = password_service.verify_and_upgrade(password, user.password_hash)
+    if not matched:
+        return False, "Invalid password."
+    if new_hash is not None:
+        with get_connection() as conn:
+            update_user_password_hash(conn, username, new_hash)
+    return True, f"Welcome back, {username}!"
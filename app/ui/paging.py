@@ -0,0 +1,28 @@
+import streamlit as st
+from app.data.db import PAGE_SIZE
+
+
+def paged_dataframe(key, fetch_page, page_size=PAGE_SIZE):
+    """
+    Show a keyset-paginated table with Newer/Older buttons.
+    Only the current page is fetched on each rerun.
+
+    Args:
+        key: Unique widget key for this table
+        fetch_page: One of the get_*_page functions from app.data
+        page_size: Rows per page
+    """
+    # Stack of before_id cursors; the last one is the page being shown
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+
+    df, next_cursor = fetch_page(before_id=cursors[-1], page_size=page_size)
+    st.dataframe(df)
+
+    newer, page, older = st.columns([1, 2, 1])
+    if newer.button("Newer", key=f"{key}_newer", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    page.caption(f"Page {len(cursors)}")
+    if older.button("Older", key=f"{key}_older", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
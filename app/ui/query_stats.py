@@ -0,0 +1,83 @@
+import streamlit as st
+from datetime import datetime
+
+from app.data.tracing import LATENCY_BUCKETS_MS, query_tracer, trace_report
+
+# Rows shown in the top-offender tables
+TOP_LIMIT = 10
+
+SUMMARY_COLUMNS = ["name", "calls", "total_ms", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+
+# st.session_state keys of the tracing controls
+TRACE_ENABLED_KEY = "query_trace_enabled"
+SLOW_MS_KEY = "query_trace_slow_ms"
+
+
+def _apply_tracing():
+    if st.session_state[TRACE_ENABLED_KEY]:
+        query_tracer.enable(st.session_state[SLOW_MS_KEY])
+    else:
+        query_tracer.disable()
+
+
+def _apply_threshold():
+    query_tracer.slow_ms = st.session_state[SLOW_MS_KEY]
+
+
+def query_stats_panel(limit=TOP_LIMIT):
+    """
+    Show tracing controls, the slowest data-layer functions and SQL
+    statements, and the slow-query log. Tracing is process-wide, so this
+    covers every session using the app.
+
+    Args:
+        limit: Rows in each top-offender table
+    """
+    import pandas as pd
+
+    st.subheader("Query performance")
+    # The tracer is shared by every session, so the controls start from
+    # its current state rather than from this session's last choice
+    st.session_state[TRACE_ENABLED_KEY] = query_tracer.enabled
+    st.session_state[SLOW_MS_KEY] = float(query_tracer.slow_ms)
+    enabled_col, threshold_col, reset_col = st.columns([1, 1, 1])
+    enabled_col.toggle("Trace queries", key=TRACE_ENABLED_KEY, on_change=_apply_tracing)
+    threshold_col.number_input("Slow query threshold (ms)", min_value=1.0, step=10.0,
+                               key=SLOW_MS_KEY, on_change=_apply_threshold)
+    if reset_col.button("Reset statistics"):
+        query_tracer.reset()
+
+    order_by = st.radio("Rank by", ["total_ms", "p95_ms", "max_ms", "calls"], horizontal=True)
+    report = trace_report(limit, order_by)
+    if not report["functions"] and not report["statements"]:
+        st.info("Nothing traced yet. Turn on tracing and use the dashboards.")
+        return
+    st.caption(f"Since {datetime.fromtimestamp(report['since']):%Y-%m-%d %H:%M:%S}")
+
+    st.markdown("**Data-layer functions**")
+    if report["functions"]:
+        functions = pd.DataFrame(report["functions"])
+        st.dataframe(functions[SUMMARY_COLUMNS + ["rows"]], hide_index=True)
+
+        name = st.selectbox("Latency histogram for", functions["name"])
+        buckets = functions.loc[functions["name"] == name, "buckets"].iloc[0]
+        labels = [f"≤{bound:g} ms" for bound in LATENCY_BUCKETS_MS]
+        labels.append(f">{LATENCY_BUCKETS_MS[-1]:g} ms")
+        st.bar_chart(pd.DataFrame({"bucket": labels, "calls": buckets}), x="bucket", y="calls")
+    else:
+        st.caption("None recorded.")
+
+    st.markdown("**SQL statements**")
+    if report["statements"]:
+        statements = pd.DataFrame(report["statements"])
+        st.dataframe(statements[SUMMARY_COLUMNS + ["steps"]], hide_index=True)
+    else:
+        st.caption("None recorded.")
+
+    st.markdown(f"**Slow queries (≥ {report['slow_ms']:g} ms)**")
+    if report["slow"]:
+        slow = pd.DataFrame(report["slow"])
+        slow["at"] = pd.to_datetime(slow["at"], unit="s")
+        st.dataframe(slow[["at", "ms", "function", "sql", "thread", "steps"]], hide_index=True)
+    else:
+        st.caption("None recorded.")
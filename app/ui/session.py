@@ -0,0 +1,63 @@
+import streamlit as st
+from app.services.session_service import (
+    end_session, resolve_session, start_session, start_session_purger,
+)
+
+# st.session_state key holding the signed session token
+SESSION_STATE_KEY = "session_token"
+
+
+def sign_in(username):
+    """
+    Start a session for a user who has just logged in and remember its
+    token for the rest of this browser session.
+
+    Args:
+        username: Logged-in user
+
+    Returns:
+        bool: True if the session was created
+    """
+    token = start_session(username)
+    if token is None:
+        return False
+    st.session_state[SESSION_STATE_KEY] = token
+    return True
+
+
+def current_user():
+    """
+    Resolve the logged-in user from the session token. Costs an HMAC
+    check and a cache lookup on every rerun; no bcrypt or pandas.
+
+    Returns:
+        dict: username and role, or None if nobody is logged in
+    """
+    start_session_purger()
+    token = st.session_state.get(SESSION_STATE_KEY)
+    if token is None:
+        return None
+    user = resolve_session(token)
+    if user is None:
+        # Expired or revoked
+        del st.session_state[SESSION_STATE_KEY]
+    return user
+
+
+def show_current_user():
+    """
+    Show who is logged in, with a logout button, in the sidebar.
+
+    Returns:
+        dict: username and role, or None if nobody is logged in
+    """
+    user = current_user()
+    with st.sidebar:
+        if user is None:
+            st.caption("Not signed in")
+            return None
+        st.caption(f"Signed in as {user['username']} ({user['role']})")
+        if st.button("Log out", key="logout"):
+            end_session(st.session_state.pop(SESSION_STATE_KEY))
+            st.rerun()
+    return user
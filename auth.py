@@ -1,39 +1,117 @@
-import bcrypt
 import os
+import shutil
+import threading
+
+from app.services.password_service import password_service
+
+USERS_FILE = "users.txt"
+
+# username -> password hash, plus the (mtime, size) of users.txt it was
+# built from; rebuilt only when the file changes on disk
+_user_index = {"path": None, "stamp": None, "users": {}}
+_user_index_lock = threading.RLock()
 
 def hash_password(plain_text_password):
-    password_bytes = plain_text_password.encode("utf-8")
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password_bytes, salt)
-    return hashed_password.decode("utf-8")  # store as string
+    # Cost factor comes from the password service policy (BCRYPT_ROUNDS)
+    return password_service.hash_password(plain_text_password)  # store as string
 
 def verify_password(plain_text_password, hashed_password):
-    password_bytes = plain_text_password.encode("utf-8")
-    hashed_password_bytes = hashed_password.encode("utf-8")
-    return bcrypt.checkpw(password_bytes, hashed_password_bytes)
+    return password_service.verify_password(plain_text_password, hashed_password)
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def load_user_index(path=USERS_FILE):
+    """Return the username -> hash index for path, re-reading the file only if its mtime or size changed."""
+    stamp = _file_stamp(path)
+    with _user_index_lock:
+        if _user_index["path"] != path or _user_index["stamp"] != stamp:
+            users = {}
+            with open(path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or ":" not in line:
+                        continue
+                    user, hash1 = line.split(":", 1)
+                    # The first registration of a name wins, as before
+                    users.setdefault(user, hash1)
+            _user_index.update(path=path, stamp=stamp, users=users)
+        return _user_index["users"]
+
+def get_password_hash(username, path=USERS_FILE):
+    """Look up a user's stored hash in O(1); None if the user or file does not exist."""
+    if not os.path.exists(path):
+        return None
+    return load_user_index(path).get(username)
+
+def register_user(username, password, path=USERS_FILE):
+    # Refuse known names before spending a bcrypt hash on them
+    if get_password_hash(username, path) is not None:
+        print(f"{username} is already registered.")
+        return False
 
-def register_user(username, password):
     hashed_password = hash_password(password)
-    with open("users.txt", "a") as f:
-        f.write(f"{username}:{hashed_password}\n")
+
+    # Check again and append under the lock so two registrations of the
+    # same name cannot both succeed
+    with _user_index_lock:
+        if get_password_hash(username, path) is not None:
+            print(f"{username} is already registered.")
+            return False
+
+        before = _file_stamp(path) if os.path.exists(path) else None
+        with open(path, "a") as f:
+            f.write(f"{username}:{hashed_password}\n")
+
+        # If the index was current, add the new user to it in place
+        # instead of re-reading the whole file on the next lookup
+        if _user_index["path"] == path and _user_index["stamp"] == before:
+            _user_index["users"][username] = hashed_password
+            _user_index["stamp"] = _file_stamp(path)
+
     print(f"{username} registered successfully!")
+    return True
 
-def login_user(username, password):
-    if not os.path.exists("users.txt"):
+def _replace_password_hash(username, old_hash, new_hash, path=USERS_FILE):
+    """Swap the user's stored hash in path, unless it changed since old_hash was read."""
+    with _user_index_lock:
+        if get_password_hash(username, path) != old_hash:
+            return False
+        with open(path, "r") as f:
+            lines = f.readlines()
+        for number, line in enumerate(lines):
+            if line.strip() == f"{username}:{old_hash}":
+                lines[number] = f"{username}:{new_hash}\n"
+                break
+
+        # Write a copy and swap it in so readers never see half a file
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w") as f:
+            f.writelines(lines)
+        shutil.copymode(path, temp)
+        os.replace(temp, path)
+        _user_index["users"][username] = new_hash
+        _user_index["stamp"] = _file_stamp(path)
+        return True
+
+def login_user(username, password, path=USERS_FILE):
+    if not os.path.exists(path):
         print("No users registered yet.")
         return False
 
-    with open("users.txt", "r") as f:
-        for line in f:
-            user, hash1 = line.strip().split(":", 1)
-            if user == username:
-                if verify_password(password, hash1):
-                    print("Login successful!")
-                    return True
-                else:
-                    print("Invalid password.")
-                    return False
-    print("Username not found.")
+    hash1 = get_password_hash(username, path)
+    if hash1 is None:
+        print("Username not found.")
+        return False
+    matched, new_hash = password_service.verify_and_upgrade(password, hash1)
+    if matched:
+        # Re-hash at the current cost policy (BCRYPT_ROUNDS)
+        if new_hash is not None:
+            _replace_password_hash(username, hash1, new_hash, path)
+        print("Login successful!")
+        return True
+    print("Invalid password.")
     return False
 
 def main():
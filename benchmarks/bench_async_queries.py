@@ -0,0 +1,138 @@
+"""
+Incidents dashboard load: its independent queries run one after another
+vs concurrently through app.data.async_queries, with the query cache
+cleared before every load. Also times how quickly a runaway query is
+interrupted by a timeout and its worker freed.
+
+SQLite releases the GIL while a statement runs, so the concurrent load
+approaches the slowest single query when there are spare cores; on a
+single core the queries can only interleave.
+
+Run from the project root:
+    python -m benchmarks.bench_async_queries --rows 500000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+SEVERITIES = ("Low", "Medium", "High", "Critical")
+CATEGORIES = ("Malware", "Phishing", "DDoS", "Insider", "Misconfiguration")
+STATUSES = ("Open", "Investigating", "Resolved", "Closed")
+
+
+def seed(rows):
+    from app.data.db import connect_database, transaction
+    from app.data.schema import create_all_tables
+
+    conn = connect_database()
+    create_all_tables(conn)
+    conn.close()
+
+    rng = random.Random(0)
+    with transaction() as conn:
+        conn.executemany(
+            """
+            INSERT INTO cyber_incidents (incident_id, timestamp, severity, category,
+                                         status, reported_by)
+            VALUES (?, datetime('2024-01-01', ? || ' minutes'), ?, ?, ?, ?)
+            """,
+            ((str(i), rng.randrange(525_600), rng.choice(SEVERITIES),
+              rng.choice(CATEGORIES), rng.choice(STATUSES), f"analyst{rng.randrange(50)}")
+             for i in range(rows))
+        )
+
+
+def page_queries():
+    # The reads the incidents dashboard makes on a default render
+    from app.data import incidents
+
+    return {
+        "severity counts": (incidents.get_severity_count,),
+        "type counts": (incidents.get_incidents_by_type_count,),
+        "filter options": (incidents.get_incident_filter_options,),
+        "daily trend": (incidents.get_incident_trend, "day", "severity"),
+        "filtered list": (incidents.filter_incidents,),
+    }
+
+
+def timed(func):
+    from app.data.cache import query_cache
+
+    query_cache.clear()
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def runaway_query():
+    from app.data.db import read_connection
+
+    with read_connection() as conn:
+        return conn.execute(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n)"
+            " SELECT count(*) FROM n"
+        ).fetchone()
+
+
+async def time_interrupt(timeout):
+    from app.data.async_queries import query_executor
+    from app.data.incidents import get_severity_count
+
+    start = time.perf_counter()
+    try:
+        await query_executor.run(runaway_query, timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+    raised = time.perf_counter() - start
+    # Completes only once a worker is free again
+    await query_executor.run(get_severity_count)
+    return raised * 1000, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from app.data.async_queries import fetch_all, query_executor
+
+        seed(args.rows)
+        calls = page_queries()
+
+        print(f"{os.cpu_count()} CPUs, {args.rows:,} incidents, "
+              f"median of {args.repeats} cold-cache loads\n")
+        solo = {}
+        for name, (func, *call_args) in calls.items():
+            solo[name] = statistics.median(
+                timed(lambda: func(*call_args)) for _ in range(args.repeats)
+            )
+            print(f"  {name:20} {solo[name]:8.1f} ms")
+
+        def sequential():
+            for func, *call_args in calls.values():
+                func(*call_args)
+
+        sequential_ms = statistics.median(timed(sequential) for _ in range(args.repeats))
+        concurrent_ms = statistics.median(
+            timed(lambda: fetch_all(calls)) for _ in range(args.repeats)
+        )
+        print(f"\n  {'sum of queries':20} {sum(solo.values()):8.1f} ms")
+        print(f"  {'slowest query':20} {max(solo.values()):8.1f} ms")
+        print(f"  {'sequential load':20} {sequential_ms:8.1f} ms")
+        print(f"  {'concurrent load':20} {concurrent_ms:8.1f} ms")
+
+        raised_ms, freed_ms = asyncio.run(time_interrupt(0.2))
+        print(f"\n  runaway query, 200 ms timeout: TimeoutError after {raised_ms:.1f} ms, "
+              f"worker serving again after {freed_ms:.1f} ms")
+        query_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
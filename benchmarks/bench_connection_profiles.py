@@ -0,0 +1,109 @@
+"""
+Mixed read/write throughput: stock SQLite connections vs the tuned
+writer/reader profiles in app.data.db.
+
+Run from the project root:
+    python -m benchmarks.bench_connection_profiles
+"""
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from app.data.db import ConnectionPool, connect_database
+from app.data.schema import create_cyber_incidents_table
+
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+
+
+def seed_database(db_path, profile, rows):
+    conn = connect_database(db_path, profile)
+    create_cyber_incidents_table(conn)
+    conn.executemany(
+        """
+        INSERT INTO cyber_incidents (incident_id, timestamp, severity, category, status)
+        VALUES (?, '2024-01-01 00:00:00', ?, 'Malware', 'Open')
+        """,
+        ((str(i), SEVERITIES[i % 4]) for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_mixed_load(db_path, writer_profile, reader_profile, readers, seconds):
+    writer_pool = ConnectionPool(db_path, writer_profile, max_size=1)
+    reader_pool = ConnectionPool(db_path, reader_profile, max_size=readers)
+    counts = {"reads": 0, "writes": 0, "busy": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def writer():
+        n = 0
+        while time.perf_counter() < deadline:
+            try:
+                with writer_pool.transaction() as conn:
+                    conn.execute(
+                        """
+                        INSERT INTO cyber_incidents (incident_id, timestamp, severity, category, status)
+                        VALUES (?, '2024-01-02 00:00:00', 'High', 'Phishing', 'Open')
+                        """,
+                        (f"w{n}",)
+                    )
+                n += 1
+            except Exception:
+                with lock:
+                    counts["busy"] += 1
+        with lock:
+            counts["writes"] += n
+
+    def reader():
+        n = 0
+        while time.perf_counter() < deadline:
+            try:
+                with reader_pool.connection() as conn:
+                    conn.execute(
+                        "SELECT severity, COUNT(*) FROM cyber_incidents GROUP BY severity"
+                    ).fetchall()
+                n += 1
+            except Exception:
+                with lock:
+                    counts["busy"] += 1
+        with lock:
+            counts["reads"] += n
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    writer_pool.close_all()
+    reader_pool.close_all()
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    scenarios = [
+        ("before (default/default)", "default", "default"),
+        ("after  (writer/reader)", "writer", "reader"),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, writer_profile, reader_profile in scenarios:
+            db_path = Path(tmp) / f"{writer_profile}.db"
+            seed_database(db_path, writer_profile, args.rows)
+            result = run_mixed_load(db_path, writer_profile, reader_profile,
+                                    args.readers, args.seconds)
+            print(f"{label}: {result['reads']:.0f} reads/s, "
+                  f"{result['writes']:.0f} writes/s, {result['busy']:.0f} errors/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Login user lookup cost (bcrypt excluded) as users.txt grows: the old
+linear scan of the file vs the cached username index in auth.py.
+
+Run from the project root:
+    python -m benchmarks.bench_login_lookup
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import auth
+
+# A syntactically valid bcrypt hash; lookups never verify it
+FAKE_HASH = "$2b$12$" + "a" * 53
+
+
+def write_users(path, count):
+    with open(path, "w") as f:
+        for i in range(count):
+            f.write(f"user{i}:{FAKE_HASH}\n")
+
+
+def linear_lookup(username, path):
+    # What login_user did before the index: scan and split every line
+    with open(path, "r") as f:
+        for line in f:
+            user, hash1 = line.strip().split(":", 1)
+            if user == username:
+                return hash1
+    return None
+
+
+def median_us(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10, 1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'users':>10} {'linear scan':>14} {'index load':>12} {'index lookup':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.sizes:
+            path = str(Path(tmp) / f"users_{count}.txt")
+            write_users(path, count)
+            # Worst case for the scan: the last user in the file
+            username = f"user{count - 1}"
+
+            scan = median_us(lambda: linear_lookup(username, path), max(3, args.repeats // 4))
+            start = time.perf_counter()
+            auth.load_user_index(path)
+            load = (time.perf_counter() - start) * 1000
+            lookup = median_us(lambda: auth.get_password_hash(username, path), args.repeats)
+            assert auth.get_password_hash(username, path) == FAKE_HASH
+
+            print(f"{count:>10,} {scan:11.1f} us {load:9.1f} ms {lookup:11.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Memory held by the get_all_* frames: untyped (SELECT * straight into
+pandas, as the readers returned them before app.data.dtypes) against the
+declared dtypes, per column and scaled to 1M rows. "object" is the same
+untyped frame with TEXT columns as Python objects, which is what pandas
+gives without pyarrow or before 3.0.
+
+Also times each reader cold (no query cache, no snapshot) and from a
+current snapshot.
+
+Run from the project root against a directory made by generate_data:
+    python -m benchmarks.generate_data --rows 1m --out bench_data/1m --load
+    python -m benchmarks.bench_memory --data bench_data/1m
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Rows the memory figures are scaled to
+PER_ROWS = 1_000_000
+
+
+def _megabytes(series_bytes, rows):
+    return series_bytes / max(rows, 1) * PER_ROWS / 1e6
+
+
+def _timed(func):
+    from app.data.cache import query_cache
+
+    query_cache.clear()
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def measure(table, reader, columns=False):
+    """
+    Args:
+        table: Table name
+        reader: Its get_all_* function
+        columns: Also print the per-column breakdown
+
+    Returns:
+        dict: rows, object_mb, untyped_mb, typed_mb (per PER_ROWS rows)
+            and the untyped, typed and snapshot load times in ms
+    """
+    import pandas as pd
+
+    from app.data.db import read_connection
+    from app.data.snapshots import export_snapshot, snapshot_dir
+
+    shutil.rmtree(snapshot_dir(), ignore_errors=True)
+    with read_connection() as conn:
+        untyped, untyped_ms = _timed(lambda: pd.read_sql_query(
+            f"SELECT * FROM {table} ORDER BY id DESC", conn))
+    typed, typed_ms = _timed(reader)
+    export_snapshot(table)
+    _, snapshot_ms = _timed(reader)
+
+    text = untyped.select_dtypes(include=["object", "string"]).columns
+    as_objects = untyped.astype({column: object for column in text})
+
+    rows = len(untyped)
+    usage = {
+        "object": as_objects.memory_usage(deep=True, index=False),
+        "untyped": untyped.memory_usage(deep=True, index=False),
+        "typed": typed.memory_usage(deep=True, index=False),
+    }
+    if columns:
+        print(f"  {'column':24} {'dtype':18} {'object':>9} {'untyped':>9} {'typed':>9}")
+        for column in typed.columns:
+            print(f"  {column:24} {str(typed[column].dtype)[:18]:18} "
+                  + " ".join(f"{_megabytes(usage[kind][column], rows):9.1f}"
+                             for kind in ("object", "untyped", "typed")))
+    return {
+        "rows": rows,
+        **{f"{kind}_mb": _megabytes(values.sum(), rows) for kind, values in usage.items()},
+        "untyped_ms": untyped_ms,
+        "typed_ms": typed_ms,
+        "snapshot_ms": snapshot_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", type=Path, required=True,
+                        help="directory made by generate_data --load")
+    parser.add_argument("--columns", action="store_true", help="print every column")
+    args = parser.parse_args()
+
+    data_dir = args.data.resolve()
+    sys.path.insert(0, str(PROJECT_ROOT))
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(data_dir / "DATA", Path(tmp) / "DATA")
+        os.chdir(tmp)
+
+        from app.data import datasets, incidents, tickets
+        from app.data.db import get_connection
+        from app.data.schema import create_all_tables
+
+        with contextlib.redirect_stdout(io.StringIO()), get_connection() as conn:
+            create_all_tables(conn)
+
+        readers = {
+            "cyber_incidents": incidents.get_all_incidents,
+            "it_tickets": tickets.get_all_tickets,
+            "datasets_metadata": datasets.get_all_datasets,
+        }
+        results = {}
+        for table, reader in readers.items():
+            if args.columns:
+                print(table)
+            results[table] = measure(table, reader, args.columns)
+            if args.columns:
+                print()
+
+    print(f"MB per {PER_ROWS:,} rows and load times in ms\n")
+    print(f"{'table':18} {'rows':>9} {'object':>8} {'untyped':>8} {'typed':>8} {'saved':>6}"
+          f" {'untyped':>9} {'typed':>8} {'snapshot':>8}")
+    for table, result in results.items():
+        print(f"{table:18} {result['rows']:>9,} {result['object_mb']:8.1f} "
+              f"{result['untyped_mb']:8.1f} {result['typed_mb']:8.1f} "
+              f"{result['untyped_mb'] / result['typed_mb']:5.1f}x "
+              f"{result['untyped_ms']:8.1f} {result['typed_ms']:8.1f} {result['snapshot_ms']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
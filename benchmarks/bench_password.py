@@ -0,0 +1,73 @@
+"""
+Login throughput at several bcrypt cost factors: every page thread
+calling bcrypt directly vs the bounded PasswordService pool.
+
+Run from the project root:
+    python -m benchmarks.bench_password --rounds 8 10 12 --clients 16
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+import bcrypt
+
+from app.services.password_service import VERIFY_WORKERS, PasswordService
+
+
+def run_burst(verify, hashed, clients, logins_per_client):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        for _ in range(logins_per_client):
+            start = time.perf_counter()
+            assert verify("correct horse", hashed)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "logins_per_sec": len(latencies) / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[8, 10, 12])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=2, help="logins per client")
+    parser.add_argument("--workers", type=int, default=VERIFY_WORKERS)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} concurrent clients, "
+          f"{args.workers} pool workers\n")
+    print(f"{'rounds':>6} {'mode':>8} {'logins/s':>10} {'p50':>10} {'p95':>10}")
+    for rounds in args.rounds:
+        hashed = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds)).decode("utf-8")
+
+        def direct(password, stored):
+            return bcrypt.checkpw(password.encode("utf-8"), stored.encode("utf-8"))
+
+        service = PasswordService(rounds=rounds, workers=args.workers)
+        for mode, verify in (("direct", direct), ("pool", service.verify_password)):
+            result = run_burst(verify, hashed, args.clients, args.logins)
+            print(f"{rounds:>6} {mode:>8} {result['logins_per_sec']:10.1f} "
+                  f"{result['p50_ms']:7.1f} ms {result['p95_ms']:7.1f} ms")
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Single-row lookups: the previous implementations (pandas DataFrame per
+user lookup, bare tuples for the get_*_by_id functions) vs the
+named-tuple records from app.data.db.fetch_record.
+
+Reports median latency and memory allocated per call (tracemalloc).
+
+Run from the project root:
+    python -m benchmarks.bench_point_lookups
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+
+def legacy_get_user_by_username(conn, username):
+    # app.data.users.get_user_by_username before records
+    import pandas as pd
+
+    df = pd.read_sql_query("SELECT * FROM users WHERE username = ?", conn, params=(username,))
+    if not df.empty:
+        return df.iloc[0].to_dict()
+    return None
+
+
+def legacy_get_incident_by_id(incident_id):
+    # app.data.incidents.get_incident_by_id before records
+    from app.data.db import read_connection
+
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM cyber_incidents WHERE id = ?", (incident_id,))
+        return cursor.fetchone()
+
+
+def measure(func, repeats):
+    func()  # warm up imports and the statement cache
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1_000_000)
+
+    # Peak bytes allocated while one call runs, median over 50 calls
+    peaks = []
+    tracemalloc.start()
+    for _ in range(50):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - base)
+    tracemalloc.stop()
+    return statistics.median(times), statistics.median(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from app.data.db import connect_database, read_connection, transaction
+        from app.data.incidents import get_incident_by_id
+        from app.data.schema import create_all_tables
+        from app.data.users import get_user_by_username
+
+        conn = connect_database()
+        create_all_tables(conn)
+        conn.close()
+        with transaction() as conn:
+            conn.executemany(
+                "INSERT INTO users (username, password_hash, role) VALUES (?, 'x', 'analyst')",
+                ((f"user{i}",) for i in range(args.rows))
+            )
+            conn.executemany(
+                "INSERT INTO cyber_incidents (incident_id, timestamp, severity, category, status)"
+                " VALUES (?, '2024-01-01 00:00:00', 'High', 'Malware', 'Open')",
+                ((str(i),) for i in range(args.rows))
+            )
+
+        username = f"user{args.rows // 2}"
+        incident = args.rows // 2
+        with read_connection() as conn:
+            cases = [
+                ("get_user_by_username  pandas", lambda: legacy_get_user_by_username(conn, username)),
+                ("get_user_by_username  record", lambda: get_user_by_username(conn, username)),
+                ("get_incident_by_id    tuple", lambda: legacy_get_incident_by_id(incident)),
+                ("get_incident_by_id    record", lambda: get_incident_by_id(incident)),
+            ]
+            assert get_user_by_username(conn, username).username == username
+            repeats = {"pandas": args.repeats // 10}
+
+            print(f"{'lookup':30} {'median':>10} {'peak alloc per call':>20}")
+            for label, func in cases:
+                median, peak = measure(func, repeats.get(label.split()[-1], args.repeats))
+                print(f"{label:30} {median:7.1f} us {peak / 1024:16.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Incident description search: LIKE '%term%' scan vs the FTS5 index.
+
+Run from the project root:
+    python -m benchmarks.bench_search --rows 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+WORDS = (
+    "phishing email credential malware ransomware endpoint firewall vpn "
+    "password reset account lockout suspicious login outbound traffic "
+    "server database backup patch vulnerability exploit user laptop "
+    "printer network dns certificate expired alert quarantine invoice"
+).split()
+
+# Common terms match ~10-30% of rows; host names match a handful
+QUERIES = ["ransomware", "password reset", "suspicious log", "host4242"]
+
+
+def seed(rows):
+    from app.data.db import connect_database, transaction
+    from app.data.schema import create_all_tables
+
+    conn = connect_database()
+    create_all_tables(conn)
+    conn.close()
+
+    rng = random.Random(0)
+    with transaction() as conn:
+        conn.executemany(
+            """
+            INSERT INTO cyber_incidents (incident_id, timestamp, severity, category,
+                                         status, description)
+            VALUES (?, '2024-01-01 00:00:00', 'High', 'Malware', 'Open', ?)
+            """,
+            ((str(i), " ".join(rng.choices(WORDS, k=12)) + f" host{rng.randrange(50_000)}")
+             for i in range(rows))
+        )
+
+
+def like_search(text, limit=100):
+    from app.data.db import read_connection
+
+    # Newest matches first; stops early for common terms, scans for rare ones
+    clauses = " AND ".join("description LIKE ?" for _ in text.split())
+    with read_connection() as conn:
+        return conn.execute(
+            f"SELECT id, description FROM cyber_incidents WHERE {clauses}"
+            " ORDER BY id DESC LIMIT ?",
+            [f"%{word}%" for word in text.split()] + [limit]
+        ).fetchall()
+
+
+def fts_search(text, limit=100):
+    from app.data.search import SEARCH_RANK_WINDOW, search
+
+    return search("cyber_incidents_fts", ("id",), text, limit=limit,
+                  rank_window=SEARCH_RANK_WINDOW)
+
+
+def fts_search_exact(text, limit=100):
+    from app.data.search import search
+
+    return search("cyber_incidents_fts", ("id",), text, limit=limit)
+
+
+def median_ms(func, text, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(text)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        start = time.perf_counter()
+        seed(args.rows)
+        print(f"Seeded {args.rows:,} incidents in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'query':20} {'LIKE':>10} {'FTS5 windowed':>13} {'FTS5 full rank':>15}")
+        for text in QUERIES:
+            like = median_ms(like_search, text, args.repeats)
+            fts = median_ms(fts_search, text, args.repeats)
+            exact = median_ms(fts_search_exact, text, args.repeats)
+            print(f"{text!r:20} {like:7.1f} ms {fts:10.1f} ms {exact:12.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Per-page "who is logged in" cost: a get_user_by_username lookup through
+pandas vs resolving a signed session token (cached and uncached).
+
+Run from the project root:
+    python -m benchmarks.bench_sessions
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def median_us(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from app.data.db import connect_database, read_connection, transaction
+        from app.data.schema import create_all_tables
+        from app.data.users import get_user_by_username
+        from app.services.session_service import resolve_session, session_cache, start_session
+
+        conn = connect_database()
+        create_all_tables(conn)
+        conn.close()
+        with transaction() as conn:
+            conn.executemany(
+                "INSERT INTO users (username, password_hash, role) VALUES (?, 'x', 'analyst')",
+                ((f"user{i}",) for i in range(args.users))
+            )
+
+        username = f"user{args.users // 2}"
+        token = start_session(username)
+
+        def pandas_lookup():
+            with read_connection() as conn:
+                return get_user_by_username(conn, username)
+
+        def uncached():
+            session_cache.discard(token.split(".")[0])
+            return resolve_session(token)
+
+        results = [
+            ("get_user_by_username (pandas)", median_us(pandas_lookup, args.repeats // 10)),
+            ("resolve_session, cache miss", median_us(uncached, args.repeats)),
+            ("resolve_session, cache hit", median_us(lambda: resolve_session(token), args.repeats)),
+        ]
+        assert resolve_session(token)["username"] == username
+        for label, us in results:
+            print(f"{label:32} {us:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Ticket SLA report timings: full build, cached render, incremental
+refresh after a batch of ticket updates, and a new process's first build
+from SQLite alone and from a stale it_tickets snapshot.
+
+Run from the project root:
+    python -m benchmarks.bench_sla --tickets 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+STATUSES = ["Open", "In Progress", "Resolved", "Resolved", "Closed"]
+
+
+def seed(tickets):
+    from app.data.db import connect_database, transaction
+    from app.data.schema import create_all_tables
+
+    conn = connect_database()
+    create_all_tables(conn)
+    conn.close()
+
+    rng = random.Random(0)
+    with transaction() as conn:
+        conn.executemany(
+            """
+            INSERT INTO it_tickets (ticket_id, priority, status, subject, created_date,
+                                    assigned_to, resolution_time_hours)
+            VALUES (?, ?, ?, 's', '2024-01-01 00:00:00', ?, ?)
+            """,
+            ((f"T{i}", rng.choice(PRIORITIES), rng.choice(STATUSES),
+              f"IT_Support_{i % 26}", rng.randint(1, 96)) for i in range(tickets))
+        )
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def same_report(a, b):
+    # Row order follows the order labels were first seen in, which
+    # differs between builds
+    def by_label(frame):
+        return frame.sort_values(frame.columns[0]).reset_index(drop=True)
+
+    return (a["summary"] == b["summary"]
+            and all(by_label(a[key]).equals(by_label(b[key])) for key in ("priority", "assignee")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=200_000)
+    parser.add_argument("--updates", type=int, default=1_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from app.data.snapshots import export_snapshot, snapshot_dir
+        from app.data.tickets import update_ticket_status
+        from app.services.sla_service import SlaTracker, get_sla_report
+
+        start = time.perf_counter()
+        seed(args.tickets)
+        print(f"Seeded {args.tickets:,} tickets in {time.perf_counter() - start:.1f}s")
+
+        _, full = timed(get_sla_report)
+        print(f"full build:          {full:8.1f} ms")
+
+        _, cached = timed(get_sla_report)
+        print(f"cached render:       {cached:8.1f} ms")
+
+        for i in range(args.updates):
+            update_ticket_status(f"T{i * 7 % args.tickets}", "Resolved")
+        report, incremental = timed(get_sla_report)
+        print(f"incremental refresh: {incremental:8.1f} ms ({args.updates:,} tickets changed)")
+
+        # A snapshot a batch of updates behind, as the refresher leaves it
+        export_snapshot("it_tickets")
+        for i in range(args.updates):
+            update_ticket_status(f"T{i * 11 % args.tickets}", "Closed")
+        report = get_sla_report()
+        from_snapshot, snapshot_ms = timed(lambda: SlaTracker().report())
+        print(f"new process, snapshot: {snapshot_ms:6.1f} ms ({args.updates:,} tickets behind)")
+
+        shutil.rmtree(snapshot_dir())
+        from_sqlite, rebuild = timed(lambda: SlaTracker().report())
+        print(f"new process, SQLite:   {rebuild:6.1f} ms")
+        if not (same_report(from_snapshot, from_sqlite) and same_report(report, from_sqlite)):
+            raise SystemExit("Reports built from the snapshot and from SQLite differ")
+
+        summary = report["summary"]
+        print(f"\n{summary['resolved']:,} resolved, breach rate {summary['breach_rate']:.1%}, "
+              f"p50/p90/p99 {summary['p50_hours']:.0f}/{summary['p90_hours']:.0f}/"
+              f"{summary['p99_hours']:.0f} h")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Full-table dashboard reads from SQLite vs from the columnar snapshot:
+get_all_incidents (every column) and get_incidents_by_type_count (one
+column), with the query cache cleared before every call. Also times the
+full export, a delta export after updating a slice of rows, and a read
+that has to merge that delta.
+
+Run from the project root:
+    python -m benchmarks.bench_snapshots --rows 200000
+    SNAPSHOT_COMPRESSION=zstd python -m benchmarks.bench_snapshots
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+SEVERITIES = ("Low", "Medium", "High", "Critical")
+CATEGORIES = ("Malware", "Phishing", "DDoS", "Insider", "Misconfiguration")
+STATUSES = ("Open", "Investigating", "Resolved", "Closed")
+
+
+def seed(rows):
+    from app.data.db import connect_database, transaction
+    from app.data.schema import create_all_tables
+
+    conn = connect_database()
+    create_all_tables(conn)
+    conn.close()
+
+    rng = random.Random(0)
+    with transaction() as conn:
+        conn.executemany(
+            """
+            INSERT INTO cyber_incidents (incident_id, timestamp, severity, category,
+                                         status, description, reported_by)
+            VALUES (?, datetime('2024-01-01', ? || ' minutes'), ?, ?, ?, ?, ?)
+            """,
+            ((f"INC-{i:08d}", rng.randrange(525_600), rng.choice(SEVERITIES),
+              rng.choice(CATEGORIES), rng.choice(STATUSES),
+              f"Suspicious activity on host-{rng.randrange(5000)}", f"analyst{rng.randrange(50)}")
+             for i in range(rows))
+        )
+
+
+def timed(func, repeats):
+    from app.data.cache import query_cache
+
+    samples = []
+    for _ in range(repeats):
+        query_cache.clear()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--changed", type=float, default=0.01,
+                        help="fraction of rows updated before the delta export")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from app.data.db import transaction
+        from app.data.incidents import get_all_incidents, get_incidents_by_type_count
+        from app.data.snapshots import SNAPSHOT_COMPRESSION, export_snapshot, snapshot_dir
+
+        seed(args.rows)
+        print(f"{args.rows:,} incidents, compression={SNAPSHOT_COMPRESSION}, "
+              f"median of {args.repeats} cold-cache calls\n")
+
+        sqlite_all = timed(get_all_incidents, args.repeats)
+        sqlite_types = timed(get_incidents_by_type_count, args.repeats)
+
+        full = export_snapshot("cyber_incidents", full=True)
+        size = sum(path.stat().st_size for path in snapshot_dir().glob("*.arrow"))
+        snapshot_all = timed(get_all_incidents, args.repeats)
+        snapshot_types = timed(get_incidents_by_type_count, args.repeats)
+
+        changed = int(args.rows * args.changed)
+        with transaction() as conn:
+            conn.executemany("UPDATE cyber_incidents SET status = 'Closed' WHERE id = ?",
+                             [(row_id,) for row_id in random.Random(1).sample(
+                                 range(1, args.rows + 1), changed)])
+        delta = export_snapshot("cyber_incidents")
+        merged_all = timed(get_all_incidents, args.repeats)
+
+        print(f"  {'full export':34} {full['seconds'] * 1000:9.1f} ms  "
+              f"({size / 1e6:.1f} MB on disk)")
+        label = f"{delta['mode']} export, {changed:,} rows updated"
+        print(f"  {label:34} {delta['seconds'] * 1000:9.1f} ms")
+        print()
+        print(f"  {'':34} {'SQLite':>9}    {'snapshot':>9}")
+        print(f"  {'get_all_incidents':34} {sqlite_all:9.1f} ms {snapshot_all:9.1f} ms")
+        print(f"  {'get_incidents_by_type_count':34} {sqlite_types:9.1f} ms {snapshot_types:9.1f} ms")
+        print(f"  {'get_all_incidents, base + delta':34} {'':>9}    {merged_all:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
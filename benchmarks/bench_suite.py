@@ -0,0 +1,703 @@
+"""
+Time every public function in app/data/*.py and auth.py against a
+generated dataset and write p50/p95 latency and peak RSS per function
+as JSON, so runs on different commits can be compared.
+
+Functions are run against a copy of the dataset, so write benchmarks do
+not change it. The query cache is cleared before every call, so cached
+readers are timed on a miss. A public function without an entry in
+SPECS (or a reason in SKIPPED) fails the run.
+
+Run from the project root:
+    python -m benchmarks.generate_data --rows 1m --out bench_data/1m --load
+    python -m benchmarks.bench_suite --data bench_data/1m --output bench_results/1m.json
+    python -m benchmarks.bench_suite --compare bench_results/before.json bench_results/after.json
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import inspect
+import io
+import itertools
+import json
+import math
+import os
+import pkgutil
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Calls per function: at least MIN_RUNS, then more until MAX_RUNS or the
+# time budget is used up
+MIN_RUNS = 3
+MAX_RUNS = 200
+TIME_BUDGET = 2.0
+
+# p50 ratio above which --compare reports a regression
+REGRESSION_THRESHOLD = 1.25
+
+# Public functions that are not timed on their own
+SKIPPED = {
+    "app.data.cache.cached_query": "decorator",
+    "app.data.tracing.traced": "decorator",
+    "app.data.db.record_factory": "row factory, timed through fetch_record",
+    "auth.main": "interactive prompt",
+    # Migration steps run once, in order, from run_migrations; they are
+    # timed together by create_all_tables on a fresh database
+    **{f"app.data.schema.{name}": "migration step, timed by create_all_tables"
+       for name in ("create_users_table", "create_cyber_incidents_table",
+                    "create_datasets_metadata_table", "create_it_tickets_table",
+                    "create_ingestion_manifest_table", "add_missing_columns",
+                    "add_csv_columns", "create_natural_key_indexes", "create_indexes",
+                    "create_trend_index", "create_ticket_change_log",
+                    "create_sessions_table", "create_base_tables")},
+    "app.data.aggregates.create_aggregate_tables": "migration step, timed by create_all_tables",
+    "app.data.aggregates.recreate_aggregate_tables": "migration step, timed by create_all_tables",
+    "app.data.search.create_search_tables": "migration step, timed by create_all_tables",
+    "app.data.schema.create_snapshot_change_logs": "migration step, timed by create_all_tables",
+    "app.data.snapshots.start_snapshot_refresher": "starts a background thread",
+}
+
+
+def spec(call, prepare=None, max_runs=MAX_RUNS):
+    """
+    Describe how to benchmark one function.
+
+    Args:
+        call: function(ctx, state) making one timed call
+        prepare: Optional function(ctx) run untimed before each call;
+            its return value is passed to `call` as state
+        max_runs: Upper bound on calls, for very slow functions
+
+    Returns:
+        dict: Benchmark spec
+    """
+    return {"call": call, "prepare": prepare, "max_runs": max_runs}
+
+
+def _unique(ctx, prefix):
+    return f"{prefix}-{next(ctx.counter)}"
+
+
+def _new_incident(ctx):
+    from app.data import incidents
+
+    return incidents.insert_incident(_unique(ctx, "bench-incident"), "High", "Open",
+                                     "Malware", "bench incident")
+
+
+def _new_ticket(ctx):
+    from app.data import tickets
+
+    return tickets.insert_ticket(_unique(ctx, "bench-ticket"), "High", "Open", "Hardware",
+                                 "bench", "bench ticket", "2024-06-01 09:00:00")
+
+
+def _new_dataset(ctx):
+    from app.data import datasets
+
+    return datasets.insert_dataset(_unique(ctx, "bench-dataset"), "bench", 10, 3,
+                                   "bench", "2024-06-01")
+
+
+def _incident_rows(ctx, count=1000):
+    from app.data.incidents import INCIDENT_COLUMNS
+
+    return INCIDENT_COLUMNS, [
+        (_unique(ctx, "bench-incident"), "2024-06-01 09:00:00", "Low", "Phishing",
+         "Open", "bench incident", None)
+        for _ in range(count)
+    ]
+
+
+def build_specs():
+    """
+    Returns:
+        dict: "module.function" -> spec(), in run order
+    """
+    from app.data import (aggregates, async_queries, cache, datasets, db, dtypes, incidents,
+                          manifest, schema, search, sessions, snapshots, tickets, tracing,
+                          users)
+    import auth
+
+    def fresh_database(ctx):
+        return str(Path(ctx.tmp) / f"{_unique(ctx, 'fresh')}.db")
+
+    def create_all_tables(ctx, path):
+        conn = db.connect_database(path)
+        schema.create_all_tables(conn)
+        conn.close()
+
+    def fresh_snapshots(ctx):
+        # get_all_* read the snapshot when it is current, which is how the
+        # dashboards hit them once the refresher has caught up
+        snapshots.refresh_snapshots()
+
+    def toggle(ctx):
+        ctx.toggle = not ctx.toggle
+        return ctx.toggle
+
+    return {
+        # app.data.db
+        "app.data.db.connect_database": spec(lambda ctx, _: db.connect_database().close()),
+        "app.data.db.get_pool": spec(lambda ctx, _: db.get_pool()),
+        "app.data.db.get_connection": spec(
+            lambda ctx, _: _execute(db.get_connection(), "SELECT 1")),
+        "app.data.db.read_connection": spec(
+            lambda ctx, _: _execute(db.read_connection(), "SELECT 1")),
+        "app.data.db.transaction": spec(
+            lambda ctx, _: _execute(db.transaction(), "SELECT 1")),
+        "app.data.db.invalidate": spec(lambda ctx, _: db.invalidate("cyber_incidents")),
+        "app.data.db.pool_stats": spec(lambda ctx, _: db.pool_stats()),
+        "app.data.db.fetch_record": spec(lambda ctx, _: _fetch_incident(ctx)),
+        "app.data.db.batched": spec(lambda ctx, _: list(db.batched(range(10_000), 1000))),
+        "app.data.db.insert_many": spec(
+            lambda ctx, rows: db.insert_many("cyber_incidents", *rows),
+            prepare=_incident_rows),
+        "app.data.db.upsert_many": spec(
+            lambda ctx, rows: db.upsert_many("cyber_incidents", rows[0], "incident_id", rows[1]),
+            prepare=lambda ctx: (ctx.upsert_rows[0], [
+                row[:4] + (("Open", "Closed")[toggle(ctx)],) + row[5:]
+                for row in ctx.upsert_rows[1]
+            ])),
+        "app.data.db.read_page": spec(lambda ctx, _: db.read_page("cyber_incidents")),
+        "app.data.db.iter_pages": spec(lambda ctx, _: next(db.iter_pages("cyber_incidents"))),
+        "app.data.db.build_filter_query": spec(lambda ctx, _: db.build_filter_query(
+            "cyber_incidents", incidents.INCIDENT_FILTER_COLUMNS,
+            incidents.INCIDENT_SORT_COLUMNS, filters={"severity": ["High"]})),
+        "app.data.db.get_distinct_values": spec(
+            lambda ctx, _: db.get_distinct_values("cyber_incidents", "severity")),
+        "app.data.db.build_column_list": spec(lambda ctx, _: db.build_column_list(
+            "cyber_incidents", ["id", "timestamp", "severity"], incidents.INCIDENT_READ_COLUMNS)),
+
+        # app.data.dtypes
+        "app.data.dtypes.apply_dtypes": spec(
+            lambda ctx, df: dtypes.apply_dtypes(df, "cyber_incidents"),
+            prepare=lambda ctx: db.read_page("cyber_incidents")[0]),
+
+        # app.data.cache
+        "app.data.cache.cache_stats": spec(lambda ctx, _: cache.cache_stats()),
+
+        # app.data.tracing
+        "app.data.tracing.normalize_sql": spec(lambda ctx, _: tracing.normalize_sql(
+            "SELECT * FROM it_tickets WHERE priority IN ('High', 'Low') LIMIT 100")),
+        "app.data.tracing.trace_report": spec(lambda ctx, _: tracing.trace_report()),
+
+        # app.data.schema
+        "app.data.schema.create_all_tables": spec(create_all_tables, prepare=fresh_database,
+                                                  max_runs=MIN_RUNS),
+        "app.data.schema.get_schema_version": spec(
+            lambda ctx, _: schema.get_schema_version(ctx.conn)),
+        "app.data.schema.run_migrations": spec(lambda ctx, _: schema.run_migrations(ctx.conn)),
+
+        # app.data.incidents
+        "app.data.incidents.insert_incident": spec(lambda ctx, _: _new_incident(ctx)),
+        "app.data.incidents.insert_incidents_many": spec(
+            lambda ctx, rows: incidents.insert_incidents_many(rows[1]), prepare=_incident_rows),
+        "app.data.incidents.get_all_incidents": spec(
+            lambda ctx, _: incidents.get_all_incidents(), prepare=fresh_snapshots,
+            max_runs=MIN_RUNS),
+        "app.data.incidents.get_incidents_page": spec(
+            lambda ctx, _: incidents.get_incidents_page()),
+        "app.data.incidents.iter_incident_pages": spec(
+            lambda ctx, _: next(incidents.iter_incident_pages())),
+        "app.data.incidents.get_incident_by_id": spec(
+            lambda ctx, _: incidents.get_incident_by_id(ctx.incident_id)),
+        "app.data.incidents.update_incident_status": spec(
+            lambda ctx, _: incidents.update_incident_status(
+                ctx.incident_id, ("Open", "Resolved")[toggle(ctx)])),
+        "app.data.incidents.delete_incident": spec(
+            lambda ctx, row_id: incidents.delete_incident(row_id), prepare=_new_incident),
+        "app.data.incidents.get_incidents_by_type_count": spec(
+            lambda ctx, _: incidents.get_incidents_by_type_count(),
+            prepare=fresh_snapshots, max_runs=MIN_RUNS),
+        "app.data.incidents.get_severity_count": spec(
+            lambda ctx, _: incidents.get_severity_count()),
+        "app.data.incidents.filter_incidents": spec(
+            lambda ctx, _: incidents.filter_incidents(severity=["High"], status=["Open"])),
+        "app.data.incidents.get_incident_filter_options": spec(
+            lambda ctx, _: incidents.get_incident_filter_options()),
+        "app.data.incidents.get_incident_trend": spec(
+            lambda ctx, _: incidents.get_incident_trend("day", "severity")),
+        "app.data.incidents.search_incidents": spec(
+            lambda ctx, _: incidents.search_incidents("ransomware endpoint")),
+
+        # app.data.tickets
+        "app.data.tickets.insert_ticket": spec(lambda ctx, _: _new_ticket(ctx)),
+        "app.data.tickets.insert_tickets_many": spec(
+            lambda ctx, rows: tickets.insert_tickets_many(rows),
+            prepare=lambda ctx: [
+                (_unique(ctx, "bench-ticket"), "Low", "Open", "Hardware", "bench",
+                 "bench ticket", "2024-06-01 09:00:00", None, "IT_Support_A", None)
+                for _ in range(1000)
+            ]),
+        "app.data.tickets.get_all_tickets": spec(
+            lambda ctx, _: tickets.get_all_tickets(), prepare=fresh_snapshots,
+            max_runs=MIN_RUNS),
+        "app.data.tickets.get_tickets_page": spec(lambda ctx, _: tickets.get_tickets_page()),
+        "app.data.tickets.iter_ticket_pages": spec(
+            lambda ctx, _: next(tickets.iter_ticket_pages())),
+        "app.data.tickets.get_ticket_by_id": spec(
+            lambda ctx, _: tickets.get_ticket_by_id(ctx.ticket_id)),
+        "app.data.tickets.update_ticket_status": spec(
+            lambda ctx, _: tickets.update_ticket_status(
+                ctx.ticket_id, ("Open", "In Progress")[toggle(ctx)])),
+        "app.data.tickets.update_ticket_resolution": spec(
+            lambda ctx, _: tickets.update_ticket_resolution(
+                ctx.ticket_id, "Resolved", ("2024-06-02 09:00:00", "2024-06-03 09:00:00")[toggle(ctx)])),
+        "app.data.tickets.delete_ticket": spec(
+            lambda ctx, row_id: tickets.delete_ticket(row_id), prepare=_new_ticket),
+        "app.data.tickets.get_priority_count": spec(lambda ctx, _: tickets.get_priority_count()),
+        "app.data.tickets.filter_tickets": spec(
+            lambda ctx, _: tickets.filter_tickets(priority=["High"], status=["Open"])),
+        "app.data.tickets.get_ticket_changes": spec(
+            lambda ctx, _: tickets.get_ticket_changes(ctx.recent_change_seq)),
+        "app.data.tickets.get_ticket_filter_options": spec(
+            lambda ctx, _: tickets.get_ticket_filter_options()),
+        "app.data.tickets.search_tickets": spec(
+            lambda ctx, _: tickets.search_tickets("password reset")),
+
+        # app.data.datasets
+        "app.data.datasets.insert_dataset": spec(lambda ctx, _: _new_dataset(ctx)),
+        "app.data.datasets.insert_datasets_many": spec(
+            lambda ctx, rows: datasets.insert_datasets_many(rows),
+            prepare=lambda ctx: [
+                (_unique(ctx, "bench-dataset"), "bench", "bench", "bench", "2024-06-01",
+                 10, 3, 0.1, "bench")
+                for _ in range(1000)
+            ]),
+        "app.data.datasets.get_all_datasets": spec(
+            lambda ctx, _: datasets.get_all_datasets(), prepare=fresh_snapshots,
+            max_runs=MIN_RUNS),
+        "app.data.datasets.get_datasets_page": spec(lambda ctx, _: datasets.get_datasets_page()),
+        "app.data.datasets.iter_dataset_pages": spec(
+            lambda ctx, _: next(datasets.iter_dataset_pages())),
+        "app.data.datasets.get_dataset_by_id": spec(
+            lambda ctx, _: datasets.get_dataset_by_id(ctx.dataset_id)),
+        "app.data.datasets.update_dataset": spec(
+            lambda ctx, _: datasets.update_dataset(
+                ctx.dataset_id, last_updated=("2024-06-01", "2024-06-02")[toggle(ctx)])),
+        "app.data.datasets.delete_dataset": spec(
+            lambda ctx, row_id: datasets.delete_dataset(row_id), prepare=_new_dataset),
+        "app.data.datasets.get_uploaded_by_count": spec(
+            lambda ctx, _: datasets.get_uploaded_by_count()),
+
+        # app.data.search
+        "app.data.search.build_match_query": spec(
+            lambda ctx, _: search.build_match_query("password res")),
+        "app.data.search.search": spec(
+            lambda ctx, _: search.search("cyber_incidents_fts", ("id",), "malware")),
+        "app.data.search.rebuild_search_indexes": spec(
+            lambda ctx, _: search.rebuild_search_indexes(), max_runs=1),
+
+        # app.data.aggregates
+        "app.data.aggregates.rebuild_aggregates": spec(
+            lambda ctx, _: aggregates.rebuild_aggregates(), max_runs=1),
+
+        # app.data.snapshots
+        "app.data.snapshots.snapshot_dir": spec(lambda ctx, _: snapshots.snapshot_dir()),
+        "app.data.snapshots.export_snapshot": spec(
+            lambda ctx, _: snapshots.export_snapshot("cyber_incidents", full=True),
+            max_runs=MIN_RUNS),
+        "app.data.snapshots.refresh_snapshots": spec(
+            lambda ctx, _: snapshots.refresh_snapshots(["cyber_incidents"]),
+            # One changed row, so each call is a delta export
+            prepare=lambda ctx: incidents.update_incident_status(
+                ctx.incident_id, ("Open", "Resolved")[toggle(ctx)]), max_runs=MIN_RUNS),
+        "app.data.snapshots.read_snapshot": spec(
+            lambda ctx, _: snapshots.read_snapshot("cyber_incidents"), prepare=fresh_snapshots,
+            max_runs=MIN_RUNS),
+        "app.data.snapshots.read_snapshot_since": spec(
+            lambda ctx, _: snapshots.read_snapshot_since("cyber_incidents"),
+            prepare=fresh_snapshots, max_runs=MIN_RUNS),
+        "app.data.snapshots.schedule_refresh": spec(
+            lambda ctx, _: snapshots.schedule_refresh("cyber_incidents")),
+
+        # app.data.async_queries
+        "app.data.async_queries.gather_queries": spec(
+            lambda ctx, _: asyncio.run(async_queries.gather_queries(ctx.page_queries))),
+        "app.data.async_queries.fetch_all": spec(
+            lambda ctx, _: async_queries.fetch_all(ctx.page_queries)),
+
+        # app.data.manifest
+        "app.data.manifest.get_manifest_entry": spec(
+            lambda ctx, _: manifest.get_manifest_entry(ctx.manifest_source)),
+        "app.data.manifest.record_ingestion": spec(
+            lambda ctx, _: manifest.record_ingestion(
+                "bench://source", "cyber_incidents", 1, 1, "0" * 64, 50_000, ["0" * 32], 1)),
+
+        # app.data.sessions
+        "app.data.sessions.create_session": spec(
+            lambda ctx, _: sessions.create_session(_unique(ctx, "bench-session"),
+                                                   ctx.username, ctx.expires_at)),
+        "app.data.sessions.get_session": spec(
+            lambda ctx, _: sessions.get_session(ctx.session_id)),
+        "app.data.sessions.delete_session": spec(
+            lambda ctx, session_id: sessions.delete_session(session_id),
+            prepare=lambda ctx: _new_session(ctx)),
+        "app.data.sessions.purge_expired_sessions": spec(
+            lambda ctx, _: sessions.purge_expired_sessions(time.time())),
+
+        # app.data.users
+        "app.data.users.insert_user": spec(
+            lambda ctx, _: users.insert_user(ctx.conn, _unique(ctx, "bench-user"), "x")),
+        "app.data.users.get_user_by_username": spec(
+            lambda ctx, _: users.get_user_by_username(ctx.conn, ctx.username)),
+        "app.data.users.update_user_role": spec(
+            lambda ctx, _: users.update_user_role(
+                ctx.conn, ctx.user_id, ("user", "analyst")[toggle(ctx)])),
+        "app.data.users.update_user_password_hash": spec(
+            lambda ctx, _: users.update_user_password_hash(
+                ctx.conn, ctx.username, ctx.password_hash)),
+
+        # auth (users.txt)
+        "auth.hash_password": spec(lambda ctx, _: auth.hash_password(ctx.password),
+                                   max_runs=10),
+        "auth.verify_password": spec(
+            lambda ctx, _: auth.verify_password(ctx.password, ctx.password_hash), max_runs=10),
+        "auth.load_user_index": spec(
+            lambda ctx, _: auth.load_user_index(ctx.users_file),
+            # Force a re-read: the index is otherwise reused until the file changes
+            prepare=lambda ctx: auth._user_index.update(stamp=None), max_runs=20),
+        "auth.get_password_hash": spec(
+            lambda ctx, _: auth.get_password_hash(ctx.username, ctx.users_file)),
+        "auth.register_user": spec(
+            lambda ctx, _: auth.register_user(_unique(ctx, "bench-user"), ctx.password,
+                                              ctx.users_file), max_runs=10),
+        "auth.login_user": spec(
+            lambda ctx, _: auth.login_user(ctx.username, ctx.password, ctx.users_file),
+            max_runs=10),
+    }
+
+
+def _execute(connection, sql):
+    with connection as conn:
+        return conn.execute(sql).fetchall()
+
+
+def _fetch_incident(ctx):
+    from app.data.db import fetch_record, read_connection
+
+    with read_connection() as conn:
+        return fetch_record(conn, "SELECT * FROM cyber_incidents WHERE id = ?",
+                            (ctx.incident_id,))
+
+
+def _new_session(ctx):
+    from app.data.sessions import create_session
+
+    session_id = _unique(ctx, "bench-session")
+    create_session(session_id, ctx.username, ctx.expires_at)
+    return session_id
+
+
+def public_functions():
+    """
+    List the public functions defined in app/data/*.py and auth.py.
+
+    Returns:
+        list: "module.function" names
+    """
+    import app.data
+
+    modules = [importlib.import_module(f"app.data.{info.name}")
+               for info in pkgutil.iter_modules(app.data.__path__)]
+    modules.append(importlib.import_module("auth"))
+    return [
+        f"{module.__name__}.{name}"
+        for module in modules
+        for name, value in vars(module).items()
+        if inspect.isfunction(value) and not name.startswith("_")
+        and value.__module__ == module.__name__
+    ]
+
+
+def make_context(tmp):
+    """
+    Pick existing rows to read and update, and open the connections
+    the users and schema functions take as arguments.
+
+    Args:
+        tmp: Scratch directory
+
+    Returns:
+        SimpleNamespace: Shared benchmark state
+    """
+    from app.data import incidents, tickets
+    from app.data.db import connect_database
+    from app.data.incidents import INCIDENT_COLUMNS
+    from benchmarks.generate_data import USER_PASSWORD
+
+    conn = connect_database()
+
+    def middle(table, column="id"):
+        return conn.execute(
+            f"SELECT {column} FROM {table} WHERE id >= (SELECT MAX(id) / 2 FROM {table})"
+            f" ORDER BY id LIMIT 1"
+        ).fetchone()[0]
+
+    username = middle("users", "username")
+    password_hash = conn.execute("SELECT password_hash FROM users WHERE username = ?",
+                                 (username,)).fetchone()[0]
+    users_file = Path("DATA/users.txt").resolve()
+    manifest = conn.execute("SELECT source_path FROM ingestion_manifest LIMIT 1").fetchone()
+    latest_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM it_ticket_changes").fetchone()[0]
+
+    ctx = SimpleNamespace(
+        tmp=tmp,
+        conn=conn,
+        counter=itertools.count(),
+        toggle=False,
+        incident_id=middle("cyber_incidents"),
+        ticket_id=middle("it_tickets"),
+        dataset_id=middle("datasets_metadata"),
+        username=username,
+        user_id=middle("users"),
+        password=USER_PASSWORD,
+        password_hash=password_hash,
+        users_file=str(users_file),
+        manifest_source=manifest[0] if manifest else "",
+        recent_change_seq=max(0, latest_seq - 1000),
+        expires_at=int(time.time()) + 3600,
+        page_queries={
+            "severity": (incidents.get_severity_count,),
+            "priority": (tickets.get_priority_count,),
+        },
+    )
+    ctx.upsert_rows = _incident_rows(ctx)
+    assert ctx.upsert_rows[0] == INCIDENT_COLUMNS
+    ctx.session_id = _new_session(ctx)
+    return ctx
+
+
+def _status_kb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """
+    Reset the process's peak RSS (Linux). Without this the reported peak
+    is the process high-water mark so far.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """
+    Returns:
+        float: Peak resident set size in MiB since the last reset
+    """
+    peak = _status_kb("VmHWM")
+    if peak is None:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            peak //= 1024
+    return peak / 1024
+
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile
+    index = max(0, math.ceil(q * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def measure(entry, ctx, budget=TIME_BUDGET):
+    """
+    Call one function repeatedly and summarise its latency and memory.
+
+    Args:
+        entry: spec() for the function
+        ctx: make_context() result
+        budget: Seconds to keep sampling after MIN_RUNS calls
+
+    Returns:
+        dict: runs, p50_ms, p95_ms, min_ms, max_ms, rss_before_mb and
+            peak_rss_mb
+    """
+    from app.data.cache import query_cache
+
+    samples = []
+    rss_before = (_status_kb("VmRSS") or 0) / 1024
+    reset_peak_rss()
+    started = time.perf_counter()
+    while len(samples) < entry["max_runs"] and (
+            len(samples) < MIN_RUNS or time.perf_counter() - started < budget):
+        state = entry["prepare"](ctx) if entry["prepare"] else None
+        query_cache.clear()
+        # Status messages printed by the data layer would swamp the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            entry["call"](ctx, state)
+            samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        "runs": len(samples),
+        "p50_ms": round(percentile(samples, 0.5), 4),
+        "p95_ms": round(percentile(samples, 0.95), 4),
+        "min_ms": round(samples[0], 4),
+        "max_ms": round(samples[-1], 4),
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def row_counts():
+    with sqlite3.connect("DATA/intelligence_platform.db") as conn:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("cyber_incidents", "it_tickets", "datasets_metadata", "users")}
+
+
+def run(data_dir, output, only=None, budget=TIME_BUDGET):
+    """
+    Benchmark every public function against a copy of data_dir.
+
+    Args:
+        data_dir: Directory made by generate_data --load
+        output: Path of the JSON report
+        only: Optional substrings; benchmark matching functions only
+        budget: Seconds of sampling per function after MIN_RUNS calls
+
+    Returns:
+        int: Process exit code
+    """
+    data_dir = Path(data_dir).resolve()
+    output = Path(output).resolve()
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(data_dir / "DATA", Path(tmp) / "DATA")
+        os.chdir(tmp)
+
+        specs = build_specs()
+        missing = [name for name in public_functions()
+                   if name not in specs and name not in SKIPPED]
+        counts = row_counts()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ctx = make_context(tmp)
+
+        results = {}
+        print(f"{'function':55} {'runs':>5} {'p50':>10} {'p95':>10} {'peak RSS':>10}")
+        for name, entry in specs.items():
+            if only and not any(part in name for part in only):
+                continue
+            result = measure(entry, ctx, budget)
+            results[name] = result
+            print(f"{name:55} {result['runs']:>5} {result['p50_ms']:>7.2f} ms "
+                  f"{result['p95_ms']:>7.2f} ms {result['peak_rss_mb']:>7.1f} MB")
+        ctx.conn.close()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "data_dir": str(data_dir),
+            "rows": counts,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "skipped": SKIPPED,
+        "functions": results,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nWrote {output}")
+
+    if missing:
+        print(f"\nNo benchmark spec for: {', '.join(missing)}")
+        return 1
+    return 0
+
+
+def compare(before_path, after_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare two reports function by function.
+
+    Args:
+        before_path: Baseline JSON report
+        after_path: New JSON report
+        threshold: p50 ratio counted as a regression
+
+    Returns:
+        int: 1 if any function regressed, else 0
+    """
+    before = json.loads(Path(before_path).read_text())
+    after = json.loads(Path(after_path).read_text())
+    if before["meta"]["rows"] != after["meta"]["rows"]:
+        print("Warning: the reports were run against different row counts")
+
+    regressions = 0
+    print(f"{'function':55} {'p50 before':>11} {'p50 after':>11} {'ratio':>7} "
+          f"{'peak RSS':>17}")
+    for name, new in after["functions"].items():
+        old = before["functions"].get(name)
+        if old is None:
+            print(f"{name:55} {'-':>11} {new['p50_ms']:>8.2f} ms    new")
+            continue
+        ratio = new["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float("inf")
+        flag = " REGRESSED" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"{name:55} {old['p50_ms']:>8.2f} ms {new['p50_ms']:>8.2f} ms {ratio:>6.2f}x "
+              f"{old['peak_rss_mb']:>7.1f} -> {new['peak_rss_mb']:>5.1f} MB{flag}")
+
+    print(f"\n{regressions} functions slower than {threshold}x the baseline p50")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", type=Path, help="directory made by generate_data --load")
+    parser.add_argument("--output", type=Path,
+                        help="JSON report (default: bench_results/<commit>-<data dir>.json)")
+    parser.add_argument("--only", nargs="+", help="benchmark functions matching these substrings")
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET,
+                        help="seconds of sampling per function")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), type=Path)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, threshold=args.threshold)
+    if args.data is None:
+        parser.error("--data is required unless --compare is given")
+    output = args.output or (PROJECT_ROOT / "bench_results"
+                             / f"{git_commit() or 'worktree'}-{args.data.name}.json")
+    return run(args.data, output, args.only, args.budget)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
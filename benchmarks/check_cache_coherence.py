@@ -0,0 +1,99 @@
+"""
+Check that the query cache never serves a result older than the last
+committed write: writes made through the data layer in another process
+must invalidate cached readers here, and a result computed before
+query_cache.clear() must not be served after it.
+
+Run from the project root:
+    python -m benchmarks.check_cache_coherence
+"""
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Run in a second interpreter to write through the data layer
+INSERT_SCRIPT = """
+from app.data import incidents
+incidents.insert_incident("X-1", "Critical", "Open", "Malware", "written elsewhere")
+"""
+
+
+def critical_count():
+    from app.data.incidents import get_severity_count
+
+    counts = get_severity_count().set_index("severity")["count"]
+    return int(counts.get("Critical", 0))
+
+
+def check_other_process():
+    from app.data.cache import cache_stats
+
+    before = critical_count()
+    critical_count()
+    hits = cache_stats()["hits"]
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT))
+    subprocess.run([sys.executable, "-c", INSERT_SCRIPT], check=True, env=env)
+    after = critical_count()
+    ok = after == before + 1 and hits > 0
+    print(f"[{'ok' if ok else 'FAIL':>4}] write from another process: "
+          f"Critical {before} -> {after}")
+    return ok
+
+
+def check_clear():
+    from app.data.cache import query_cache
+
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait()
+        return "before clear"
+
+    worker = threading.Thread(
+        target=query_cache.get_or_compute, args=("coherence", ("t",), compute)
+    )
+    worker.start()
+    started.wait()
+    query_cache.clear()
+    release.set()
+    worker.join()
+    value = query_cache.get_or_compute("coherence", ("t",), lambda: "after clear")
+    ok = value == "after clear"
+    print(f"[{'ok' if ok else 'FAIL':>4}] result computed across clear(): got {value!r}")
+    return ok
+
+
+def main():
+    sys.path.insert(0, str(PROJECT_ROOT))
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from app.data.db import connect_database
+        from app.data.incidents import insert_incident
+        from app.data.schema import create_all_tables
+
+        conn = connect_database()
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_all_tables(conn)
+        conn.close()
+        for number in range(5):
+            insert_incident(f"C-{number}", "Critical", "Open", "Malware", "seed")
+
+        results = [check_other_process(), check_clear()]
+
+    if not all(results):
+        print("\nThe query cache served stale results")
+        return 1
+    print("\nThe query cache picked up every write")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
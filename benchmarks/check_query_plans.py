@@ -0,0 +1,162 @@
+"""
+Run every data-layer read query through EXPLAIN QUERY PLAN and fail if
+any of them falls back to a full table scan.
+
+Run from the project root:
+    python -m benchmarks.check_query_plans
+"""
+import os
+import re
+import sys
+import tempfile
+
+# Queries that list a whole table on purpose; they are allowed to scan.
+FULL_TABLE_READS = {"get_all_incidents", "get_all_tickets", "get_all_datasets"}
+
+# A plain "SCAN <table>" reads every row; "SCAN <table> USING COVERING
+# INDEX" only reads the (much smaller) index and is acceptable for GROUP BY.
+# "SCAN <fts> VIRTUAL TABLE INDEX n:M..." is an FTS5 MATCH lookup through
+# the full-text index, not a scan.
+FULL_SCAN = re.compile(
+    r"\bSCAN (?:main\.)?(\w+)\b(?! USING (COVERING )?INDEX| VIRTUAL TABLE INDEX \d+:M)"
+)
+
+# A scan in rowid order that feeds a LIMIT directly stops after LIMIT rows
+ROWID_LIMIT = re.compile(r"ORDER BY id( DESC| ASC)?\s+LIMIT", re.IGNORECASE)
+
+
+def is_full_scan(sql, plan):
+    from app.data.aggregates import AGGREGATES
+    from app.data.search import SEARCH_INDEXES
+
+    # Summary tables hold one row per group; scanning them is O(groups).
+    # FTS5 reads its one-row-per-setting _config shadow table on first use.
+    # sqlite_sequence holds one row per AUTOINCREMENT table.
+    summary_tables = {summary for summary, _, _ in AGGREGATES}
+    summary_tables |= {f"{fts}_config" for fts, _, _ in SEARCH_INDEXES}
+    summary_tables.add("sqlite_sequence")
+    scans = [step for step in plan
+             if (match := FULL_SCAN.search(step)) and match.group(1) not in summary_tables]
+    if not scans:
+        return False
+    bounded = ROWID_LIMIT.search(sql) and not any("TEMP B-TREE" in step for step in plan)
+    return not bounded
+
+
+def data_layer_queries():
+    from app.data import datasets, incidents, sessions, snapshots, tickets
+
+    return [
+        (incidents.get_all_incidents, ()),
+        (incidents.get_incidents_page, ()),
+        (incidents.get_incidents_page, (50,)),
+        (incidents.get_incidents_page, (None, 50)),
+        (incidents.get_incident_by_id, (1,)),
+        (incidents.get_incidents_by_type_count, ()),
+        (incidents.get_severity_count, ()),
+        (incidents.filter_incidents, ()),
+        (incidents.filter_incidents, ("High",)),
+        (incidents.filter_incidents, (None, ["Open", "Closed"])),
+        (incidents.filter_incidents, (None, None, "Malware")),
+        (incidents.filter_incidents, (None, None, None, None, "2024-01-01", "2024-02-01")),
+        (incidents.get_incident_filter_options, ()),
+        (incidents.get_incident_trend, ()),
+        (incidents.get_incident_trend, ("week", "category", "2024-01-01", "2024-04-01")),
+        (incidents.get_incident_trend, ("hour", None, "2024-01-01")),
+        (incidents.search_incidents, ("phish",)),
+        (tickets.get_all_tickets, ()),
+        (tickets.get_tickets_page, (50,)),
+        (tickets.get_ticket_by_id, ("T1",)),
+        (tickets.get_priority_count, ()),
+        (tickets.filter_tickets, ()),
+        (tickets.filter_tickets, ("High",)),
+        (tickets.filter_tickets, (None, "Open")),
+        (tickets.filter_tickets, (None, None, None, "IT_Support_A")),
+        (tickets.filter_tickets, (None, None, None, None, "2024-01-01", "2024-02-01")),
+        (tickets.get_ticket_filter_options, ()),
+        (tickets.get_ticket_changes, ()),
+        (tickets.get_ticket_changes, (100,)),
+        (tickets.search_tickets, ("password reset",)),
+        (datasets.get_all_datasets, ()),
+        (datasets.get_datasets_page, (50,)),
+        (datasets.get_dataset_by_id, (1,)),
+        (datasets.get_uploaded_by_count, ()),
+        (sessions.get_session, ("abc",)),
+        # seed() leaves one incident changed since the last export
+        (snapshots.export_snapshot, ("cyber_incidents",)),
+    ]
+
+
+def seed(conn):
+    from app.data.schema import create_all_tables
+
+    create_all_tables(conn)
+    conn.executemany(
+        "INSERT INTO cyber_incidents (incident_id, timestamp, severity, category, status)"
+        " VALUES (?, '2024-01-01 00:00:00', 'High', 'Malware', 'Open')",
+        [(str(i),) for i in range(100)]
+    )
+    conn.executemany(
+        "INSERT INTO it_tickets (ticket_id, priority, status, subject, created_date)"
+        " VALUES (?, 'High', 'Open', 's', '2024-01-01 00:00:00')",
+        [(f"T{i}",) for i in range(100)]
+    )
+    conn.commit()
+
+    from app.data.snapshots import export_snapshot
+
+    export_snapshot("cyber_incidents")
+    conn.execute("UPDATE cyber_incidents SET status = 'Closed' WHERE id = 5")
+    conn.commit()
+
+
+def capture_statements(func, args):
+    from app.data.db import read_connection
+
+    statements = []
+    # Nested read_connection() calls on this thread reuse this connection
+    with read_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            func(*args)
+        finally:
+            conn.set_trace_callback(None)
+    return [sql for sql in statements if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+
+
+def explain(sql):
+    from app.data.db import read_connection
+
+    with read_connection() as conn:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return [row[-1] for row in rows]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from app.data.db import connect_database
+
+        conn = connect_database()
+        seed(conn)
+        conn.close()
+
+        failures = 0
+        for func, args in data_layer_queries():
+            for sql in capture_statements(func, args):
+                plan = explain(sql)
+                allowed = func.__name__ in FULL_TABLE_READS
+                status = "SCAN" if is_full_scan(sql, plan) and not allowed else "ok"
+                if status == "SCAN":
+                    failures += 1
+                print(f"[{status:>4}] {func.__module__}.{func.__name__}: {' | '.join(plan)}")
+
+    if failures:
+        print(f"\n{failures} data-layer queries regressed to a full table scan")
+        return 1
+    print("\nAll data-layer queries use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
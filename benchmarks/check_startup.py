@@ -0,0 +1,117 @@
+"""
+Measure cold-start import time of the CLI and data layer with
+`python -X importtime` and fail if an entry point goes over its budget
+or pulls in a heavy module at import time.
+
+Each entry point is imported in a fresh interpreter `--runs` times; the
+median cumulative import time is compared with the budget.
+
+Run from the project root:
+    python -m benchmarks.check_startup
+    python -m benchmarks.check_startup --budget-ms 150 --runs 9
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must import without paying for pandas, numpy or bcrypt;
+# those are loaded by the functions that use them.
+ENTRY_POINTS = (
+    "main",
+    "auth",
+    "app.data.db",
+    "app.data.schema",
+    "app.data.users",
+    "app.data.incidents",
+    "app.data.tickets",
+    "app.data.datasets",
+    "app.data.sessions",
+    "app.services.user_service",
+    "app.services.password_service",
+    "app.services.session_service",
+    "app.services.ingestion_service",
+    "app.services.sla_service",
+)
+
+HEAVY_MODULES = ("pandas", "numpy", "bcrypt", "pyarrow")
+
+# Median cumulative import time allowed per entry point. pandas alone
+# costs several hundred ms, so importing it eagerly again blows this.
+DEFAULT_BUDGET_MS = 100
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_profile(module):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module: Dotted module name
+
+    Returns:
+        tuple: (cumulative microseconds for `module`, {imported name:
+            self microseconds})
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative = None
+    self_times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        self_times[name] = int(self_us)
+        if not indent and name == module:
+            cumulative = int(cumulative_us)
+    return cumulative, self_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'entry point':38} {'median':>10}  budget {args.budget_ms:.0f} ms")
+    for module in ENTRY_POINTS:
+        timings = []
+        for _ in range(args.runs):
+            cumulative, self_times = import_profile(module)
+            timings.append(cumulative / 1000)
+        median = statistics.median(timings)
+
+        heavy = [name for name in HEAVY_MODULES if name in self_times]
+        problems = []
+        if median > args.budget_ms:
+            problems.append("over budget")
+        if heavy:
+            problems.append(f"imports {', '.join(heavy)}")
+        status = "FAIL" if problems else "ok"
+        if problems:
+            failures += 1
+        print(f"[{status:>4}] {module:31} {median:7.1f} ms  {'; '.join(problems)}")
+        if problems:
+            slowest = sorted(self_times.items(), key=lambda item: -item[1])[:5]
+            for name, self_us in slowest:
+                print(f"{'':9}{name:40} {self_us / 1000:7.1f} ms self")
+
+    if failures:
+        print(f"\n{failures} entry points regressed at import time")
+        return 1
+    print(f"\nAll entry points import within {args.budget_ms:.0f} ms "
+          f"without {', '.join(HEAVY_MODULES)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,413 @@
+"""
+Deterministic synthetic data for scale testing. Generates incidents,
+tickets, datasets and users whose value distributions follow the sample
+exports in DATA/ (category frequencies, hour-of-day profile, date
+ranges, resolution times per priority).
+
+Writes CSVs in the same layout as the exports plus a users.txt into
+<out>/DATA. With --load it also builds <out>/DATA/intelligence_platform.db
+through the normal ingestion pipeline, ready for bench_suite.
+
+The same --rows and --seed always produce byte-identical files.
+
+Run from the project root:
+    python -m benchmarks.generate_data --rows 10k --out bench_data/10k --load
+    python -m benchmarks.generate_data --rows 1m --out bench_data/1m --load
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Named sizes accepted by --rows (a plain integer works too)
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Rows generated and written per step; also part of the seed, so
+# changing it changes the output
+CHUNK_ROWS = 100_000
+
+TABLES = ("incidents", "tickets", "datasets", "users")
+
+# Output file, target table and seed offset per table
+OUTPUTS = {
+    "incidents": ("cyber_incidents.csv", "cyber_incidents", 1),
+    "tickets": ("it_tickets.csv", "it_tickets", 2),
+    "datasets": ("datasets_metadata.csv", "datasets_metadata", 3),
+    "users": ("users.txt", "users", 4),
+}
+
+# Description vocabulary so full-text search sees realistic term spread
+INCIDENT_TERMS = {
+    "Phishing": ["credential harvesting email", "spoofed invoice attachment",
+                 "malicious link reported by user", "fake password reset page"],
+    "Malware": ["ransomware detected on endpoint", "trojan quarantined by antivirus",
+                "suspicious powershell execution", "cryptominer process found"],
+    "DDoS": ["volumetric attack on web server", "syn flood against load balancer",
+             "dns amplification traffic spike"],
+    "Misconfiguration": ["public storage bucket exposed", "firewall rule allows any",
+                         "expired certificate on gateway"],
+    "Unauthorized Access": ["login from unusual country", "privilege escalation attempt",
+                            "brute force against vpn account"],
+}
+GENERIC_INCIDENT_TERMS = ["anomalous activity detected", "alert raised by monitoring"]
+
+TICKET_TOPICS = ["Password reset", "VPN connection", "Printer offline", "Laptop slow",
+                 "Email sync", "Software install", "Access request", "Network drop",
+                 "Account lockout", "Monitor flicker"]
+TICKET_DETAILS = ["after update", "since this morning", "for whole team",
+                  "on new laptop", "intermittently", "when working remotely"]
+
+# Users have no role column in the export
+ROLE_WEIGHTS = {"user": 0.9, "analyst": 0.08, "admin": 0.02}
+
+# Every generated user gets this password, so benchmarks can log in
+USER_PASSWORD = "Bench-Passw0rd"
+
+# Date columns are written like the exports: datasets carry a date only
+DATE_FORMATS = {"datasets": "%Y-%m-%d"}
+DEFAULT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+BCRYPT_ALPHABET = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def _frequencies(series):
+    counts = series.value_counts()
+    return list(counts.index), (counts / counts.sum()).to_numpy()
+
+
+def _hour_weights(timestamps):
+    hours = timestamps.dt.hour.value_counts().reindex(range(24), fill_value=0)
+    # Smooth so hours absent from a small sample still occur
+    weights = hours.to_numpy(dtype=float) + 1.0
+    return weights / weights.sum()
+
+
+def _epoch_days(timestamps):
+    days = (timestamps.dt.normalize() - pd.Timestamp("1970-01-01")) // pd.Timedelta(days=1)
+    return int(days.min()), int(days.max())
+
+
+def profile_samples(sample_dir):
+    """
+    Derive value distributions from the sample exports.
+
+    Args:
+        sample_dir: Directory holding the sample CSVs
+
+    Returns:
+        dict: Per-table distributions used by the generators
+    """
+    sample_dir = Path(sample_dir)
+    incidents = pd.read_csv(sample_dir / "cyber_incidents.csv")
+    tickets = pd.read_csv(sample_dir / "it_tickets.csv")
+    datasets = pd.read_csv(sample_dir / "datasets_metadata.csv")
+
+    incident_times = pd.to_datetime(incidents["timestamp"], format="mixed")
+    ticket_times = pd.to_datetime(tickets["created_at"], format="mixed")
+    upload_dates = pd.to_datetime(datasets["upload_date"], format="mixed")
+
+    return {
+        "incidents": {
+            "severity": _frequencies(incidents["severity"]),
+            "category": _frequencies(incidents["category"]),
+            "status": _frequencies(incidents["status"]),
+            "days": _epoch_days(incident_times),
+            "hours": _hour_weights(incident_times),
+        },
+        "tickets": {
+            "priority": _frequencies(tickets["priority"]),
+            "status": _frequencies(tickets["status"]),
+            "assigned_to": _frequencies(tickets["assigned_to"]),
+            "days": _epoch_days(ticket_times),
+            "hours": _hour_weights(ticket_times),
+            "resolution_hours": {
+                priority: group.to_numpy()
+                for priority, group in tickets.groupby("priority")["resolution_time_hours"]
+            },
+        },
+        "datasets": {
+            "names": sorted(datasets["name"]),
+            "uploaded_by": _frequencies(datasets["uploaded_by"]),
+            "rows": (int(datasets["rows"].min()), int(datasets["rows"].max())),
+            "columns": (int(datasets["columns"].min()), int(datasets["columns"].max())),
+            "days": _epoch_days(upload_dates),
+        },
+    }
+
+
+def _choice(rng, distribution, size):
+    values, weights = distribution
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=weights)]
+
+
+def _timestamps(rng, days, hours, size):
+    first, last = days
+    day = rng.integers(first, last + 1, size=size)
+    hour = rng.choice(24, size=size, p=hours)
+    second = rng.integers(0, 3600, size=size)
+    seconds = day * 86_400 + hour * 3600 + second
+    return pd.to_datetime(seconds, unit="s")
+
+
+def _phrases(rng, terms, size):
+    terms = np.asarray(terms, dtype=object)
+    return terms[rng.integers(0, len(terms), size=size)]
+
+
+def incidents_chunk(rng, profile, start, size):
+    """
+    Generate incident rows [start, start + size) in the export layout.
+
+    Args:
+        rng: numpy Generator
+        profile: profile_samples()["incidents"]
+        start: Index of the first row
+        size: Rows to generate
+
+    Returns:
+        pandas.DataFrame: incident_id, timestamp, severity, category,
+            status and description columns
+    """
+    category = _choice(rng, profile["category"], size)
+    description = np.empty(size, dtype=object)
+    for name in np.unique(category):
+        rows = category == name
+        terms = INCIDENT_TERMS.get(name, GENERIC_INCIDENT_TERMS)
+        description[rows] = _phrases(rng, terms, int(rows.sum()))
+    host = rng.integers(1, 50_000, size=size).astype(str)
+
+    return pd.DataFrame({
+        "incident_id": np.arange(start, start + size) + 1000,
+        "timestamp": _timestamps(rng, profile["days"], profile["hours"], size),
+        "severity": _choice(rng, profile["severity"], size),
+        "category": category,
+        "status": _choice(rng, profile["status"], size),
+        "description": category + ": " + description + " on host" + host,
+    })
+
+
+def tickets_chunk(rng, profile, start, size):
+    """
+    Generate ticket rows [start, start + size) in the export layout.
+
+    Args:
+        rng: numpy Generator
+        profile: profile_samples()["tickets"]
+        start: Index of the first row
+        size: Rows to generate
+
+    Returns:
+        pandas.DataFrame: ticket_id, priority, description, status,
+            assigned_to, created_at and resolution_time_hours columns
+    """
+    priority = _choice(rng, profile["priority"], size)
+    hours = np.empty(size, dtype=np.int64)
+    for name in np.unique(priority):
+        rows = priority == name
+        observed = profile["resolution_hours"][name]
+        # Resample the observed times with +-15% jitter
+        sampled = rng.choice(observed, size=int(rows.sum()))
+        jitter = rng.uniform(0.85, 1.15, size=sampled.size)
+        hours[rows] = np.maximum(1, np.rint(sampled * jitter)).astype(np.int64)
+
+    description = (_phrases(rng, TICKET_TOPICS, size) + " issue "
+                   + _phrases(rng, TICKET_DETAILS, size))
+    return pd.DataFrame({
+        "ticket_id": np.arange(start, start + size) + 2000,
+        "priority": priority,
+        "description": description,
+        "status": _choice(rng, profile["status"], size),
+        "assigned_to": _choice(rng, profile["assigned_to"], size),
+        "created_at": _timestamps(rng, profile["days"], profile["hours"], size),
+        "resolution_time_hours": hours,
+    })
+
+
+def datasets_chunk(rng, profile, start, size):
+    """
+    Generate dataset rows [start, start + size) in the export layout.
+
+    Args:
+        rng: numpy Generator
+        profile: profile_samples()["datasets"]
+        start: Index of the first row
+        size: Rows to generate
+
+    Returns:
+        pandas.DataFrame: dataset_id, name, rows, columns, uploaded_by
+            and upload_date columns
+    """
+    ids = np.arange(start, start + size) + 1
+    low, high = profile["rows"]
+    first, last = profile["days"]
+    return pd.DataFrame({
+        "dataset_id": ids,
+        "name": _phrases(rng, profile["names"], size) + "_" + ids.astype(str),
+        # Dataset sizes span orders of magnitude: log-uniform
+        "rows": np.rint(np.exp(rng.uniform(np.log(low), np.log(high), size=size))).astype(np.int64),
+        "columns": rng.integers(profile["columns"][0], profile["columns"][1] + 1, size=size),
+        "uploaded_by": _choice(rng, profile["uploaded_by"], size),
+        "upload_date": pd.to_datetime(rng.integers(first, last + 1, size=size), unit="D"),
+    })
+
+
+def users_chunk(rng, start, size, password_hash):
+    """
+    Generate user rows [start, start + size).
+
+    Args:
+        rng: numpy Generator
+        start: Index of the first row
+        size: Rows to generate
+        password_hash: Hash of USER_PASSWORD shared by every user
+
+    Returns:
+        pandas.DataFrame: username, password_hash and role columns
+    """
+    roles = (list(ROLE_WEIGHTS), np.array(list(ROLE_WEIGHTS.values())))
+    return pd.DataFrame({
+        "username": "user" + pd.Series(np.arange(start, start + size)).astype(str),
+        "password_hash": password_hash,
+        "role": _choice(rng, roles, size),
+    })
+
+
+def shared_password_hash(seed):
+    """
+    Hash USER_PASSWORD once for every generated user, at the current cost
+    policy, with a salt derived from the seed so users.txt is
+    reproducible. Hashing millions of passwords individually would take
+    days and adds nothing to the data.
+
+    Args:
+        seed: Random seed
+
+    Returns:
+        str: bcrypt hash
+    """
+    import bcrypt
+
+    from app.services.password_service import BCRYPT_ROUNDS
+
+    rng = np.random.default_rng([seed, 0])
+    # 22 salt characters; the last one may only carry 4 bits
+    salt = "".join(BCRYPT_ALPHABET[i] for i in rng.integers(0, 64, size=21)) + "."
+    prefix = f"$2b${BCRYPT_ROUNDS:02d}$"
+    return bcrypt.hashpw(USER_PASSWORD.encode("utf-8"), (prefix + salt).encode("ascii")).decode("utf-8")
+
+
+def generate(out_dir, rows, seed=0, tables=TABLES, sample_dir=PROJECT_ROOT / "DATA"):
+    """
+    Write synthetic exports for `tables` into out_dir/DATA.
+
+    Args:
+        out_dir: Output directory
+        rows: Rows per table
+        seed: Random seed
+        tables: Subset of TABLES
+        sample_dir: Directory holding the sample CSVs to profile
+
+    Returns:
+        dict: table -> path written
+    """
+    profile = profile_samples(sample_dir)
+    data_dir = Path(out_dir) / "DATA"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    password_hash = shared_password_hash(seed)
+
+    written = {}
+    for table in tables:
+        file_name, _, offset = OUTPUTS[table]
+        path = data_dir / file_name
+        with open(path, "w", newline="") as f:
+            for index, start in enumerate(range(0, rows, CHUNK_ROWS)):
+                size = min(CHUNK_ROWS, rows - start)
+                rng = np.random.default_rng([seed, offset, index])
+                if table == "users":
+                    chunk = users_chunk(rng, start, size, password_hash)
+                    # auth.py's users.txt format
+                    f.writelines(chunk["username"] + ":" + chunk["password_hash"] + "\n")
+                    continue
+                make_chunk = {"incidents": incidents_chunk, "tickets": tickets_chunk,
+                              "datasets": datasets_chunk}[table]
+                chunk = make_chunk(rng, profile[table], start, size)
+                chunk.to_csv(f, header=index == 0, index=False,
+                             date_format=DATE_FORMATS.get(table, DEFAULT_DATE_FORMAT))
+        written[table] = path
+    return written
+
+
+def load(out_dir, rows, seed=0, tables=TABLES):
+    """
+    Build out_dir/DATA/intelligence_platform.db from generated files.
+
+    Args:
+        out_dir: Directory passed to generate()
+        rows: Rows per table, as passed to generate()
+        seed: Random seed, as passed to generate()
+        tables: Subset of TABLES
+
+    Returns:
+        list: load_csvs() reports
+    """
+    os.chdir(out_dir)
+    from app.data.db import connect_database, insert_many
+    from app.data.schema import create_all_tables
+    from app.services.ingestion_service import load_csvs
+
+    conn = connect_database()
+    create_all_tables(conn)
+    conn.close()
+
+    sources = [(f"DATA/{OUTPUTS[table][0]}", OUTPUTS[table][1])
+               for table in tables if table != "users"]
+    reports = load_csvs(sources)
+
+    if "users" in tables:
+        # users.txt has no role column: rebuild the rows from the same seeds
+        with open("DATA/users.txt") as f:
+            password_hash = f.readline().rstrip("\n").split(":", 1)[1]
+        offset = OUTPUTS["users"][2]
+        for index, start in enumerate(range(0, rows, CHUNK_ROWS)):
+            rng = np.random.default_rng([seed, offset, index])
+            chunk = users_chunk(rng, start, min(CHUNK_ROWS, rows - start), password_hash)
+            insert_many("users", tuple(chunk.columns),
+                        chunk.itertuples(index=False, name=None))
+    return reports
+
+
+def parse_rows(value):
+    return SIZES.get(value.lower()) or int(value.replace("_", ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_rows, default="10k",
+                        help=f"rows per table: {', '.join(SIZES)} or an integer")
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tables", nargs="+", choices=TABLES, default=list(TABLES))
+    parser.add_argument("--load", action="store_true",
+                        help="also build the SQLite database from the generated files")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for table, path in generate(args.out, args.rows, args.seed, args.tables).items():
+        print(f"{table:10} {path} ({path.stat().st_size / 1e6:,.1f} MB)")
+    print(f"Generated {args.rows:,} rows per table in {time.perf_counter() - start:.1f}s")
+
+    if args.load:
+        start = time.perf_counter()
+        for report in load(args.out.resolve(), args.rows, args.seed, args.tables):
+            print(f"{report['table']:20} {report['rows_written']:,} rows written")
+        print(f"Loaded in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
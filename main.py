@@ -1,86 +1,140 @@
 # main.py
 
-import pandas as pd
+import argparse
+import time
+from contextlib import contextmanager
+
 from app.data.db import connect_database
 from app.data import schema, incidents
-from app.data.datasets import load_csv_to_table
+from app.data.snapshots import refresh_snapshots
+from app.services.ingestion_service import INGEST_WORKERS, load_csvs
 from app.services.user_service import migrate_users_from_file
 
-def main():
-    print("--- ⚙️  Starting Data Platform Setup ---")
-    
-    # 1. Connect to the Database
-    conn = connect_database()
-    print("Database connection established.")
-    
-    # 2. Initialize the Schema (Create Tables)
-    schema.create_all_tables(conn)
-    
-    # 3. Migrate Users (Service Layer Logic)
-    migrate_users_from_file(conn)
-    
-    # 4. Load Data (Dataset Utility)
-    # Load Datasets Metadata
-    load_csv_to_table(
-        conn, 
-        csv_filename="Datasets_Metadata.csv", 
-        table_name="datasets_metadata", 
-        if_exists_policy='replace'
-    )
-    
-    # Load IT Tickets Data
-    load_csv_to_table(
-        conn, 
-        csv_filename="IT_Tickets.csv", 
-        table_name="it_tickets", 
-        if_exists_policy='replace'
-    )
-    
+# Source exports loaded on setup: (CSV file, table)
+CSV_SOURCES = [
+    ("DATA/cyber_incidents.csv", "cyber_incidents"),
+    ("DATA/datasets_metadata.csv", "datasets_metadata"),
+    ("DATA/it_tickets.csv", "it_tickets"),
+]
+
+
+@contextmanager
+def stage(timings, name):
+    """
+    Time a setup stage and record it in `timings`.
+
+    Args:
+        timings: List collecting (stage name, seconds)
+        name: Stage name for the report
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append((name, time.perf_counter() - start))
+
+
+def crud_smoke_test():
+    """
+    Create, read, update and delete a throwaway incident.
+    """
     print("\n--- 🛠️  Testing Incident CRUD Operations ---")
-    
+
     # A. CREATE: Insert a new incident
     incident_id = incidents.insert_incident(
-        conn,
-        date="2025-10-22",
-        incident_type="DDoS Attack",
+        incident_id="SMOKE-TEST",
         severity="High",
         status="Investigating",
+        category="DDoS Attack",
         description="External volumetric attack targeting web server.",
         reported_by="SOC Team"
     )
     print(f"✅ New Incident created with ID: {incident_id}")
-    
-    # B. READ: Retrieve all incidents (as a Pandas DataFrame)
-    print("\n**Current Incidents List:**")
-    all_incidents_df = incidents.get_all_incidents(conn)
-    if not all_incidents_df.empty:
-        print(all_incidents_df.head(5).to_markdown(index=False)) # Display first 5 rows
-    else:
-        print("No incidents found.")
-        
+
+    # B. READ: Retrieve the new incident
+    incident = incidents.get_incident_by_id(incident_id)
+    print(f"✅ Read back: {incident.category}, {incident.severity}, {incident.status}")
+
     # C. UPDATE: Change the status of the new incident
-    rows_updated = incidents.update_incident_status(
-        conn, 
-        incident_id=incident_id, 
-        new_status="Mitigated"
-    )
-    print(f"\n✅ Updated {rows_updated} row(s) for Incident ID {incident_id}. New Status: Mitigated")
-    
+    rows_updated = incidents.update_incident_status(incident_id, "Mitigated")
+    print(f"✅ Updated {rows_updated} row(s) for Incident ID {incident_id}. New Status: Mitigated")
+
     # D. DELETE: Remove the incident
-    rows_deleted = incidents.delete_incident(conn, incident_id=incident_id)
+    rows_deleted = incidents.delete_incident(incident_id)
     print(f"✅ Deleted {rows_deleted} row(s). Incident ID {incident_id} removed.")
-    
+
     # E. Final Read to confirm deletion
-    print("\n**Incidents List after Deletion:**")
-    final_incidents_df = incidents.get_all_incidents(conn)
-    if not final_incidents_df.empty:
-        print(final_incidents_df.head(5).to_markdown(index=False))
-    else:
-        print("All incidents cleared.")
-        
-    # 5. Close Connection
-    conn.close()
-    print("\n--- 🛑 Setup and Testing Complete. Database connection closed. ---")
+    if incidents.get_incident_by_id(incident_id) is None:
+        print("✅ Incident no longer present.")
+
+
+def print_timing_report(timings, reports, snapshots):
+    """
+    Print how long each setup stage, each CSV load and each snapshot
+    export took.
+
+    Args:
+        timings: List of (stage name, seconds)
+        reports: load_csvs() reports
+        snapshots: refresh_snapshots() reports
+    """
+    print("\n--- ⏱️  Setup Timing Report ---")
+    for name, seconds in timings:
+        print(f"{name:<24} {seconds:8.2f} s")
+    print(f"{'total':<24} {sum(seconds for _, seconds in timings):8.2f} s")
+
+    print(f"\n{'table':<20} {'status':<10} {'rows':>10} {'written':>10} "
+          f"{'read':>8} {'parse':>8} {'write':>8} {'rows/sec':>12}")
+    for report in reports:
+        print(f"{report['table']:<20} {report['status']:<10} {report['rows']:>10,} "
+              f"{report['rows_written']:>10,} {report['read_seconds']:>7.2f}s "
+              f"{report['parse_seconds']:>7.2f}s {report['write_seconds']:>7.2f}s "
+              f"{report['rows_per_sec']:>12,.0f}")
+
+    print(f"\n{'snapshot':<20} {'mode':<10} {'rows':>10} {'seconds':>8}")
+    for report in snapshots:
+        print(f"{report['table']:<20} {report['mode']:<10} {report['rows']:>10,} "
+              f"{report['seconds']:>7.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set up the platform database.")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help="processes parsing CSV files (default: all cores)")
+    parser.add_argument("--force", action="store_true",
+                        help="reload every CSV even if unchanged since the last load")
+    parser.add_argument("--smoke-test", action="store_true",
+                        help="run the incident CRUD smoke test after setup")
+    args = parser.parse_args()
+
+    print("--- ⚙️  Starting Data Platform Setup ---")
+    timings = []
+
+    # 1. Connect to the Database and initialize the Schema (Create Tables)
+    with stage(timings, "schema"):
+        conn = connect_database()
+        schema.create_all_tables(conn)
+
+    # 2. Migrate Users (Service Layer Logic)
+    with stage(timings, "users"):
+        migrate_users_from_file(conn)
+        conn.close()
+
+    # 3. Load Data: parse every CSV in parallel, one writer applies them
+    with stage(timings, "csv load"):
+        reports = load_csvs(CSV_SOURCES, workers=args.workers, force=args.force)
+
+    # 4. Export columnar snapshots of the freshly loaded tables
+    with stage(timings, "snapshots"):
+        snapshots = refresh_snapshots()
+
+    # 5. Optional CRUD smoke test
+    if args.smoke_test:
+        with stage(timings, "crud smoke test"):
+            crud_smoke_test()
+
+    print_timing_report(timings, reports, snapshots)
+    print("\n--- 🛑 Setup Complete. ---")
 
 if __name__ == "__main__":
     main()
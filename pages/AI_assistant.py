@@ -1,8 +1,10 @@
 import streamlit as st
 from google import genai
+from app.ui.session import show_current_user
 
 # Page configuration
 st.set_page_config(page_title='CST1510 CW2', page_icon="img/mdi.jpg")
+user = show_current_user()
 st.title("ASK ME ANYTHING")
 
 # Retrieve the private key from Streamlit secrets
@@ -1,34 +1,22 @@
 import streamlit as st
 import pandas as pd
-from pathlib import Path
 
 # Import your modules
 from app.data.db import connect_database
 from app.data.schema import create_all_tables
-from app.services.user_services import migrate_users_from_file
-from app.data.datasets import (insert_dataset, get_all_datasets, update_dataset, delete_dataset, get_dataset_by_id, get_uploaded_by_count())
+from app.data.snapshots import start_snapshot_refresher
+from app.services.user_service import migrate_users_from_file
+from app.services.ingestion_service import load_csv_to_table
+from app.ui.paging import paged_dataframe
+from app.ui.query_stats import query_stats_panel
+from app.ui.session import show_current_user
+from app.data.datasets import (insert_dataset, get_datasets_page, update_dataset, delete_dataset, get_dataset_by_id, get_uploaded_by_count)
 
 st.set_page_config(page_title='Datasets Metadata'
                     )
-
-def load_csv_to_table(csv_path, table_name):
-    csv_path = Path(csv_path)
-
-    if not csv_path.exists():
-        st.warning(f"CSV file not found: {csv_path}")
-        return 0
-
-    try:
-        df = pd.read_csv(csv_path)
-        conn = connect_database()
-        df.to_sql(table_name, conn, if_exists='append', index=False)
-        conn.close()
-        st.success(f"Loaded {len(df)} rows into {table_name}")
-        return len(df)
-    except Exception as e:
-        st.error(f"Error loading {csv_path.name}: {e}")
-        return 0
-
+user = show_current_user()
+# Keep the columnar snapshots behind the analytics views current
+start_snapshot_refresher()
 
 def setup_database():
     st.info("STARTING DATABASE SETUP")
@@ -37,16 +25,24 @@ def setup_database():
     st.write("### [1/4] Creating database tables...")
     conn = connect_database()
     create_all_tables(conn)
-    conn.close()
 
     # Step 2: Migrate users
     st.write("### [2/4] Migrating users from users.txt...")
-    migrate_users_from_file()
+    migrate_users_from_file(conn)
+    conn.close()
     st.success("Users migrated successfully!")
 
     # Step 3: Load CSV data
     st.write("### [3/4] Loading CSV data...")
-    load_csv_to_table("DATA/datasets_metadata.csv", "datasets_metadata")
+    try:
+        report = load_csv_to_table("DATA/datasets_metadata.csv", "datasets_metadata")
+        if report["status"] == "unchanged":
+            st.info("datasets_metadata source file unchanged since last load, skipped")
+        else:
+            st.success(f"Wrote {report['rows_written']} new or changed rows to datasets_metadata "
+                       f"({report['rows_per_sec']:,.0f} rows/sec)")
+    except Exception as e:
+        st.error(f"Error loading DATA/datasets_metadata.csv: {e}")
 
     # Step 4: Verify
     st.write("### [4/4] Verifying database setup...")
@@ -78,9 +74,8 @@ def demo_crud_operations():
         st.success(f"Created dataset #{dataset}")
 
     st.write("#### View All tickets")
-    if st.button("Fetch Tickets"):
-        df = get_all_datasets()
-        st.dataframe(df)
+    if st.toggle("Fetch Datasets"):
+        paged_dataframe("datasets_crud", get_datasets_page)
 
     st.write("#### Update Dataset Status")
     dataset_id_update = st.number_input("Incident ID to Update", min_value=1)
@@ -99,8 +94,7 @@ def demo_crud_operations():
 def demo_analytics():
     st.subheader("Analytics Demo")
     st.write("#### All Datasets")
-    df_datasets = get_all_datasets()
-    st.dataframe(df_datasets)
+    paged_dataframe("datasets_analytics", get_datasets_page)
 
 def chart_analysis():
     data = get_uploaded_by_count()
@@ -115,6 +109,7 @@ with tabs[2]:
     st.header("Database Setup")
     if st.button("Run Setup"):
         setup_database()
+    query_stats_panel()
 
 with tabs[1]:
     st.header("CRUD Operations on Datasets")
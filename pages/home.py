@@ -1,6 +1,8 @@
 import streamlit as st
+from app.ui.session import show_current_user
 
 st.set_page_config(page_title='Home')
+user = show_current_user()
 
 st.header("Home Page")
 st.write("Choose which dashboard you want to be redirected to:")
@@ -1,38 +1,30 @@
 import streamlit as st
 import pandas as pd
-from pathlib import Path
+from datetime import timedelta
 
 # Import your modules
+from app.data.async_queries import fetch_all
 from app.data.db import connect_database
 from app.data.schema import create_all_tables
-from app.services.user_services import migrate_users_from_file
+from app.data.snapshots import start_snapshot_refresher
+from app.services.user_service import migrate_users_from_file
+from app.services.ingestion_service import load_csv_to_table
+from app.ui.paging import paged_dataframe
+from app.ui.query_stats import query_stats_panel
+from app.ui.session import show_current_user
 from app.data.incidents import (
-    insert_incident, get_all_incidents, update_incident_status,
-    delete_incident, get_incidents_by_type_count, get_severity_count
+    insert_incident, get_incidents_page, update_incident_status,
+    delete_incident, get_incidents_by_type_count, get_severity_count,
+    filter_incidents, get_incident_filter_options, INCIDENT_SORT_COLUMNS,
+    get_incident_trend, TREND_BUCKETS, search_incidents
 )
 
 st.set_page_config(page_title='Cyber Incidents',
                    page_icon="img/mdi.jpg"
                     )
-
-def load_csv_to_table(csv_path, table_name):
-    csv_path = Path(csv_path)
-
-    if not csv_path.exists():
-        st.warning(f"CSV file not found: {csv_path}")
-        return 0
-
-    try:
-        df = pd.read_csv(csv_path)
-        conn = connect_database()
-        df.to_sql(table_name, conn, if_exists='append', index=False)
-        conn.close()
-        st.success(f"Loaded {len(df)} rows into {table_name}")
-        return len(df)
-    except Exception as e:
-        st.error(f"Error loading {csv_path.name}: {e}")
-        return 0
-
+user = show_current_user()
+# Keep the columnar snapshots behind the analytics views current
+start_snapshot_refresher()
 
 def setup_database():
     st.info("STARTING DATABASE SETUP")
@@ -41,16 +33,24 @@ def setup_database():
     st.write("### [1/4] Creating database tables...")
     conn = connect_database()
     create_all_tables(conn)
-    conn.close()
 
     # Step 2: Migrate users
     st.write("### [2/4] Migrating users from users.txt...")
-    migrate_users_from_file()
+    migrate_users_from_file(conn)
+    conn.close()
     st.success("Users migrated successfully!")
 
     # Step 3: Load CSV data
     st.write("### [3/4] Loading CSV data...")
-    load_csv_to_table("DATA/cyber_incidents.csv", "cyber_incidents")
+    try:
+        report = load_csv_to_table("DATA/cyber_incidents.csv", "cyber_incidents")
+        if report["status"] == "unchanged":
+            st.info("cyber_incidents source file unchanged since last load, skipped")
+        else:
+            st.success(f"Wrote {report['rows_written']} new or changed rows to cyber_incidents "
+                       f"({report['rows_per_sec']:,.0f} rows/sec)")
+    except Exception as e:
+        st.error(f"Error loading DATA/cyber_incidents.csv: {e}")
 
     # Step 4: Verify
     st.write("### [4/4] Verifying database setup...")
@@ -84,9 +84,8 @@ def demo_crud_operations():
         st.success(f"Created incident #{incident_id}")
 
     st.write("#### View All Incidents")
-    if st.button("Fetch Incidents"):
-        df = get_all_incidents()
-        st.dataframe(df)
+    if st.toggle("Fetch Incidents"):
+        paged_dataframe("incidents", get_incidents_page)
 
     st.write("#### Update Incident Status")
     incident_id_update = st.number_input("Incident ID to Update", min_value=1)
@@ -102,17 +101,54 @@ def demo_crud_operations():
         st.success(f"Deleted {rows} row(s)")
 
 
-def demo_analytics():
+def demo_analytics(df_incidents_id):
     st.subheader("Analytics Demo")
 
     st.write("#### Incidents by ID")
-    df_incidents_id = get_incidents_by_type_count()
     st.dataframe(df_incidents_id)
 
-def chart_analysis():
-    data = get_severity_count()
+def search_view():
+    st.subheader("Search Incidents")
+    text = st.text_input("Search incident descriptions", key="incident_search", placeholder="e.g. phishing email")
+    if text.strip():
+        results = search_incidents(text)
+        st.caption(f"{len(results)} best matches")
+        st.dataframe(results, hide_index=True)
+
+def filter_view(options):
+    st.subheader("Filter Incidents")
+
+    col1, col2, col3 = st.columns(3)
+    severity = col1.multiselect("Severity", options["severity"])
+    status = col2.multiselect("Status", options["status"])
+    category = col3.multiselect("Category", options["category"])
+
+    col4, col5, col6 = st.columns(3)
+    dates = col4.date_input("Date range", value=(), key="incident_dates")
+    order_by = col5.selectbox("Sort by", sorted(INCIDENT_SORT_COLUMNS), index=sorted(INCIDENT_SORT_COLUMNS).index("timestamp"))
+    limit = col6.number_input("Max rows", min_value=1, max_value=10_000, value=100)
+
+    start = dates[0] if len(dates) > 0 else None
+    end = dates[1] + timedelta(days=1) if len(dates) > 1 else None
+    df = filter_incidents(severity=severity, status=status, category=category,
+                          start=start, end=end, order_by=order_by, limit=limit)
+    st.dataframe(df)
+
+def chart_analysis(data):
     st.bar_chart(data, x="severity", y = "count")
 
+def trend_analysis():
+    st.subheader("Incident trend")
+    col1, col2, col3 = st.columns(3)
+    bucket = col1.selectbox("Bucket", list(TREND_BUCKETS), index=1)
+    split_by = col2.selectbox("Split by", ["severity", "category", "none"])
+    dates = col3.date_input("Date range", value=(), key="trend_dates")
+
+    start = dates[0] if len(dates) > 0 else None
+    end = dates[1] + timedelta(days=1) if len(dates) > 1 else None
+    trend = get_incident_trend(bucket, None if split_by == "none" else split_by, start, end)
+    st.line_chart(trend)
+
 
 st.title("Cyber Platform Dashboard")
 
@@ -122,14 +158,24 @@ with tabs[2]:
     st.header("Database Setup")
     if st.button("Run Setup"):
         setup_database()
+    query_stats_panel()
 
 with tabs[1]:
     st.header("Incidents Dashboard with modification options")
     demo_crud_operations()
 
 with tabs[0]:
+    # Independent queries run concurrently instead of one after another
+    results = fetch_all({
+        "severity": (get_severity_count,),
+        "by_type": (get_incidents_by_type_count,),
+        "filter_options": (get_incident_filter_options,),
+    })
     st.header("Chart Analysis")
     st.subheader("Count of each severity")
-    chart_analysis()
+    chart_analysis(results["severity"])
+    trend_analysis()
     st.header("Incidents Analysis")
-    demo_analytics()
+    search_view()
+    filter_view(results["filter_options"])
+    demo_analytics(results["by_type"])
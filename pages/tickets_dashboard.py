@@ -1,34 +1,29 @@
 import streamlit as st
 import pandas as pd
-from pathlib import Path
+from datetime import timedelta
 
 # Import your modules
+from app.data.async_queries import fetch_all
 from app.data.db import connect_database
 from app.data.schema import create_all_tables
-from app.services.user_services import register_user, login_user, migrate_users_from_file
-from app.data.tickets import (insert_ticket, get_all_tickets, update_ticket_status, delete_ticket, get_ticket_by_id, get_priority_count())
+from app.data.snapshots import start_snapshot_refresher
+from app.services.user_service import migrate_users_from_file
+from app.services.ingestion_service import load_csv_to_table
+from app.ui.paging import paged_dataframe
+from app.ui.query_stats import query_stats_panel
+from app.ui.session import show_current_user
+from app.data.tickets import (insert_ticket, get_tickets_page, update_ticket_status, delete_ticket, get_ticket_by_id, get_priority_count,
+                              filter_tickets, get_ticket_filter_options, TICKET_SORT_COLUMNS,
+                              search_tickets)
+from app.services.sla_service import get_sla_report, start_sla_tracker
 
 st.set_page_config(page_title='It Tickets'
                     )
-
-def load_csv_to_table(csv_path, table_name):
-    csv_path = Path(csv_path)
-
-    if not csv_path.exists():
-        st.warning(f"CSV file not found: {csv_path}")
-        return 0
-
-    try:
-        df = pd.read_csv(csv_path)
-        conn = connect_database()
-        df.to_sql(table_name, conn, if_exists='append', index=False)
-        conn.close()
-        st.success(f"Loaded {len(df)} rows into {table_name}")
-        return len(df)
-    except Exception as e:
-        st.error(f"Error loading {csv_path.name}: {e}")
-        return 0
-
+user = show_current_user()
+# Keep the columnar snapshots behind the analytics views current
+start_snapshot_refresher()
+# Build the SLA report now rather than on the first visit to the SLA view
+start_sla_tracker()
 
 def setup_database():
     st.info("STARTING DATABASE SETUP")
@@ -37,16 +32,24 @@ def setup_database():
     st.write("### [1/4] Creating database tables...")
     conn = connect_database()
     create_all_tables(conn)
-    conn.close()
 
     # Step 2: Migrate users
     st.write("### [2/4] Migrating users from users.txt...")
-    migrate_users_from_file()
+    migrate_users_from_file(conn)
+    conn.close()
     st.success("Users migrated successfully!")
 
     # Step 3: Load CSV data
     st.write("### [3/4] Loading CSV data...")
-    load_csv_to_table("DATA/it_tickets.csv", "it_tickets")
+    try:
+        report = load_csv_to_table("DATA/it_tickets.csv", "it_tickets")
+        if report["status"] == "unchanged":
+            st.info("it_tickets source file unchanged since last load, skipped")
+        else:
+            st.success(f"Wrote {report['rows_written']} new or changed rows to it_tickets "
+                       f"({report['rows_per_sec']:,.0f} rows/sec)")
+    except Exception as e:
+        st.error(f"Error loading DATA/it_tickets.csv: {e}")
 
     # Step 4: Verify
     st.write("### [4/4] Verifying database setup...")
@@ -79,9 +82,8 @@ def demo_crud_operations():
         st.success(f"Created ticket #{ticket}")
 
     st.write("#### View All Tickets")
-    if st.button("Fetch Tickets"):
-        df = get_all_tickets()
-        st.dataframe(df)
+    if st.toggle("Fetch Tickets"):
+        paged_dataframe("tickets_crud", get_tickets_page)
 
     st.write("#### Update Ticket Status")
     incident_id_update = st.number_input("Incident ID to Update", min_value=1)
@@ -97,37 +99,96 @@ def demo_crud_operations():
         st.success(f"Deleted {rows} row(s)")
 
 
-def demo_analytics():
+def demo_analytics(ticket):
     st.subheader("Analytics Demo")
 
     st.write("#### All Tickets")
-    df_tickets = get_all_tickets()
-    st.dataframe(df_tickets)
+    paged_dataframe("tickets_analytics", get_tickets_page)
 
     st.write("#### Tickets by ID")
-    df_ticket_id = get_ticket_by_id(2008)
-    st.dataframe(df_ticket_id)
-
-def chart_analysis():
-    data = get_priority_count()
+    if ticket is not None:
+        st.dataframe(pd.DataFrame([ticket._asdict()]), hide_index=True)
+
+def search_view():
+    st.subheader("Search Tickets")
+    text = st.text_input("Search ticket subjects and descriptions", key="ticket_search", placeholder="e.g. password reset")
+    if text.strip():
+        results = search_tickets(text)
+        st.caption(f"{len(results)} best matches")
+        st.dataframe(results, hide_index=True)
+
+def filter_view(options):
+    st.subheader("Filter Tickets")
+
+    col1, col2, col3 = st.columns(3)
+    priority = col1.multiselect("Priority", options["priority"])
+    status = col2.multiselect("Status", options["status"], key="filter_status")
+    assigned_to = col3.multiselect("Assigned to", options["assigned_to"])
+
+    col4, col5, col6 = st.columns(3)
+    dates = col4.date_input("Created between", value=(), key="ticket_dates")
+    order_by = col5.selectbox("Sort by", sorted(TICKET_SORT_COLUMNS), index=sorted(TICKET_SORT_COLUMNS).index("created_date"))
+    limit = col6.number_input("Max rows", min_value=1, max_value=10_000, value=100)
+
+    start = dates[0] if len(dates) > 0 else None
+    end = dates[1] + timedelta(days=1) if len(dates) > 1 else None
+    df = filter_tickets(priority=priority, status=status, assigned_to=assigned_to,
+                        start=start, end=end, order_by=order_by, limit=limit)
+    st.dataframe(df)
+
+def chart_analysis(data):
     st.bar_chart(data, x="priority", y = "count")
 
+def sla_view(report):
+    summary = report["summary"]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Resolved tickets", f"{summary['resolved']:,}")
+    breach_rate = summary["breach_rate"]
+    col2.metric("SLA breach rate", "-" if breach_rate is None else f"{breach_rate:.1%}")
+    for col, label in ((col3, "p50_hours"), (col4, "p90_hours")):
+        value = summary[label]
+        col.metric(f"{label.split('_')[0]} resolution", "-" if value is None else f"{value:.1f} h")
+
+    st.subheader("By priority")
+    st.dataframe(report["priority"], hide_index=True)
+    st.bar_chart(report["priority"], x="priority", y="breach_rate")
+
+    st.subheader("By assignee")
+    st.dataframe(report["assignee"], hide_index=True)
+
 st.title("It Tickets Dashboard")
 
-tabs = st.tabs(["Setup Database", "CRUD Incidents", "Analytics"])
+tabs = st.tabs(["Setup Database", "CRUD Incidents", "Analytics", "SLA"])
 
 with tabs[2]:
     st.header("Database Setup")
     if st.button("Run Setup"):
         setup_database()
+    query_stats_panel()
 
 with tabs[1]:
     st.header("CRUD Operations on Tickets")
     demo_crud_operations()
 
+# Independent queries run concurrently instead of one after another,
+# after the setup and CRUD tabs so their writes are included
+results = fetch_all({
+    "sla": (get_sla_report,),
+    "priority": (get_priority_count,),
+    "filter_options": (get_ticket_filter_options,),
+    "ticket": (get_ticket_by_id, "2008"),
+})
+
+with tabs[3]:
+    st.header("Resolution-time SLA")
+    sla_view(results["sla"])
+
 with tabs[0]:
     st.header("Chart Analysis")
     st.subheader("Count of each priority")
-    chart_analysis()
+    chart_analysis(results["priority"])
     st.header("Analytics")
-    demo_analytics()
+    search_view()
+    filter_view(results["filter_options"])
+    demo_analytics(results["ticket"])
@@ -1,5 +1,6 @@
 import streamlit as st
-from app.services.user_services import register_user, login_user, migrate_users_from_file
+from app.services.user_service import register_user, login_user, migrate_users_from_file
+from app.ui.session import sign_in
 
 st.set_page_config(page_title='CST1510 CW2'
                     )
@@ -24,6 +25,7 @@ def demo_authentication():
         if st.button("Login"):
             success, msg = login_user(login_user_input, login_pass_input)
             if success:
+                sign_in(login_user_input)
                 st.success(msg)
                 st.switch_page("pages/home.py")
             else: